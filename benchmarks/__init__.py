@@ -0,0 +1,9 @@
+import sys
+from pathlib import Path
+
+
+PROJECT_ROOT = Path(__file__).parent.parent.resolve()
+
+# Модули бота импортируются как в src/main.py, без префикса src
+if str(PROJECT_ROOT / "src") not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT / "src"))
@@ -0,0 +1,205 @@
+"""Бенчмарки разбора страниц, форматирования отчёта и холодного импорта
+
+Замеряет время разбора страниц из benchmarks/fixtures каждым бэкендом,
+время форматирования CardInfo.out_list на карту, пиковую память
+и время импорта точек входа в свежем интерпретаторе.
+Результат сравнивается с benchmarks/baseline.json, при регрессии
+сверх допуска код выхода 1.
+
+Время зависит от машины, поэтому перед замерами прогоняется
+калибровочная нагрузка, и время сравнивается в её единицах.
+
+python -m benchmarks.bench_parsing [--update-baseline] [--tolerance 0.25]
+"""
+import argparse
+import json
+import logging
+import random
+import subprocess
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+from benchmarks import PROJECT_ROOT
+from HtmlBackend import SoupBackend, LxmlBackend, etree
+from MangabuffParser import CardInfo, CardRank, Lot
+
+
+FIXTURES_PATH = PROJECT_ROOT / "benchmarks" / "fixtures"
+BASELINE_PATH = PROJECT_ROOT / "benchmarks" / "baseline.json"
+
+PAGES = ("market", "wish_list", "lot")
+FORMAT_SIZES = (100, 1000, 5000)
+FORMAT_MANGAS = 50
+FORMAT_LOTS = 5
+
+# Код импорта точек входа: сканирование из cli и бот с Telegram для сравнения
+IMPORTS = {
+    "cli": "import cli, MangabuffParser",
+    "bot": "import TrackerBot"
+}
+
+REPEAT = 7
+TIME_TOLERANCE = 0.25
+MEMORY_TOLERANCE = 0.10
+
+logger = logging.getLogger(__name__)
+
+def _best(function):
+    """Лучшее время одного вызова из REPEAT серий, в секундах.
+    Число вызовов в серии подбирается так, чтобы серия шла не меньше 0.2 с"""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(number=number, repeat=REPEAT)) / number
+
+
+def _peak_kb(function):
+    """Пиковая память одного вызова в КБ"""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def calibrate():
+    """Время калибровочной нагрузки в мс: разбор строк, словари и json, как в боте"""
+    data = [{"data_id": str(i), "name": f"card {i}", "lots": list(range(i % 7))} for i in range(2000)]
+
+    def workload():
+        text = json.dumps(data, ensure_ascii=False)
+        return sorted(json.loads(text), key=lambda x: x["name"])
+
+    return _best(workload) * 1000
+
+
+def _backends():
+    backends = [SoupBackend()]
+    if etree is not None: backends.append(LxmlBackend())
+    return backends
+
+
+def bench_parse():
+    """Время разбора одной страницы в мс и пиковая память в КБ по бэкендам"""
+    results = dict()
+    for backend in _backends():
+        for page in PAGES:
+            content = (FIXTURES_PATH / f"{page}.html").read_bytes()
+            method = getattr(backend, f"{page}_page")
+            if method(content) is None:
+                raise ValueError(f"Фикстура {page}.html не разбирается бэкендом {backend.name}")
+
+            results[f"parse.{backend.name}.{page}.ms"] = _best(lambda: method(content)) * 1000
+            results[f"parse.{backend.name}.{page}.peak_kb"] = _peak_kb(lambda: method(content))
+    return results
+
+
+def _cards(size):
+    rng = random.Random(size)
+    ranks = list(CardRank)
+    return [
+        CardInfo(
+            data_id=str(i),
+            rank=rng.choice(ranks),
+            name=f"Карта {i}",
+            manga_name=f"Тайтл {rng.randrange(FORMAT_MANGAS)}",
+            lots=[Lot(rng.randint(50, 50000), str(i * FORMAT_LOTS + j)) for j in range(FORMAT_LOTS)]
+        ) for i in range(size)
+    ]
+
+
+def bench_format():
+    """Время CardInfo.out_list на одну карту в мкс и пиковая память в КБ по размерам списка"""
+    results = dict()
+    for size in FORMAT_SIZES:
+        cards = _cards(size)
+        results[f"format.out_list.{size}.us_per_card"] = _best(lambda: CardInfo.out_list(list(cards))) / size * 1e6
+        results[f"format.out_list.{size}.peak_kb"] = _peak_kb(lambda: CardInfo.out_list(list(cards)))
+    return results
+
+
+def _process_ms(code):
+    """Лучшее время процесса интерпретатора с кодом code из REPEAT запусков, в мс"""
+    times = list()
+    for _ in range(REPEAT):
+        start = timeit.default_timer()
+        subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT / "src", check=True)
+        times.append(timeit.default_timer() - start)
+    return min(times) * 1000
+
+
+def bench_import():
+    """Время холодного импорта точек входа в мс, без запуска самого интерпретатора"""
+    startup = _process_ms("pass")
+    return {f"import.{name}.ms": _process_ms(code) - startup for name, code in IMPORTS.items()}
+
+
+def run():
+    """Все замеры и калибровка. Калибровка до и после замеров, берётся лучшая"""
+    calibration = calibrate()
+    metrics = {**bench_parse(), **bench_format(), **bench_import()}
+    return {
+        "calibration_ms": min(calibration, calibrate()),
+        "metrics": metrics
+    }
+
+
+def compare(result, baseline, *, tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """Сравнение с baseline
+
+    :return:
+        list[str]: Описания регрессий, пустой если их нет
+    """
+    scale = result["calibration_ms"] / baseline["calibration_ms"]
+    regressions = list()
+    for name, value in result["metrics"].items():
+        base = baseline["metrics"].get(name)
+        if base is None: continue
+        if name.endswith("peak_kb"):
+            limit = base * (1 + memory_tolerance)
+        else:
+            limit = base * scale * (1 + tolerance)
+        if value > limit:
+            regressions.append(f"{name}: {value:.2f} > {limit:.2f} (baseline {base:.2f})")
+    return regressions
+
+
+def _report(result, baseline):
+    scale = result["calibration_ms"] / baseline["calibration_ms"] if baseline else 1
+    print(f"calibration: {result['calibration_ms']:.2f} ms, scale to baseline: {scale:.2f}")
+    for name, value in result["metrics"].items():
+        base = baseline["metrics"].get(name) if baseline else None
+        if base is None:
+            print(f"{name:<40} {value:>12.2f}")
+            continue
+        expected = base if name.endswith("peak_kb") else base * scale
+        print(f"{name:<40} {value:>12.2f} {value / expected - 1:>+8.1%}")
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(description="Бенчмарки разбора страниц и форматирования")
+    arguments.add_argument("--update-baseline", action="store_true", help="Записать результат как baseline")
+    arguments.add_argument("--tolerance", type=float, default=TIME_TOLERANCE, help="Допуск по времени, доля")
+    arguments.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE, help="Допуск по памяти, доля")
+    arguments.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    args = arguments.parse_args(argv)
+
+    result = run()
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else None
+    _report(result, baseline)
+
+    if args.update_baseline or baseline is None:
+        args.baseline.write_text(json.dumps(result, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        print(f"Baseline written: {args.baseline}")
+        return 0
+
+    regressions = compare(result, baseline, tolerance=args.tolerance, memory_tolerance=args.memory_tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
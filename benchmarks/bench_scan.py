@@ -0,0 +1,166 @@
+"""Сквозное сканирование желаемого на локальном стенде
+
+Поднимает benchmarks.standin_server, входит и выполняет
+get_cards_lots(want=True) как бот, затем печатает время, число запросов,
+пропускную способность, ответы стенда по кодам, итоговую частоту
+ограничителя и метрики парсера по этапам. Параметры стенда те же,
+что у standin_server.
+
+python -m benchmarks.bench_scan --cards 1000 --latency 0.05 --rate-limit 20 --max-concurrency 8
+
+С --workers N то же сканирование делится между N процессами ShardedScan,
+у каждого свой аккаунт стенда.
+
+python -m benchmarks.bench_scan --cards 1000 --latency 0.05 --workers 3
+"""
+import json
+import logging
+import sys
+from dataclasses import replace
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import email_validator
+
+from benchmarks.standin_server import StandinServer, config_arguments, config_from_args
+from MangabuffParser import MangabuffParser
+from ScanProfiler import ScanProfiler
+from ShardedScan import ShardedScan
+
+
+def offline_email():
+    """Почта стенда не проверяется через DNS, сканирование идёт без сети. Вызывается и в процессах ShardedScan"""
+    email_validator.CHECK_DELIVERABILITY = False
+
+
+def run(config, *, request_delay=0.0, min_request_delay=0.0, max_request_delay=60.0, max_concurrency=4, profile=None):
+    """Одно сканирование на стенде
+
+    :return:
+        dict: Результаты замера
+    """
+    with StandinServer(config) as server:
+        parser = MangabuffParser(
+            mail=config.mail,
+            password=config.password,
+            base_url=server.url,
+            request_delay=request_delay,
+            min_request_delay=min_request_delay,
+            max_request_delay=max_request_delay,
+            max_concurrency=max_concurrency,
+            profiler=ScanProfiler(path=profile, enabled=True) if profile is not None else None
+        )
+        login_stats = dict(server.stats)
+
+        error = None
+        cards = []
+        started = perf_counter()
+        try:
+            cards = parser.get_cards_lots(want=True)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        elapsed = perf_counter() - started
+
+        expected = server.expected_want_cards()
+        found = {card.data_id for card in cards}
+        responses = {str(key): value - login_stats.get(key, 0) for key, value in server.stats.items()}
+
+    return {
+        "elapsed_s": elapsed,
+        "cards": len(cards),
+        "cards_expected": len(expected),
+        "cards_missing": len(expected - found),
+        "requests": parser.last_scan_requests,
+        "requests_per_s": parser.last_scan_requests / elapsed if elapsed else 0,
+        "cards_per_s": len(cards) / elapsed if elapsed else 0,
+        "final_rate": parser.current_rate,
+        "responses": responses,
+        "stages": {stage: stats._asdict() for stage, stats in parser.metrics.scan().items()},
+        "error": error,
+        "profile": str(parser.profiler.last_dump) if profile is not None else None,
+    }
+
+
+def run_sharded(config, *, workers, request_delay=0.0, min_request_delay=0.0, max_request_delay=60.0, max_concurrency=4):
+    """Одно сканирование на стенде процессами ShardedScan, по аккаунту стенда на процесс
+
+    :return:
+        dict: Результаты замера
+    """
+    config = replace(config, users=max(config.users, workers))
+    with StandinServer(config) as server, TemporaryDirectory() as directory:
+        scan = ShardedScan(
+            accounts=[(account.mail, account.password) for account in server.accounts[:workers]],
+            queue_path=Path(directory) / "scan_queue.sqlite3",
+            base_url=server.url,
+            initializer=offline_email,
+            request_delay=request_delay,
+            min_request_delay=min_request_delay,
+            max_request_delay=max_request_delay,
+            max_concurrency=max_concurrency
+        )
+
+        error = None
+        cards = []
+        started = perf_counter()
+        try:
+            cards = scan.get_cards_lots(want=True)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        elapsed = perf_counter() - started
+
+        expected = server.expected_want_cards()
+        found = {card.data_id for card in cards}
+        responses = {str(key): value for key, value in server.stats.items()}
+
+    # Время включает запуск процессов и вход, запросы - без входа
+    return {
+        "elapsed_s": elapsed,
+        "cards": len(cards),
+        "cards_expected": len(expected),
+        "cards_missing": len(expected - found),
+        "requests": scan.last_scan_requests,
+        "requests_per_s": scan.last_scan_requests / elapsed if elapsed else 0,
+        "cards_per_s": len(cards) / elapsed if elapsed else 0,
+        "units": scan.last_scan_units,
+        "responses": responses,
+        "error": error,
+    }
+
+
+def main(argv=None):
+    arguments = config_arguments("Сквозное сканирование на локальном стенде mangabuff.ru")
+    arguments.add_argument("--request-delay", type=float, default=0.0, help="Начальный интервал между запросами, с")
+    arguments.add_argument("--min-request-delay", type=float, default=0.0)
+    arguments.add_argument("--max-request-delay", type=float, default=60.0)
+    arguments.add_argument("--max-concurrency", type=int, default=4)
+    arguments.add_argument("--workers", type=int, default=1, help="Число процессов ShardedScan, 1 - без них")
+    arguments.add_argument("--profile", type=Path, help="Папка для отчёта cProfile и tracemalloc по сканированию")
+    arguments.add_argument("--json", action="store_true", help="Вывести результат одной строкой JSON")
+    args = arguments.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    offline_email()
+
+    limits = {
+        "request_delay": args.request_delay,
+        "min_request_delay": args.min_request_delay,
+        "max_request_delay": args.max_request_delay,
+        "max_concurrency": args.max_concurrency
+    }
+    if args.workers > 1:
+        result = run_sharded(config_from_args(args), workers=args.workers, **limits)
+    else:
+        result = run(config_from_args(args), profile=args.profile, **limits)
+
+    if args.json:
+        print(json.dumps(result))
+    else:
+        for name, value in result.items():
+            print(f"{name:<16} {value:.2f}" if isinstance(value, float) else f"{name:<16} {value}")
+    return 1 if result["error"] or result["cards_missing"] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
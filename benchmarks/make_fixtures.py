@@ -0,0 +1,43 @@
+"""Генерация HTML страниц для бенчмарков
+
+Страницы строятся benchmarks.pages по сгенерированному каталогу карт.
+Число карт и лотов на странице задаётся константами ниже. Чтобы замерить разбор
+настоящей разметки, сохраните страницы из браузера под теми же именами
+в benchmarks/fixtures и обновите baseline.
+
+python -m benchmarks.make_fixtures
+"""
+from pathlib import Path
+
+from benchmarks import pages
+
+FIXTURES_PATH = Path(__file__).parent / "fixtures"
+
+MARKET_CARDS = 60
+WISH_LIST_CARDS = 60
+LOTS = 120
+PAGES = 12
+SEED = 20251016
+
+
+def build():
+    """Страницы фикстур по именам"""
+    cards = pages.catalogue(max(MARKET_CARDS, WISH_LIST_CARDS), seed=SEED)
+    lot_card = pages.catalogue(1, seed=SEED, min_lots=LOTS, max_lots=LOTS)[0]
+    return {
+        "market": pages.market_page(cards[:MARKET_CARDS], url="/market?want=1&", last_page=PAGES),
+        "wish_list": pages.wish_list_page(cards[:WISH_LIST_CARDS], url="/cards/1/offers?type_w=0&", last_page=PAGES),
+        "lot": pages.lot_page(lot_card),
+    }
+
+
+def main():
+    FIXTURES_PATH.mkdir(exist_ok=True)
+    for name, content in build().items():
+        path = FIXTURES_PATH / f"{name}.html"
+        path.write_text(content, encoding="utf-8")
+        print(f"{path.name}: {path.stat().st_size // 1024} KB")
+
+
+if __name__ == '__main__':
+    main()
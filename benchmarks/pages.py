@@ -0,0 +1,165 @@
+"""Разметка страниц mangabuff.ru для фикстур и локального стенда
+
+Повторяет то, что читает HtmlBackend, вместе с обвязкой реальных
+страниц: шапкой, меню, встроенными скриптами и пагинацией.
+"""
+import random
+from html import escape
+from typing import NamedTuple
+
+RANKS = "xsapgbcd"
+WORDS = (
+    "тень", "клинок", "луна", "дракон", "сердце", "ветер", "пламя", "звезда", "король", "охотник",
+    "academy", "hero", "demon", "slayer", "tower", "return", "legend", "solo", "god", "night",
+)
+
+
+class Card(NamedTuple):
+    data_id: str
+    name: str
+    manga_name: str
+    rank: str
+    lots: list[tuple[str, int]]
+
+
+def _title(rng, words=3):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def catalogue(size, *, seed, min_lots=1, max_lots=40, mangas=None):
+    """Карты с лотами, одинаковые при одном seed"""
+    rng = random.Random(seed)
+    manga_names = [_title(rng) for _ in range(mangas or max(1, size // 8))]
+    return [
+        Card(
+            data_id=str(10000 + i),
+            name=_title(rng, 2),
+            manga_name=rng.choice(manga_names),
+            rank=rng.choice(RANKS),
+            lots=[(str(500000 + i * max_lots + j), rng.randint(50, 50000)) for j in range(rng.randint(min_lots, max_lots))]
+        ) for i in range(size)
+    ]
+
+
+def _head(title, csrf_token):
+    styles = "\n".join(f"<link rel=\"stylesheet\" href=\"/css/app-{i}.css?id=3f9c{i:04d}\">" for i in range(12))
+    # Встроенные скрипты и настройки занимают заметную часть реальных страниц
+    config = ",".join(f"\"key_{i}\":\"{'v' * 40}{i}\"" for i in range(400))
+    return (
+        "<!DOCTYPE html><html lang=\"ru\"><head><meta charset=\"utf-8\">"
+        f"<title>{escape(title)} | MangaBuff</title>"
+        "<meta name=\"viewport\" content=\"width=device-width, initial-scale=1\">"
+        f"<meta name=\"csrf-token\" content=\"{escape(csrf_token)}\">"
+        f"{styles}"
+        f"<script>window.config = {{{config}}};</script>"
+        "</head>"
+    )
+
+
+def _header():
+    menu = "".join(
+        f"<li class=\"menu__item\"><a class=\"menu__link\" href=\"/section/{i}\">Раздел {i}</a></li>" for i in range(25)
+    )
+    return (
+        "<header class=\"header\"><div class=\"header__inner\">"
+        "<a class=\"header__logo\" href=\"/\"><img src=\"/img/logo.svg\" alt=\"MangaBuff\"></a>"
+        f"<nav class=\"menu\"><ul class=\"menu__list\">{menu}</ul></nav>"
+        "<div class=\"header__user\"><img class=\"header__avatar\" src=\"/img/avatars/1.webp\"></div>"
+        "</div></header>"
+    )
+
+
+def _pagination(url, last_page):
+    links = "".join(f"<a class=\"pagination__button\" href=\"{url}page={page}\">{page}</a>" for page in range(1, last_page + 1))
+    return f"<div class=\"pagination\">{links}</div>"
+
+
+def _footer(user_id):
+    links = "".join(f"<a class=\"footer__link\" href=\"/info/{i}\">Информация {i}</a>" for i in range(20))
+    user_script = f"<script>window.user_id = {user_id};</script>" if user_id is not None else ""
+    return (
+        f"<footer class=\"footer\"><div class=\"footer__links\">{links}</div></footer>"
+        f"{user_script}"
+        f"<script src=\"/js/app.js?id={'f' * 20}\"></script>"
+        "</body></html>"
+    )
+
+
+def _page(title, body, *, csrf_token="bench-csrf-token", user_id=1):
+    return f"{_head(title, csrf_token)}<body>{_header()}<main class=\"main\">{body}</main>{_footer(user_id)}"
+
+
+def login_page(csrf_token):
+    """Страница входа с CSRF токеном"""
+    return _page(
+        "Вход",
+        "<form class=\"login-form\" method=\"post\" action=\"/login\">"
+        "<input name=\"email\"><input name=\"password\" type=\"password\"></form>",
+        csrf_token=csrf_token,
+        user_id=None
+    )
+
+
+def main_page(user_id):
+    """Главная страница со скриптом window.user_id"""
+    return _page("Главная", "<div class=\"home\">Главная</div>", user_id=user_id)
+
+
+def market_page(cards, *, url, last_page):
+    """Страница торговой площадки"""
+    tiles = "".join(
+        f"<div class=\"manga-cards__item-wrapper\" data-id=\"{card.data_id}\">"
+        f"<div class=\"manga-cards__item\" data-rank=\"{card.rank}\">"
+        f"<img class=\"manga-cards__image\" src=\"/img/cards/{card.data_id}.webp\" loading=\"lazy\" alt=\"\">"
+        "<div class=\"manga-cards__info\">"
+        f"<div class=\"manga-cards__name\">{escape(card.name)}</div>"
+        f"<div class=\"manga-cards__manga\">{escape(card.manga_name)}</div>"
+        f"<div class=\"manga-cards__lots\">Лотов: {len(card.lots)}</div>"
+        f"<div class=\"manga-cards__price\">от {min(price for _, price in card.lots)} ₽</div>"
+        "</div></div></div>"
+        for card in cards
+    )
+    filters = "".join(
+        f"<label><input type=\"checkbox\" name=\"rank[]\" value=\"{rank}\">{rank.upper()}</label>" for rank in RANKS
+    )
+    return _page(
+        "Торговая площадка",
+        f"<div class=\"market-filters\"><form class=\"market-filters__form\">{filters}</form></div>"
+        f"<div class=\"market-list__cards market-list__cards--all manga-cards\">{tiles}</div>"
+        f"{_pagination(url, last_page)}"
+    )
+
+
+def wish_list_page(cards, *, url, last_page):
+    """Страница списка желаемого"""
+    items = "".join(
+        f"<div class=\"manga-cards__item\" data-card-id=\"{card.data_id}\" "
+        f"data-name=\"{escape(card.name)}\" data-manga-name=\"{escape(card.manga_name)}\" "
+        f"data-rank=\"{card.rank}\">"
+        f"<img class=\"manga-cards__image\" src=\"/img/cards/{card.data_id}.webp\" loading=\"lazy\" alt=\"\">"
+        "<div class=\"manga-cards__actions\"><button class=\"button button--small\">Убрать</button></div>"
+        "</div>"
+        for card in cards
+    )
+    return _page("Желаемое", f"<div class=\"manga-cards\">{items}</div>{_pagination(url, last_page)}")
+
+
+def lot_page(card):
+    """Страница лотов карты"""
+    lots = "".join(
+        f"<div class=\"market-show__item\" data-id=\"{lot_id}\">"
+        "<div class=\"market-show__user\">"
+        f"<img class=\"market-show__avatar\" src=\"/img/avatars/{lot_id}.webp\">"
+        f"<a class=\"market-show__user-name\" href=\"/users/{lot_id}\">Продавец {lot_id}</a>"
+        "</div>"
+        f"<div class=\"market-show__item-price\"> {price} <span>₽</span> </div>"
+        "<button class=\"button market-show__buy\">Купить</button>"
+        "</div>"
+        for lot_id, price in card.lots
+    )
+    return _page(
+        "Лоты карты",
+        f"<div class=\"card-show\" data-name=\"{escape(card.name)}\">"
+        f"<img class=\"card-show__image\" src=\"/img/cards/{card.data_id}.webp\">"
+        f"<div class=\"market-show__items\">{lots}</div></div>"
+    )
@@ -0,0 +1,383 @@
+"""Локальный стенд mangabuff.ru с внедрением сбоев
+
+Отдаёт вход с CSRF токеном, главную со скриптом window.user_id,
+постраничные торговую площадку и список желаемого, страницы лотов
+/market/card/{id} по сгенерированному каталогу. Аккаунтов может быть
+несколько, у каждого свой список желаемого. Задержка ответа,
+доля ответов 5xx и лимит частоты с ответом 429 настраиваются
+и действуют на страницы сканирования, вход проходит без сбоев.
+Сессии можно сбросить, как при их истечении на сайте, сразу
+или после заданного числа запросов сканирования.
+Отказ сайта тоже: после заданного числа запросов сканирования
+все они получают 503, пока outage_after не сброшен в 0.
+Случайность задаётся seed, так что прогоны повторяемы.
+
+python -m benchmarks.standin_server --cards 2000 --latency 0.1 --rate-limit 5 --port 8080
+"""
+import argparse
+import logging
+import random
+import secrets
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import NamedTuple
+from http import HTTPStatus
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from math import ceil
+from time import sleep, monotonic
+from urllib.parse import urlsplit, parse_qs
+
+from benchmarks import pages
+
+
+SESSION_COOKIE = "mangabuff_session"
+ERROR_CODES = (500, 502, 503)
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class StandinConfig:
+    cards: int = 500
+    wish_ratio: float = 0.5
+    page_size: int = 36
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    rate_limit: float = 0.0
+    retry_after: float = 1.0
+    seed: int = 1
+    mail: str = "bench@gmail.com"
+    password: str = "password"
+    user_id: str = "1"
+    users: int = 1
+    expire_after: int = 0
+    outage_after: int = 0
+
+
+class Account(NamedTuple):
+    mail: str
+    password: str
+    user_id: str
+
+
+class _Session:
+    __slots__ = ("csrf_token", "account")
+
+    def __init__(self):
+        self.csrf_token = secrets.token_hex(16)
+        self.account = None
+
+    @property
+    def authorized(self):
+        return self.account is not None
+
+
+class StandinServer:
+    """HTTP сервер стенда в отдельном потоке
+
+    Example:
+        >>> with StandinServer(StandinConfig(cards=100, latency=0.05)) as server:
+        ...     parser = MangabuffParser(mail=server.config.mail, password=server.config.password, base_url=server.url)
+    """
+    def __init__(self, config: StandinConfig | None = None, *, host="127.0.0.1", port=0):
+        self.config = config if config is not None else StandinConfig()
+        self.catalogue = pages.catalogue(self.config.cards, seed=self.config.seed)
+        self._cards_by_id = {card.data_id: card for card in self.catalogue}
+
+        self.accounts = [self._account(number) for number in range(max(1, self.config.users))]
+        self.wish_lists = [
+            [card for card in self.catalogue if rng.random() < self.config.wish_ratio]
+            for rng in (random.Random(self.config.seed if number == 0 else f"{self.config.seed}:{number}")
+                        for number in range(len(self.accounts)))
+        ]
+        self.wish_list = self.wish_lists[0]
+        self._wish_ids = [{card.data_id for card in wish_list} for wish_list in self.wish_lists]
+        self._accounts_by_user_id = {account.user_id: number for number, account in enumerate(self.accounts)}
+
+        self._rng = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._sessions: dict[str, _Session] = dict()
+        self._tokens = max(1.0, self.config.rate_limit)
+        self._tokens_at = monotonic()
+        self.stats = Counter()
+
+        self._httpd = ThreadingHTTPServer((host, port), _handler(self))
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+        return False
+
+    def start(self):
+        """Запуск в фоновом потоке"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mangabuff_standin", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"Stand-in server started on {self.url}, {len(self.catalogue)} cards, "
+            f"{len(self.accounts)} accounts, {len(self.wish_list)} wanted by the first"
+        )
+
+    def stop(self):
+        """Остановка сервера"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        logger.info(f"Stand-in server stopped, stats: {dict(self.stats)}")
+
+    def _account(self, number):
+        """Первый аккаунт из настроек, следующие с номером в почте и следующим user_id"""
+        if number == 0:
+            return Account(self.config.mail, self.config.password, self.config.user_id)
+        local, domain = self.config.mail.split("@", 1)
+        return Account(f"{local}{number + 1}@{domain}", self.config.password, str(int(self.config.user_id) + number))
+
+    def expected_want_cards(self, account=0):
+        """data_id карт, которые должно вернуть сканирование желаемого аккаунта"""
+        return set(self._wish_ids[account])
+
+    def expire_sessions(self):
+        """Сброс всех сессий: следующие запросы уходят на вход"""
+        with self._lock:
+            self._sessions.clear()
+        logger.info("Stand-in sessions expired")
+
+    def count(self, key):
+        """Счётчик статистики, потокобезопасно
+
+        :return:
+            int: Новое значение счётчика
+        """
+        with self._lock:
+            self.stats[key] += 1
+            return self.stats[key]
+
+    def _fault(self):
+        """Код внедрённого сбоя и Retry-After, None если запрос проходит"""
+        with self._lock:
+            if self.config.rate_limit > 0:
+                now = monotonic()
+                self._tokens = min(
+                    max(1.0, self.config.rate_limit),
+                    self._tokens + (now - self._tokens_at) * self.config.rate_limit
+                )
+                self._tokens_at = now
+                if self._tokens < 1:
+                    return HTTPStatus.TOO_MANY_REQUESTS, self.config.retry_after
+                self._tokens -= 1
+
+            if self.config.error_rate > 0 and self._rng.random() < self.config.error_rate:
+                return self._rng.choice(ERROR_CODES), None
+            delay = self.config.latency + (self._rng.uniform(0, self.config.jitter) if self.config.jitter else 0)
+        if delay: sleep(delay)
+        return None
+
+    def _session(self, cookie_header, *, create=False):
+        cookies = SimpleCookie(cookie_header or "")
+        token = cookies[SESSION_COOKIE].value if SESSION_COOKIE in cookies else None
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is None and create:
+                token = secrets.token_hex(16)
+                session = self._sessions[token] = _Session()
+        return token, session
+
+    def _listing(self, cards, query, *, rank_param):
+        rank = query.get(rank_param, [None])[0]
+        if rank: cards = [card for card in cards if card.rank == rank]
+        page = int(query.get("page", ["1"])[0])
+        size = self.config.page_size
+        return cards[(page - 1) * size:page * size], max(1, ceil(len(cards) / size))
+
+    def market(self, query, base, account=0):
+        """Страница торговой площадки: want=1 оставляет карты из списка желаемого аккаунта, q ищет по названию"""
+        cards = self.catalogue
+        if query.get("want", ["0"])[0] == "1":
+            cards = [card for card in cards if card.data_id in self._wish_ids[account]]
+        search = query.get("q", [""])[0].lower()
+        if search:
+            cards = [card for card in cards if search in card.name.lower() or search in card.manga_name.lower()]
+        page_cards, last_page = self._listing(cards, query, rank_param="rank")
+        return pages.market_page(page_cards, url=base, last_page=last_page)
+
+    def wish_list_page(self, user_id, query, base):
+        """Страница списка желаемого пользователя, type фильтрует по рангу"""
+        account = self._accounts_by_user_id.get(user_id)
+        if account is None: return None
+        page_cards, last_page = self._listing(self.wish_lists[account], query, rank_param="type")
+        return pages.wish_list_page(page_cards, url=base, last_page=last_page)
+
+    def lot_page(self, data_id):
+        card = self._cards_by_id.get(data_id)
+        return pages.lot_page(card) if card is not None else None
+
+
+def _handler(server: StandinServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            logger.debug(format % args)
+
+        def _send(self, status, body="", *, headers=None):
+            content = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(content)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(content)
+            server.count(int(status))
+
+        def _faulted(self):
+            requests = server.count("scan_requests")
+            if requests == server.config.expire_after:
+                server.expire_sessions()
+            if 0 < server.config.outage_after < requests:
+                self._send(HTTPStatus.SERVICE_UNAVAILABLE)
+                return True
+            fault = server._fault()
+            if fault is None: return False
+            status, retry_after = fault
+            self._send(status, headers={"Retry-After": f"{retry_after:g}"} if retry_after is not None else None)
+            return True
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            query = parse_qs(url.query)
+            token, session = server._session(self.headers.get("Cookie"), create=url.path.rstrip("/") == "/login")
+
+            if url.path.rstrip("/") == "/login":
+                self._send(
+                    HTTPStatus.OK,
+                    pages.login_page(session.csrf_token),
+                    headers={"Set-Cookie": f"{SESSION_COOKIE}={token}; Path=/"}
+                )
+                return
+
+            authorized = session is not None and session.authorized
+            if url.path in ("", "/"):
+                self._send(HTTPStatus.OK, pages.main_page(server.accounts[session.account].user_id if authorized else None))
+                return
+            if not authorized:
+                self._send(HTTPStatus.FOUND, headers={"Location": "/login"})
+                return
+            if self._faulted(): return
+
+            parts = url.path.strip("/").split("/")
+            if parts == ["market"]:
+                server.count("market_pages")
+                body = server.market(query, f"/market?{_without_page(url.query)}", session.account)
+            elif len(parts) == 3 and parts[0] == "cards" and parts[2] == "offers":
+                body = server.wish_list_page(parts[1], query, f"{url.path}?{_without_page(url.query)}")
+            elif len(parts) == 3 and parts[:2] == ["market", "card"]:
+                body = server.lot_page(parts[2])
+            else:
+                body = None
+
+            if body is None:
+                self._send(HTTPStatus.NOT_FOUND, "Not found")
+            else:
+                self._send(HTTPStatus.OK, body)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            form = parse_qs(self.rfile.read(length).decode("utf-8"))
+            _, session = server._session(self.headers.get("Cookie"))
+
+            if urlsplit(self.path).path.rstrip("/") != "/login":
+                self._send(HTTPStatus.NOT_FOUND, "Not found")
+                return
+            if session is None or self.headers.get("X-Csrf-Token") != session.csrf_token:
+                self._send(419, "CSRF token mismatch")
+                return
+            credentials = (form.get("email", [""])[0], form.get("password", [""])[0])
+            account = next((
+                number for number, account in enumerate(server.accounts)
+                if (account.mail, account.password) == credentials
+            ), None)
+            if account is None:
+                self._send(HTTPStatus.UNPROCESSABLE_ENTITY, "Invalid credentials")
+                return
+            session.account = account
+            server.count("logins")
+            self._send(HTTPStatus.OK, "{}")
+
+    return Handler
+
+
+def _without_page(query):
+    """Строка запроса без page и с & в конце, как в ссылках пагинации"""
+    params = [param for param in query.split("&") if param and not param.startswith("page=")]
+    return "&".join(params) + "&" if params else ""
+
+
+def config_arguments(description):
+    """Разбор аргументов командной строки для StandinConfig"""
+    arguments = argparse.ArgumentParser(description=description)
+    defaults = StandinConfig()
+    arguments.add_argument("--cards", type=int, default=defaults.cards, help="Размер каталога")
+    arguments.add_argument("--wish-ratio", type=float, default=defaults.wish_ratio, help="Доля каталога в желаемом")
+    arguments.add_argument("--page-size", type=int, default=defaults.page_size, help="Карт на странице")
+    arguments.add_argument("--latency", type=float, default=defaults.latency, help="Задержка ответа, с")
+    arguments.add_argument("--jitter", type=float, default=defaults.jitter, help="Случайная добавка к задержке, с")
+    arguments.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Доля ответов 5xx")
+    arguments.add_argument("--rate-limit", type=float, default=defaults.rate_limit, help="Запросов в секунду до ответов 429, 0 без лимита")
+    arguments.add_argument("--retry-after", type=float, default=defaults.retry_after, help="Retry-After ответа 429, с")
+    arguments.add_argument("--expire-after", type=int, default=defaults.expire_after, help="Сбросить сессии после стольких запросов сканирования, 0 никогда")
+    arguments.add_argument("--outage-after", type=int, default=defaults.outage_after, help="Отвечать 503 на все запросы сканирования после стольких, 0 никогда")
+    arguments.add_argument("--users", type=int, default=defaults.users, help="Число аккаунтов со своими списками желаемого")
+    arguments.add_argument("--seed", type=int, default=defaults.seed)
+    return arguments
+
+
+def config_from_args(args):
+    return StandinConfig(
+        cards=args.cards,
+        wish_ratio=args.wish_ratio,
+        page_size=args.page_size,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        retry_after=args.retry_after,
+        seed=args.seed,
+        users=args.users,
+        expire_after=args.expire_after,
+        outage_after=args.outage_after
+    )
+
+
+def main(argv=None):
+    arguments = config_arguments("Локальный стенд mangabuff.ru")
+    arguments.add_argument("--host", default="127.0.0.1")
+    arguments.add_argument("--port", type=int, default=8080)
+    args = arguments.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    server = StandinServer(config_from_args(args), host=args.host, port=args.port)
+    print(f"Stand-in on {server.url}")
+    for account in server.accounts:
+        print(f"mail: {account.mail}, password: {account.password}")
+    server.start()
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import random
+from time import monotonic
+
+import httpx
+
+from RateLimiter import AdaptiveRateLimiter, parse_retry_after, TOO_MANY_REQUESTS_CODE
+from ResponseCache import ResponseCache
+from ScanMetrics import ScanMetrics
+
+
+REQUEST_TIMEOUT = 10
+
+NOT_MODIFIED_CODE = 304
+
+RATE_LIMIT_RETRIES = 3
+
+RETRIES = 3
+
+RETRY_BACKOFF = 1.0
+
+MAX_RETRY_BACKOFF = 30.0
+
+logger = logging.getLogger(__name__)
+
+class AsyncFetcher:
+    """Асинхронный загрузчик страниц на httpx
+
+    Ограничивает число одновременных запросов, а частоту их стартов
+    отдаёт общему для всех запросов AdaptiveRateLimiter.
+    Ожидание ответа одного запроса не задерживает старт следующего.
+
+    С ResponseCache свежие ответы отдаются без запроса, а устаревшие
+    перепроверяются условным запросом: на 304 отдаётся тело из кэша.
+
+    С ScanMetrics каждый запрос записывается под этапом stage:
+    статус, размер ответа, время сети и ожидания в ограничителе.
+
+    Сетевые ошибки и ответы 5xx повторяются до retries раз с паузой
+    retry_backoff, которая удваивается с каждой попыткой.
+    """
+    def __init__(
+            self,
+            *,
+            headers,
+            cookies,
+            limiter: AdaptiveRateLimiter,
+            max_concurrency,
+            response_cache: ResponseCache | None = None,
+            cache_namespace="",
+            metrics: ScanMetrics | None = None,
+            retries=RETRIES,
+            retry_backoff=RETRY_BACKOFF
+    ):
+        self._limiter = limiter
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = httpx.AsyncClient(headers=headers, cookies=cookies, follow_redirects=True)
+        self._cache = response_cache
+        self._cache_namespace = cache_namespace
+        self._metrics = metrics
+        self._retries = retries
+        self._retry_backoff = retry_backoff
+        self.requests_count = 0
+        self.cache_hits = 0
+        self.not_modified_count = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+        return False
+
+    @property
+    def cookies(self) -> httpx.Cookies:
+        """Cookies клиента, после повторного входа заменяются новыми"""
+        return self._client.cookies
+
+    @cookies.setter
+    def cookies(self, cookies: httpx.Cookies):
+        self._client.cookies = cookies
+
+    async def _request(self, url, timeout, headers, stage):
+        wait_started = monotonic()
+        await self._limiter.acquire()
+        waited = monotonic() - wait_started
+        self.requests_count += 1
+        logger.debug(f"GET {url}")
+
+        started = monotonic()
+        try:
+            if headers:
+                response = await self._client.get(url, timeout=timeout, headers=headers)
+            else:
+                response = await self._client.get(url, timeout=timeout)
+        except httpx.TransportError:
+            self._limiter.on_error()
+            if self._metrics is not None:
+                self._metrics.observe_request(stage=stage, status="error", size=0, seconds=monotonic() - started, wait=waited)
+            raise
+        latency = monotonic() - started
+
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        self._limiter.on_response(
+            status_code=response.status_code,
+            latency=latency,
+            retry_after=retry_after
+        )
+        if self._metrics is not None:
+            self._metrics.observe_request(
+                stage=stage,
+                status=response.status_code,
+                size=len(response.content),
+                seconds=latency,
+                wait=waited
+            )
+        return response, retry_after
+
+    async def _backoff(self, url, attempt, reason):
+        delay = min(MAX_RETRY_BACKOFF, self._retry_backoff * 2 ** attempt)
+        delay *= random.uniform(0.5, 1.0)
+        logger.warning(f"{url} failed: {reason}, retry {attempt + 1} in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+    async def get(self, url, *, timeout=REQUEST_TIMEOUT, stage=""):
+        """GET запрос с учётом ограничений и кэша.
+        Ответ 429 и 5xx с Retry-After повторяется до RATE_LIMIT_RETRIES раз,
+        паузу выдерживает ограничитель. Сетевые ошибки и остальные 5xx
+        повторяются до retries раз с экспоненциальной паузой
+
+        :return:
+            httpx.Response: Успешный ответ сервера или ответ из кэша
+        """
+        cached = self._cache.lookup(url, namespace=self._cache_namespace) if self._cache is not None else None
+        if cached is not None and cached.fresh:
+            self.cache_hits += 1
+            logger.debug(f"Cache hit {url}")
+            if self._metrics is not None:
+                self._metrics.observe_cache_hit(stage=stage)
+            return self._cached_response(url, cached)
+
+        validators = cached.validators() if cached is not None else {}
+
+        async with self._semaphore:
+            attempt = 0
+            while True:
+                try:
+                    response, retry_after = await self._request(url, timeout, validators, stage)
+                except httpx.TransportError as e:
+                    if attempt >= self._retries: raise
+                    await self._backoff(url, attempt, repr(e))
+                    attempt += 1
+                    continue
+
+                rate_limited = response.status_code == TOO_MANY_REQUESTS_CODE \
+                    or (response.status_code >= 500 and retry_after is not None)
+                if rate_limited and attempt < RATE_LIMIT_RETRIES:
+                    logger.warning(f"{url} answered {response.status_code}, retry {attempt + 1}")
+                elif not rate_limited and response.status_code >= 500 and attempt < self._retries:
+                    await self._backoff(url, attempt, str(response.status_code))
+                else:
+                    break
+                attempt += 1
+
+            if response.status_code == NOT_MODIFIED_CODE and cached is not None:
+                self.not_modified_count += 1
+                self._cache.refresh(url, namespace=self._cache_namespace)
+                return self._cached_response(url, cached)
+
+            response.raise_for_status()
+            self._store(url, response)
+            return response
+
+    @staticmethod
+    def _cached_response(url, cached):
+        return httpx.Response(
+            status_code=200,
+            headers=cached.headers,
+            content=cached.content,
+            request=httpx.Request("GET", url)
+        )
+
+    def _store(self, url, response):
+        # После редиректа (например, на вход) ответ не относится к запрошенному URL
+        if self._cache is None or str(response.url) != url: return
+        self._cache.store(url, namespace=self._cache_namespace, content=response.content, headers=response.headers)
+
+    async def close(self):
+        """Закрытие клиента"""
+        await self._client.aclose()
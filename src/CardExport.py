@@ -0,0 +1,93 @@
+import csv
+import json
+import logging
+
+
+# Размер буфера файла экспорта: записи копятся в нём, а не в списке
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+CSV_FIELDS = ("data_id", "rank", "name", "manga_name", "market_signal", "price", "lot_id")
+
+logger = logging.getLogger(__name__)
+
+class NdjsonExport:
+    """Экспорт карт в NDJSON: одна строка JSON на карту вместе с лотами
+
+    Карта записывается сразу, как передана, и в памяти не остаётся,
+    так что расход памяти не зависит от размера сканирования.
+    С close_stream закрытие экспорта закрывает и stream.
+    """
+    name = "ndjson"
+
+    def __init__(self, stream, *, close_stream=False):
+        self._stream = stream
+        self._close_stream = close_stream
+        self.count = 0
+
+    @staticmethod
+    def record(card) -> dict:
+        """Запись одной карты: поля карты, сводка по лотам и лоты по возрастанию цены"""
+        return {
+            "data_id": card.data_id,
+            "rank": card.rank.value,
+            "name": card.name,
+            "manga_name": card.manga_name,
+            "market_signal": card.market_signal,
+            "lots_count": card.lots.count,
+            "min_price": card.lots.min_price,
+            "median_price": card.lots.median_price,
+            "lots": [{"price": lot.price, "lot_id": lot.lot_id} for lot in card.lots]
+        }
+
+    def write(self, card):
+        self._stream.write(json.dumps(self.record(card), ensure_ascii=False) + "\n")
+        self.count += 1
+
+    def close(self):
+        if self._close_stream:
+            self._stream.close()
+        else:
+            self._stream.flush()
+        logger.info(f"{self.name} export finished: {self.count} cards")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+
+class CsvExport(NdjsonExport):
+    """Экспорт карт в CSV: строка на каждый лот, карта без лотов - одна строка с пустой ценой.
+    Плоская таблица читается pandas и электронными таблицами без разбора вложенных полей"""
+    name = "csv"
+
+    def __init__(self, stream, *, close_stream=False):
+        super().__init__(stream, close_stream=close_stream)
+        self._writer = csv.writer(stream)
+        self._writer.writerow(CSV_FIELDS)
+
+    def write(self, card):
+        card_fields = (card.data_id, card.rank.value, card.name, card.manga_name, card.market_signal)
+        if not card.lots:
+            self._writer.writerow((*card_fields, "", ""))
+        else:
+            self._writer.writerows((*card_fields, lot.price, lot.lot_id) for lot in card.lots)
+        self.count += 1
+
+
+EXPORT_FORMATS = {export.name: export for export in (NdjsonExport, CsvExport)}
+
+
+def open_export(path, format):
+    """Экспорт в файл path в формате format из EXPORT_FORMATS, файл пишется через буфер
+
+    :return:
+        NdjsonExport|CsvExport: Экспорт, закрытие которого закрывает и файл
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Неизвестный формат {format}, доступны {', '.join(EXPORT_FORMATS)}")
+
+    stream = open(path, "w", encoding="utf-8", newline="", buffering=EXPORT_BUFFER_SIZE)
+    return EXPORT_FORMATS[format](stream, close_stream=True)
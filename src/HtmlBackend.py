@@ -0,0 +1,305 @@
+import re
+from typing import NamedTuple
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+
+SELECTOR_META_CSRF = "meta[name='csrf-token']"
+XPATH_META_CSRF = "//meta[@name='csrf-token']"
+
+SELECTOR_MARKET_CARDS_LIST = "div.market-list__cards.market-list__cards--all.manga-cards"
+SELECTOR_MARKET_CARDS_WRAPPER = "div.manga-cards__item-wrapper"
+
+SELECTOR_MARKET_SHOW = "div.card-show"
+SELECTOR_MARKET_SHOW_ITEM = "div.market-show__item"
+SELECTOR_MARKET_SHOW_ITEM_PRICE = "div.market-show__item-price"
+
+SCRIPT_USER_ID_TEXT = "window.user_id"
+
+SELECTOR_WISH_LIST_CARDS = "div.manga-cards__item"
+
+SELECTOR_PAGINATION_LINK = "a[href*='page=']"
+XPATH_PAGINATION_LINK = "//a[contains(@href, 'page=')]"
+PAGE_PARAM_RE = r"[?&]page=(\d+)"
+
+ATTR_CARD_RANK = "data-rank"
+ATTR_LOT_ID = "data-id"
+
+SIGNAL_IGNORED_ATTRS = ("data-id", ATTR_CARD_RANK)
+
+HIDDEN_TEXT_TAGS = ("script", "style", "template")
+
+
+class MarketItem(NamedTuple):
+    data_id: str
+    rank: str | None
+    signal: str = ""
+
+
+class WishListItem(NamedTuple):
+    data_id: str
+    name: str
+    manga_name: str
+    rank: str | None
+
+
+class ListingPage(NamedTuple):
+    items: list
+    # Номер последней страницы из пагинации, 0 если пагинации на странице нет
+    last_page: int
+
+
+class LotItem(NamedTuple):
+    lot_id: str
+    price: str
+
+
+class LotPage(NamedTuple):
+    name: str | None
+    items: list[LotItem]
+
+
+def _last_page(hrefs):
+    pages = list()
+    for href in hrefs:
+        page = re.search(PAGE_PARAM_RE, href or "")
+        if page: pages.append(int(page.group(1)))
+    return max(pages, default=0)
+
+
+def _attr(value):
+    return (value or "").strip()
+
+
+def _signal(attrs, text):
+    """Признак изменения карты в выдаче: data-атрибуты плитки и её видимый текст
+    (число лотов, цена). Пустая строка если плитка ничего не показывает"""
+    data_attrs = sorted(
+        f"{name}={_attr(value)}" for name, value in attrs.items()
+        if name.startswith("data-") and name not in SIGNAL_IGNORED_ATTRS
+    )
+    text = " ".join(text.split())
+    if not data_attrs and not text: return ""
+    return f"{';'.join(data_attrs)}|{text}"
+
+
+class SoupBackend:
+    """Разбор страниц полным деревом BeautifulSoup на html.parser.
+    Медленный, но не требует lxml: запасной вариант"""
+    name = "soup"
+
+    @staticmethod
+    def _soup(content):
+        # bs4 тяжёлый, с lxml он не нужен вовсе
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(content, features="html.parser")
+
+    @staticmethod
+    def _last_page(soup):
+        return _last_page(link.get("href") for link in soup.select(SELECTOR_PAGINATION_LINK))
+
+    @staticmethod
+    def _rank(element):
+        if element.has_attr(ATTR_CARD_RANK):
+            return element.get(ATTR_CARD_RANK)
+        rank_element = element.select_one(f"[{ATTR_CARD_RANK}]")
+        return rank_element.get(ATTR_CARD_RANK) if rank_element is not None else None
+
+    @staticmethod
+    def _visible_text(element):
+        """Текстовые узлы без комментариев и содержимого script/style/template,
+        как text() в LxmlBackend. get_text старых bs4 отдаёт и текст скриптов"""
+        from bs4 import Comment
+        return [
+            text for text in element.find_all(string=True)
+            if not isinstance(text, Comment) and text.find_parent(HIDDEN_TEXT_TAGS) is None
+        ]
+
+    def csrf_token(self, content):
+        csrf_meta = self._soup(content).select_one(SELECTOR_META_CSRF)
+        return csrf_meta.get("content") if csrf_meta else None
+
+    def user_id_script(self, content):
+        script = self._soup(content).find("script", string=re.compile(re.escape(SCRIPT_USER_ID_TEXT)))
+        return script.text if script else None
+
+    def market_page(self, content):
+        soup = self._soup(content)
+
+        market_list_cards = soup.select_one(SELECTOR_MARKET_CARDS_LIST)
+        if not market_list_cards: return None
+
+        cards_wrappers = market_list_cards.select(SELECTOR_MARKET_CARDS_WRAPPER)
+        if not cards_wrappers: return None
+
+        return ListingPage(
+            items=[
+                MarketItem(
+                    data_id=_attr(wrapper.get("data-id")),
+                    rank=self._rank(wrapper),
+                    signal=_signal(wrapper.attrs, " ".join(self._visible_text(wrapper)))
+                ) for wrapper in cards_wrappers
+            ],
+            last_page=self._last_page(soup)
+        )
+
+    def wish_list_page(self, content):
+        soup = self._soup(content)
+
+        cards_item = soup.select(SELECTOR_WISH_LIST_CARDS)
+        if not cards_item: return None
+
+        return ListingPage(
+            items=[
+                WishListItem(
+                    data_id=_attr(card.get("data-card-id")),
+                    name=_attr(card.get("data-name")),
+                    manga_name=_attr(card.get("data-manga-name")),
+                    rank=self._rank(card)
+                ) for card in cards_item
+            ],
+            last_page=self._last_page(soup)
+        )
+
+    def lot_page(self, content):
+        soup = self._soup(content)
+
+        card_show = soup.select_one(SELECTOR_MARKET_SHOW)
+        if not card_show: return None
+
+        items = list()
+        for lot in soup.select(SELECTOR_MARKET_SHOW_ITEM):
+            price = lot.select_one(SELECTOR_MARKET_SHOW_ITEM_PRICE)
+            if not price: continue
+            price_text = "".join(self._visible_text(price)).strip()
+            if not price_text: continue
+            items.append(LotItem(lot_id=_attr(lot.get(ATTR_LOT_ID)), price=price_text))
+
+        return LotPage(name=card_show.get("data-name"), items=items)
+
+
+def _class_xpath(selector, *, relative=False):
+    """XPath для селектора вида tag.class.class"""
+    tag, *classes = selector.split(".")
+    conditions = " and ".join(
+        f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')" for class_name in classes
+    )
+    return f"{'.' if relative else ''}//{tag}[{conditions}]"
+
+
+class LxmlBackend:
+    """Разбор страниц через lxml и заранее скомпилированные XPath.
+    Даёт те же результаты что и SoupBackend"""
+    name = "lxml"
+
+    _market_cards_list = etree.XPath(_class_xpath(SELECTOR_MARKET_CARDS_LIST)) if etree else None
+    _market_cards_wrapper = etree.XPath(_class_xpath(SELECTOR_MARKET_CARDS_WRAPPER, relative=True)) if etree else None
+    _market_show = etree.XPath(_class_xpath(SELECTOR_MARKET_SHOW)) if etree else None
+    _market_show_item = etree.XPath(_class_xpath(SELECTOR_MARKET_SHOW_ITEM)) if etree else None
+    _market_show_item_price = etree.XPath(_class_xpath(SELECTOR_MARKET_SHOW_ITEM_PRICE, relative=True)) if etree else None
+    _wish_list_cards = etree.XPath(_class_xpath(SELECTOR_WISH_LIST_CARDS)) if etree else None
+    _pagination_link = etree.XPath(XPATH_PAGINATION_LINK) if etree else None
+    _meta_csrf = etree.XPath(XPATH_META_CSRF) if etree else None
+    _scripts = etree.XPath("//script") if etree else None
+    _rank_element = etree.XPath(f".//*[@{ATTR_CARD_RANK}]") if etree else None
+    _visible_text = etree.XPath(
+        f".//text()[not({' or '.join(f'ancestor::{tag}' for tag in HIDDEN_TEXT_TAGS)})]"
+    ) if etree else None
+
+    def __init__(self):
+        if etree is None:
+            raise ImportError("lxml не установлен")
+        self._bytes_parser = etree.HTMLParser(encoding="utf-8")
+
+    def _tree(self, content):
+        if isinstance(content, bytes):
+            return etree.HTML(content, self._bytes_parser)
+        return etree.HTML(content)
+
+    def _last_page(self, tree):
+        return _last_page(link.get("href") for link in self._pagination_link(tree))
+
+    def _rank(self, element):
+        rank = element.get(ATTR_CARD_RANK)
+        if rank is not None: return rank
+        rank_elements = self._rank_element(element)
+        return rank_elements[0].get(ATTR_CARD_RANK) if rank_elements else None
+
+    def csrf_token(self, content):
+        tree = self._tree(content)
+        if tree is None: return None
+        csrf_meta = self._meta_csrf(tree)
+        return csrf_meta[0].get("content") if csrf_meta else None
+
+    def user_id_script(self, content):
+        tree = self._tree(content)
+        if tree is None: return None
+        for script in self._scripts(tree):
+            if script.text and SCRIPT_USER_ID_TEXT in script.text:
+                return script.text
+        return None
+
+    def market_page(self, content):
+        tree = self._tree(content)
+        if tree is None: return None
+
+        market_list_cards = self._market_cards_list(tree)
+        if not market_list_cards: return None
+
+        cards_wrappers = self._market_cards_wrapper(market_list_cards[0])
+        if not cards_wrappers: return None
+
+        return ListingPage(
+            items=[
+                MarketItem(
+                    data_id=_attr(wrapper.get("data-id")),
+                    rank=self._rank(wrapper),
+                    signal=_signal(wrapper.attrib, " ".join(self._visible_text(wrapper)))
+                ) for wrapper in cards_wrappers
+            ],
+            last_page=self._last_page(tree)
+        )
+
+    def wish_list_page(self, content):
+        tree = self._tree(content)
+        if tree is None: return None
+
+        cards_item = self._wish_list_cards(tree)
+        if not cards_item: return None
+
+        return ListingPage(
+            items=[
+                WishListItem(
+                    data_id=_attr(card.get("data-card-id")),
+                    name=_attr(card.get("data-name")),
+                    manga_name=_attr(card.get("data-manga-name")),
+                    rank=self._rank(card)
+                ) for card in cards_item
+            ],
+            last_page=self._last_page(tree)
+        )
+
+    def lot_page(self, content):
+        tree = self._tree(content)
+        if tree is None: return None
+
+        card_show = self._market_show(tree)
+        if not card_show: return None
+
+        items = list()
+        for lot in self._market_show_item(tree):
+            price = self._market_show_item_price(lot)
+            if not price: continue
+            price_text = "".join(self._visible_text(price[0])).strip()
+            if not price_text: continue
+            items.append(LotItem(lot_id=_attr(lot.get(ATTR_LOT_ID)), price=price_text))
+
+        return LotPage(name=card_show[0].get("data-name"), items=items)
+
+
+def default_backend():
+    """lxml если установлен, иначе BeautifulSoup"""
+    return LxmlBackend() if etree is not None else SoupBackend()
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import logging
+import sqlite3
+from datetime import timedelta
+from time import time
+from typing import NamedTuple
+
+from MangabuffParser import Lots
+
+
+logger = logging.getLogger(__name__)
+
+class LotSnapshot(NamedTuple):
+    name: str
+    lots: Lots
+    fingerprint: str
+    fetched_at: float
+
+
+class LotSnapshotStore:
+    """Снимки лотов карт в SQLite
+
+    Для каждой карты хранится признак из выдачи торговой площадки,
+    отпечаток содержимого страницы лотов и время загрузки.
+    Снимок отдаётся только пока не истёк ttl и признак из выдачи не изменился.
+    """
+    def __init__(self, *, path, ttl: timedelta = timedelta(hours=6)):
+        self._ttl = ttl
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS lot_snapshots (
+                data_id TEXT PRIMARY KEY,
+                signal TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                name TEXT NOT NULL,
+                lots TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+        """)
+        logger.info(f"Lot snapshot store opened: {path}")
+
+    @staticmethod
+    def _dump_lots(lots):
+        return json.dumps([[lot.price, lot.lot_id] for lot in lots], ensure_ascii=False)
+
+    @classmethod
+    def fingerprint(cls, name, lots):
+        """Отпечаток содержимого страницы лотов"""
+        return hashlib.sha1(f"{name}:{cls._dump_lots(lots)}".encode()).hexdigest()
+
+    def load(self, *, data_id, signal) -> LotSnapshot | None:
+        """Снимок лотов карты
+
+        :return:
+            LotSnapshot|None: Снимок, None если его нет, он устарел, признак пустой или изменился
+        """
+        if not signal: return None
+
+        row = self._connection.execute(
+            "SELECT signal, fingerprint, name, lots, fetched_at FROM lot_snapshots WHERE data_id = ?",
+            (data_id,)
+        ).fetchone()
+        if row is None: return None
+
+        cached_signal, fingerprint, name, lots, fetched_at = row
+        if cached_signal != signal: return None
+        if time() - fetched_at > self._ttl.total_seconds(): return None
+
+        try:
+            lots = Lots(json.loads(lots))
+        except (ValueError, TypeError):
+            logger.warning(f"Lot snapshot of {data_id} unreadable, fetching again")
+            return None
+        return LotSnapshot(name=name, lots=lots, fingerprint=fingerprint, fetched_at=fetched_at)
+
+    def save(self, *, data_id, signal, name, lots) -> bool:
+        """Сохранение снимка после загрузки страницы лотов
+
+        :return:
+            bool: Изменилось ли содержимое относительно прошлого снимка
+        """
+        fingerprint = self.fingerprint(name, lots)
+        previous = self._connection.execute(
+            "SELECT fingerprint FROM lot_snapshots WHERE data_id = ?",
+            (data_id,)
+        ).fetchone()
+
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO lot_snapshots (data_id, signal, fingerprint, name, lots, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (data_id, signal, fingerprint, name, self._dump_lots(lots), time())
+            )
+        return previous is None or previous[0] != fingerprint
+
+    def close(self):
+        """Закрытие базы"""
+        self._connection.close()
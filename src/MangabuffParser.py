@@ -1,37 +1,44 @@
+import asyncio
+import hashlib
+import inspect
 import logging
 import re
-from time import sleep
+from array import array
+from collections import defaultdict
+from contextlib import asynccontextmanager, suppress, nullcontext
+from time import monotonic
 from enum import Enum
+from typing import NamedTuple
 from urllib.parse import urlencode
 from dataclasses import dataclass, field
 
+import httpx
 import requests
-from bs4 import BeautifulSoup
 from email_validator import validate_email, EmailNotValidError
 from requests import HTTPError
 
-from resources.messages import MANGA_NAME_OUTPUT_STRING, CARD_OUTPUT_STRING
+from resources import messages
+from AsyncFetcher import AsyncFetcher, RETRIES, RETRY_BACKOFF
+from RateLimiter import AdaptiveRateLimiter
+from ScanMetrics import ScanMetrics
+from HtmlBackend import default_backend
 
 
 MARKET_MAX_PAGES = 100
 
+# Сколько готовых карт aiter_cards_lots держит до того, как сканирование ждёт потребителя
+STREAM_QUEUE_SIZE = 64
+
 AUTHORIZATION_ERROR_CODE = 422
 
 MANGABUFF_URL = "https://mangabuff.ru"
 
-SELECTOR_META_CSRF = "meta[name='csrf-token']"
-
-SELECTOR_MARKET_CARDS_LIST = "div.market-list__cards.market-list__cards--all.manga-cards"
-SELECTOR_MARKET_CARDS_WRAPPER = "div.manga-cards__item-wrapper"
-
-SELECTOR_MARKET_SHOW = "div.card-show"
-SELECTOR_MARKET_SHOW_ITEM = "div.market-show__item"
-SELECTOR_MARKET_SHOW_ITEM_PRICE = "div.market-show__item-price"
-
-SCRIPT_USER_ID_TEXT = "window.user_id"
 SCRIPT_USER_ID_RE = r"window\.user_id\s*=\s*(\d*);"
 
-SELECTOR_WISH_LIST_CARDS = "div.manga-cards__item"
+# Ответы на запрос с истёкшей сессией: 401 и 419 (Laravel), иначе редирект на вход
+SESSION_EXPIRED_CODES = (401, 419)
+
+LOGIN_PATH = "/login"
 
 class CardRank(Enum):
     X = "x"
@@ -53,19 +60,85 @@ class CardRank(Enum):
         return self.value
 
 
-@dataclass
+PRICE_DIGITS_RE = r"\D"
+
+
+class Lot(NamedTuple):
+    price: int
+    lot_id: str = ""
+
+    def __str__(self):
+        return str(self.price)
+
+    @classmethod
+    def parse(cls, price_text, lot_id=""):
+        digits = re.sub(PRICE_DIGITS_RE, "", price_text)
+        if not digits: return None
+        return cls(price=int(digits), lot_id=lot_id)
+
+
+class Lots:
+    __slots__ = ("_prices", "_ids")
+
+    def __init__(self, lots=()):
+        lots = sorted((Lot(*lot) for lot in lots), key=lambda lot: lot.price)
+        self._prices = array("q", (lot.price for lot in lots))
+        self._ids = tuple(lot.lot_id for lot in lots)
+
+    def __len__(self):
+        return len(self._prices)
+
+    def __iter__(self):
+        return map(Lot, self._prices, self._ids)
+
+    def __getitem__(self, index):
+        return Lot(self._prices[index], self._ids[index])
+
+    def __eq__(self, other):
+        if isinstance(other, Lots|list|tuple):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Lots({list(self)!r})"
+
+    @property
+    def prices(self):
+        return self._prices
+
+    @property
+    def count(self):
+        return len(self._prices)
+
+    @property
+    def min_price(self):
+        return self._prices[0] if self._prices else None
+
+    @property
+    def median_price(self):
+        return self._prices[(len(self._prices) - 1) // 2] if self._prices else None
+
+
+@dataclass(slots=True)
 class CardInfo:
     data_id: str
     rank: CardRank
     name: str = ""
     manga_name: str = ""
-    lots: list[str] = field(default_factory=list)
+    lots: Lots = field(default_factory=Lots)
+    market_signal: str = ""
+
+    def __post_init__(self):
+        if not isinstance(self.lots, Lots):
+            self.lots = Lots(self.lots)
 
     def __str__(self):
-        return CARD_OUTPUT_STRING.format(
+        return messages.CARD_OUTPUT_STRING.format(
             name=self.name,
             rank=self.rank.value.capitalize(),
-            lots="|".join(self.lots)
+            lots="|".join(str(lot) for lot in self.lots)
         )
 
     def __hash__(self):
@@ -74,6 +147,12 @@ class CardInfo:
     def __eq__(self, other):
         return self.data_id == other.data_id
 
+    def merge(self, other):
+        self.name = self.name or other.name
+        self.manga_name = self.manga_name or other.manga_name
+        self.lots = self.lots or other.lots
+        self.market_signal = self.market_signal or other.market_signal
+
     @staticmethod
     def out_list(cards_list):
         cards_list.sort(key=lambda x: x.manga_name)
@@ -82,20 +161,110 @@ class CardInfo:
         for card in cards_list:
             if card.manga_name != title:
                 title = card.manga_name
-                result += MANGA_NAME_OUTPUT_STRING.format(title=title) + "\n"
+                result += messages.MANGA_NAME_OUTPUT_STRING.format(title=title) + "\n"
             result += f"{card}\n"
         return result
 
 
+class CardIndex:
+    def __init__(self, cards=()):
+        self._cards = dict()
+        for card in cards:
+            self.add(card)
+
+    def __len__(self):
+        return len(self._cards)
+
+    def __iter__(self):
+        return iter(self._cards.values())
+
+    def __contains__(self, card):
+        data_id = card.data_id if isinstance(card, CardInfo) else card
+        return data_id in self._cards
+
+    def __eq__(self, other):
+        if isinstance(other, CardIndex|list|tuple):
+            return list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"CardIndex({list(self)!r})"
+
+    def add(self, card):
+        existing = self._cards.get(card.data_id)
+        if existing is not None:
+            existing.merge(card)
+            return
+        self._cards[card.data_id] = card
+
+    def get(self, data_id, default=None):
+        return self._cards.get(data_id, default)
+
+    def join(self, other):
+        result = CardIndex()
+        for card in self:
+            other_card = other.get(card.data_id)
+            if other_card is None: continue
+            card.merge(other_card)
+            result.add(card)
+        return result
+
+
+@dataclass
+class ScanProgress:
+    stage: str = ""
+    requests: int = 0
+    cards_total: int = 0
+    cards_done: int = 0
+    lots_skipped: int = 0
+    lots_resumed: int = 0
+    lots_changed: int = 0
+
+
 class NotAuthorized(Exception):
     pass
 
 
+class RankNotFound(Exception):
+    pass
+
+
+class TooManyPages(Exception):
+    pass
+
+
 logger = logging.getLogger(__name__)
 
 class MangabuffParser:
-    def __init__(self, *, mail, password, request_delay=2.0):
-        logger.info(f"MangabuffParser init called with mail: {mail}, request_delay: {request_delay}")
+    def __init__(
+            self,
+            *,
+            mail,
+            password,
+            request_delay=2.0,
+            max_concurrency=4,
+            min_request_delay=0.5,
+            max_request_delay=60.0,
+            wish_list_cache=None,
+            html_backend=None,
+            response_cache=None,
+            lot_snapshots=None,
+            price_history=None,
+            base_url=MANGABUFF_URL,
+            metrics=None,
+            profiler=None,
+            session_store=None,
+            retries=RETRIES,
+            retry_backoff=RETRY_BACKOFF,
+            checkpoint=None
+    ):
+        logger.info(
+            f"MangabuffParser init called with mail: {mail}, request_delay: {request_delay}, "
+            f"max_concurrency: {max_concurrency}, "
+            f"min_request_delay: {min_request_delay}, max_request_delay: {max_request_delay}"
+        )
 
         try:
             if not isinstance(mail, str) or not isinstance(password, str):
@@ -113,7 +282,67 @@ class MangabuffParser:
             if request_delay < 0:
                 raise ValueError("request_delay должен быть положительным числом")
 
+            for delay in (min_request_delay, max_request_delay):
+                if not isinstance(delay, float|int):
+                    raise TypeError("min_request_delay и max_request_delay должны быть числами")
+                if delay < 0:
+                    raise ValueError("min_request_delay и max_request_delay должны быть положительными числами")
+            if min_request_delay > max_request_delay:
+                raise ValueError("min_request_delay больше max_request_delay")
+
+            if not isinstance(max_concurrency, int) or isinstance(max_concurrency, bool):
+                raise TypeError("max_concurrency должен быть целым числом")
+            if max_concurrency < 1:
+                raise ValueError("max_concurrency должен быть больше нуля")
+
+            if not isinstance(retries, int) or isinstance(retries, bool):
+                raise TypeError("retries должен быть целым числом")
+            if retries < 0:
+                raise ValueError("retries не может быть отрицательным")
+            if not isinstance(retry_backoff, float|int):
+                raise TypeError("retry_backoff должен быть числом")
+            if retry_backoff < 0:
+                raise ValueError("retry_backoff должен быть положительным числом")
+
+            if not isinstance(base_url, str):
+                raise TypeError("base_url должен быть строкой")
+            if not base_url.strip():
+                raise ValueError("base_url пустая строка")
+
+            self._base_url = base_url.strip().rstrip("/")
+
             self._request_delay = request_delay
+            self._max_concurrency = max_concurrency
+            self._limiter = AdaptiveRateLimiter(
+                delay=min(request_delay, max_request_delay),
+                min_delay=min(min_request_delay, request_delay),
+                max_delay=max_request_delay
+            )
+            self._wish_list_cache = wish_list_cache
+            self._response_cache = response_cache
+            self._lot_snapshots = lot_snapshots
+            self._price_history = price_history
+            self._metrics = metrics if metrics is not None else ScanMetrics()
+            self._profiler = profiler
+            self._session_store = session_store
+            self._retries = retries
+            self._retry_backoff = retry_backoff
+            self._checkpoint = checkpoint
+            self._mail = mail
+            self._password = password
+            self._relogin_lock = None
+            self._session_generation = 0
+            self._html = html_backend if html_backend is not None else default_backend()
+            logger.info(f"HTML backend: {self._html.name}")
+            self._fetcher = None
+            self._progress = ScanProgress()
+            self._requests_base = 0
+            self._on_group = None
+            self._on_card = None
+            self._last_scan_requests = 0
+            self._last_scan_lots_skipped = 0
+            self._last_scan_lots_resumed = 0
+            self._last_scan_lots_changed = 0
             self._session = requests.Session()
 
             headers = {
@@ -122,12 +351,50 @@ class MangabuffParser:
             }
             self._session.headers.update(headers)
 
-            self._login(mail, password)
-            self._get_user_id()
+            if not self._restore_session():
+                self._login(mail, password)
+                self._get_user_id()
+                self._save_session()
         except Exception as e:
             logger.critical(e)
             raise e
 
+    @property
+    def current_rate(self):
+        return self._limiter.rate
+
+    @property
+    def metrics(self):
+        return self._metrics
+
+    @property
+    def profiler(self):
+        return self._profiler
+
+    @property
+    def user_id(self):
+        return self._user_id
+
+    @property
+    def checkpoint(self):
+        return self._checkpoint
+
+    @property
+    def last_scan_requests(self):
+        return self._last_scan_requests
+
+    @property
+    def last_scan_lots_skipped(self):
+        return self._last_scan_lots_skipped
+
+    @property
+    def last_scan_lots_resumed(self):
+        return self._last_scan_lots_resumed
+
+    @property
+    def last_scan_lots_changed(self):
+        return self._last_scan_lots_changed
+
     def __enter__(self):
         return self
 
@@ -139,17 +406,15 @@ class MangabuffParser:
         self._close()
 
     def _get_user_id(self):
-        logger.info(f"try get user id on {MANGABUFF_URL}")
+        logger.info(f"try get user id on {self._base_url}")
 
-        sleep(self._request_delay) # block safety
-        main_page = self._session.get(MANGABUFF_URL, timeout=10)
+        main_page = self._sync_request("user_id", self._session.get, self._base_url, timeout=10)
         main_page.raise_for_status()
 
-        soup = BeautifulSoup(main_page.content, "html.parser")
-        script = soup.find("script", text=re.compile(SCRIPT_USER_ID_TEXT))
+        script = self._parse_html("user_id", self._html.user_id_script, main_page.content)
 
         if script:
-            user_id = re.search(SCRIPT_USER_ID_RE, script.text)
+            user_id = re.search(SCRIPT_USER_ID_RE, script)
             if not user_id: raise HTTPError("ID не найден")
             self._user_id = user_id.group(1)
             logger.info(f"found user id: {self._user_id}")
@@ -157,17 +422,14 @@ class MangabuffParser:
 
     def _login(self, mail, password):
         logger.info(f"{mail} - try login")
-        url = f"{MANGABUFF_URL}/login/"
+        url = f"{self._base_url}/login/"
 
-        login_page = self._session.get(url, timeout=10)
+        login_page = self._sync_request("login", self._session.get, url, timeout=10)
         login_page.raise_for_status()
 
-        soup = BeautifulSoup(login_page.content, features="html.parser")
-
-        csrf_meta = soup.select_one(SELECTOR_META_CSRF)
-        if not csrf_meta:
+        csrf_token = self._parse_html("login", self._html.csrf_token, login_page.content)
+        if csrf_token is None:
             raise HTTPError("CSRF Token не найден")
-        csrf_token = csrf_meta.get("content")
 
         headers = {
             "X-Csrf-Token": csrf_token
@@ -178,13 +440,100 @@ class MangabuffParser:
             "password": password,
         }
 
-        response = self._session.post(MANGABUFF_URL + "/login/", headers=headers, data=login_data)
+        response = self._sync_request("login", self._session.post, self._base_url + "/login/", headers=headers, data=login_data)
         if response.status_code == AUTHORIZATION_ERROR_CODE:
             raise NotAuthorized("Логин или пароль неверны")
         response.raise_for_status()
         logger.info(f"{mail} - login success")
         logger.info("Session opened")
 
+    def _restore_session(self):
+        if self._session_store is None: return False
+        stored = self._session_store.load(base_url=self._base_url, mail=self._mail)
+        if stored is None: return False
+
+        for cookie in stored.cookies:
+            self._session.cookies.set(**cookie)
+        self._user_id = stored.user_id
+
+        # Проверка одним запросом без задержки и разбора разметки: главная открыта под этим user_id
+        response = self._sync_request("login", self._session.get, self._base_url, timeout=10)
+        user_id = re.search(SCRIPT_USER_ID_RE, response.text) if response.ok else None
+        if user_id is not None and user_id.group(1) == stored.user_id:
+            logger.info(f"{self._mail} - stored session restored, user id: {self._user_id}")
+            return True
+
+        logger.info(f"{self._mail} - stored session expired")
+        self._session.cookies.clear()
+        self._session_store.delete(base_url=self._base_url, mail=self._mail)
+        return False
+
+    def _save_session(self):
+        if self._session_store is None: return
+        self._session_store.save(
+            base_url=self._base_url,
+            mail=self._mail,
+            user_id=self._user_id,
+            cookies=[
+                {
+                    "name": cookie.name,
+                    "value": cookie.value,
+                    "domain": cookie.domain,
+                    "path": cookie.path,
+                    "expires": cookie.expires,
+                    "secure": cookie.secure
+                } for cookie in self._session.cookies
+            ]
+        )
+
+    def _fetcher_cookies(self):
+        cookies = httpx.Cookies()
+        for cookie in self._session.cookies:
+            cookies.set(cookie.name, cookie.value, domain=cookie.domain, path=cookie.path)
+        return cookies
+
+    async def _relogin(self, generation):
+        async with self._relogin_lock:
+            # Пока ждали, сессию уже восстановил другой запрос
+            if generation != self._session_generation: return
+            logger.warning(f"{self._mail} - session lost during scan, logging in again")
+            self._session.cookies.clear()
+            await asyncio.to_thread(self._login, self._mail, self._password)
+            self._session_generation += 1
+            # Соединение SessionStore привязано к потоку, в котором открыто, поэтому не в to_thread
+            self._save_session()
+            if self._fetcher is not None:
+                self._fetcher.cookies = self._fetcher_cookies()
+
+    @staticmethod
+    def _session_lost(response):
+        return response.status_code in SESSION_EXPIRED_CODES or response.url.path.rstrip("/") == LOGIN_PATH
+
+    def _sync_request(self, stage, method, url, **kwargs):
+        # Вход и проверка сессии идут по тем же слотам ограничителя, что и сканирование
+        wait = self._limiter.wait()
+        started = monotonic()
+        try:
+            response = method(url, **kwargs)
+        except requests.RequestException:
+            self._metrics.observe_request(stage=stage, status="error", size=0, seconds=monotonic() - started, wait=wait)
+            raise
+        self._metrics.observe_request(
+            stage=stage,
+            status=response.status_code,
+            size=len(response.content),
+            seconds=monotonic() - started,
+            wait=wait
+        )
+        return response
+
+    def _parse_html(self, stage, parse, content):
+        started = monotonic()
+        try:
+            return parse(content)
+        finally:
+            self._metrics.observe_parse(stage=stage, seconds=monotonic() - started)
+
     def _close(self):
         logger.info(f"MangabuffParser session closed")
         try:
@@ -193,100 +542,370 @@ class MangabuffParser:
         except Exception as close_error:
             logger.error(close_error)
 
-    def _parse_market(self, *, url, rank):
-        logger.info("Parsing market page")
-        result = set()
-
-        for current_rank in rank:
-            for page in range(1, MARKET_MAX_PAGES + 1):
-                url_req = url + f"&rank={current_rank}&page={page}"
-                logger.debug(f"Parsing {url_req}")
-
-                sleep(self._request_delay)  # block safety
-                response = self._session.get(url_req, timeout=10)
-                response.raise_for_status()
-
-                soup = BeautifulSoup(response.content, features="html.parser")
-
-                market_list_cards = soup.select_one(SELECTOR_MARKET_CARDS_LIST)
-                if not market_list_cards: break
+    def _open_fetcher(self):
+        return AsyncFetcher(
+            headers=dict(self._session.headers),
+            cookies=self._fetcher_cookies(),
+            limiter=self._limiter,
+            max_concurrency=self._max_concurrency,
+            response_cache=self._response_cache,
+            cache_namespace=self._user_id,
+            metrics=self._metrics,
+            retries=self._retries,
+            retry_backoff=self._retry_backoff
+        )
 
-                cards_wrappers = market_list_cards.select(SELECTOR_MARKET_CARDS_WRAPPER)
-                if not cards_wrappers: break
+    @asynccontextmanager
+    async def _scan_session(self, progress=None, on_group=None, on_card=None):
+        async with self._open_fetcher() as fetcher:
+            self._fetcher = fetcher
+            self._progress = progress if progress is not None else ScanProgress()
+            self._on_group = on_group
+            self._on_card = on_card
+            self._requests_base = self._progress.requests
+            # Замок на каждый event loop: get_cards_lots запускает новый
+            self._relogin_lock = asyncio.Lock()
+            # Сессия внутри общего сканирования нескольких аккаунтов не начинает своё
+            owns_scan = not self._metrics.running
+            if owns_scan: self._metrics.begin_scan()
+            try:
+                yield fetcher
+            finally:
+                if owns_scan: self._metrics.end_scan()
+                logger.info(
+                    f"Scan finished, requests: {fetcher.requests_count}, "
+                    f"cache hits: {fetcher.cache_hits}, not modified: {fetcher.not_modified_count}"
+                )
+                self._last_scan_requests = fetcher.requests_count
+                self._last_scan_lots_skipped = self._progress.lots_skipped
+                self._last_scan_lots_resumed = self._progress.lots_resumed
+                self._last_scan_lots_changed = self._progress.lots_changed
+                # Сайт обновляет cookies в ответах, сохраняются самые свежие
+                self._session.cookies.update(fetcher.cookies.jar)
+                self._save_session()
+                self._fetcher = None
+                self._on_group = None
+                self._on_card = None
+
+    async def _fetch(self, url):
+        try:
+            return await self._fetcher.get(url, stage=self._progress.stage)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code not in SESSION_EXPIRED_CODES: raise
+            return e.response
+
+    async def _get(self, url):
+        generation = self._session_generation
+        response = await self._fetch(url)
+        if self._session_lost(response):
+            await self._relogin(generation)
+            response = await self._fetch(url)
+            if self._session_lost(response):
+                raise NotAuthorized("Сессия потеряна, повторный вход не помог")
+        self._progress.requests = self._requests_base + self._fetcher.requests_count
+        return response
+
+    async def _get_content(self, url):
+        logger.debug(f"Parsing {url}")
+        response = await self._get(url)
+        return response.content
 
-                for wrapper in cards_wrappers:
-                    data_id = wrapper.get("data-id")
-                    if not data_id: continue
-                    result.add(CardInfo(
-                        data_id=str(data_id).strip(),
-                        rank=current_rank
-                    ))
+    @staticmethod
+    def _read_rank(value):
+        if value is None:
+            raise RankNotFound("Ранг карты не найден в разметке")
+        try:
+            return CardRank(value.strip().lower())
+        except ValueError:
+            raise RankNotFound(f"Неизвестный ранг {value}")
 
-        return list(result)
+    @staticmethod
+    def _read_lots(items):
+        lots = list()
+        for item in items:
+            lot = Lot.parse(item.price, item.lot_id)
+            if lot is None:
+                logger.warning(f"Lot price not recognized: {item.price}")
+                continue
+            lots.append(lot)
+        return Lots(lots)
 
-    def _parse_wish_list(self):
-        logger.info(f"Parsing users {self._user_id} wish list")
-        url = f"{MANGABUFF_URL}/cards/{self._user_id}/offers?type_w=0"
-        result = set()
+    @staticmethod
+    def _wish_list_fingerprint(page):
+        cards_ids = [item.data_id for item in page.items] if page is not None else []
+        last_page = page.last_page if page is not None else 0
+        return hashlib.sha1(f"{last_page}:{','.join(cards_ids)}".encode()).hexdigest()
 
-        for rank in list(CardRank):
-            for page in range(1, MARKET_MAX_PAGES):
-                url_req = f"{url}&type={rank}&page={page}"
+    @staticmethod
+    async def _gather(coroutines):
+        """asyncio.gather, который при первой ошибке отменяет остальные запросы и дожидается их,
+        а не оставляет их тратить слоты ограничителя на отброшенный результат"""
+        tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _get_page(self, url, parse_page, content=None):
+        if content is None and self._checkpoint is not None:
+            page = self._checkpoint.load_page(namespace=self._user_id, url=url)
+            if page is not None:
+                logger.debug(f"{url} resumed from checkpoint")
+                return page
+
+        if content is None:
+            content = await self._get_content(url)
+        page = parse_page(content)
+        if page is not None and self._checkpoint is not None:
+            self._checkpoint.save_page(namespace=self._user_id, url=url, page=page)
+        return page
+
+    async def _crawl_pages(self, *, url, parse_page, max_pages, first_content=None, strict=False):
+        page = await self._get_page(f"{url}&page=1", parse_page, first_content)
+        if page is None: return []
+
+        result = list(page.items)
+        if not page.last_page:
+            # Пагинации нет: страницы по одной до первой пустой
+            page_number = 1
+            while page_number < max_pages:
+                page_number += 1
+                page = await self._get_page(f"{url}&page={page_number}", parse_page)
+                if page is None: return result
+                result.extend(page.items)
+            self._pages_limit_reached(url, page_number, max_pages, strict)
+            return result
 
-                logger.debug(f"Parsing {url_req}")
-                sleep(self._request_delay)
-                response = self._session.get(url_req, timeout=10)
-                response.raise_for_status()
+        if page.last_page > max_pages:
+            self._pages_limit_reached(url, page.last_page, max_pages, strict)
+        last_page = min(page.last_page, max_pages)
 
-                soup = BeautifulSoup(response.content, features="html.parser")
+        # Пагинация известна: остальные страницы параллельно, до последней и не дальше
+        for page in await self._gather((
+            self._get_page(f"{url}&page={page_number}", parse_page) for page_number in range(2, last_page + 1)
+        )):
+            if page is None: break
+            result.extend(page.items)
 
-                cards_item = soup.select(SELECTOR_WISH_LIST_CARDS)
+        return result
 
-                if not cards_item: break
-                for card in cards_item:
-                    _data_id = card.get("data-card-id").strip()
-                    _name = card.get("data-name").strip()
-                    _manga_name = card.get("data-manga-name").strip()
-                    if not _data_id or not _name or not _manga_name:continue
+    @staticmethod
+    def _pages_limit_reached(url, pages, max_pages, strict):
+        if strict:
+            raise TooManyPages(f"{pages} страниц, лимит {max_pages}")
+        logger.warning(f"{url} reached the limit of {max_pages} pages, the rest is not crawled")
 
-                    result.add(CardInfo(
-                        data_id=_data_id,
-                        rank=CardRank(rank),
-                        name=_name,
-                        manga_name=_manga_name
-                    ))
+    async def _crawl_unranked(self, *, url, parse_page, max_pages, first_content=None):
+        try:
+            return await self._crawl_pages(
+                url=url,
+                parse_page=parse_page,
+                max_pages=max_pages,
+                first_content=first_content,
+                strict=True
+            )
+        except (RankNotFound, TooManyPages) as e:
+            logger.info(f"Falling back to crawl by rank: {e}")
+            return None
+
+    async def _parse_market(self, *, url, rank):
+        logger.info("Parsing market page")
+        self._progress.stage = "market"
+        requests_before = self._progress.requests
+
+        def parse_page(content, current_rank=None):
+            page = self._parse_html("market", self._html.market_page, content)
+            if page is None: return None
+
+            cards = list()
+            for item in page.items:
+                if not item.data_id: continue
+                cards.append(CardInfo(
+                    data_id=item.data_id,
+                    rank=current_rank or self._read_rank(item.rank),
+                    market_signal=item.signal
+                ))
+            return page._replace(items=cards)
+
+        result = CardIndex()
+        cards = None
+        if set(rank) == set(CardRank):
+            cards = await self._crawl_unranked(url=url, parse_page=parse_page, max_pages=MARKET_MAX_PAGES)
+
+        if cards is not None:
+            cards = [cards]
+        else:
+            cards = await self._gather((
+                self._crawl_pages(
+                    url=url + f"&rank={current_rank}",
+                    parse_page=lambda content, current_rank=current_rank: parse_page(content, current_rank),
+                    max_pages=MARKET_MAX_PAGES
+                ) for current_rank in rank
+            ))
+        for rank_cards in cards:
+            for card in rank_cards:
+                result.add(card)
+
+        logger.info(f"Market parsed: {len(result)} cards, {self._progress.requests - requests_before} requests")
+        return result
 
-        return list(result)
+    async def _parse_wish_list(self, *, user_id=None, rank=None):
+        user_id = user_id or self._user_id
+        rank = list(rank) if rank else list(CardRank)
+        logger.info(f"Parsing users {user_id} wish list")
+        self._progress.stage = "wish_list"
+        requests_before = self._progress.requests
+        url = f"{self._base_url}/cards/{user_id}/offers?type_w=0"
+
+        def parse_page(content, rank=None):
+            page = self._parse_html("wish_list", self._html.wish_list_page, content)
+            if page is None: return None
+
+            cards = list()
+            for item in page.items:
+                if not item.data_id or not item.name or not item.manga_name: continue
+
+                cards.append(CardInfo(
+                    data_id=item.data_id,
+                    rank=rank or self._read_rank(item.rank),
+                    name=item.name,
+                    manga_name=item.manga_name
+                ))
+            return page._replace(items=cards)
+
+        # Кэш хранит список целиком, часть рангов обходится без него
+        use_cache = self._wish_list_cache is not None and set(rank) == set(CardRank)
+        first_content = None
+        fingerprint = None
+        if use_cache:
+            first_content = await self._get_content(f"{url}&page=1")
+            fingerprint = self._wish_list_fingerprint(self._parse_html("wish_list", self._html.wish_list_page, first_content))
+            cached = self._wish_list_cache.load(user_id=user_id, fingerprint=fingerprint)
+            if cached is not None: return CardIndex(cached)
+
+        result = CardIndex()
+        cards = None
+        if set(rank) == set(CardRank):
+            cards = await self._crawl_unranked(
+                url=url,
+                parse_page=parse_page,
+                max_pages=MARKET_MAX_PAGES - 1,
+                first_content=first_content
+            )
+
+        if cards is not None:
+            cards = [cards]
+        else:
+            cards = await self._gather((
+                self._crawl_pages(
+                    url=f"{url}&type={current_rank}",
+                    parse_page=lambda content, current_rank=current_rank: parse_page(content, current_rank),
+                    max_pages=MARKET_MAX_PAGES - 1
+                ) for current_rank in rank
+            ))
+        for rank_cards in cards:
+            for card in rank_cards:
+                result.add(card)
+
+        logger.info(f"Wish list parsed: {len(result)} cards, {self._progress.requests - requests_before} requests")
+        if use_cache:
+            self._wish_list_cache.save(user_id=user_id, fingerprint=fingerprint, cards=result)
+        return result
 
-    def _parse_cards_lots(self, *, cards_list):
+    async def _parse_card_lots(self, card):
+        if self._checkpoint is not None:
+            saved = self._checkpoint.load_card(namespace=self._user_id, data_id=card.data_id, signal=card.market_signal)
+            if saved is not None:
+                logger.debug(f"Lots of {card.data_id} resumed from checkpoint")
+                card.name = saved.name
+                card.lots = saved.lots
+                self._progress.lots_resumed += 1
+                self._progress.cards_done += 1
+                return
+
+        if self._lot_snapshots is not None:
+            snapshot = self._lot_snapshots.load(data_id=card.data_id, signal=card.market_signal)
+            if snapshot is not None:
+                logger.debug(f"Lots of {card.data_id} unchanged on market, snapshot used")
+                card.name = snapshot.name
+                card.lots = snapshot.lots
+                self._progress.lots_skipped += 1
+                self._progress.cards_done += 1
+                return
+
+        url = f"{self._base_url}/market/card/{card.data_id}"
+        logger.debug(f"url: {url}")
+
+        response = await self._get(url)
+        self._progress.cards_done += 1
+
+        page = self._parse_html("lots", self._html.lot_page, response.content)
+        if page is None: return
+        card.name = page.name
+        card.lots = self._read_lots(page.items)
+
+        if self._checkpoint is not None:
+            self._checkpoint.save_card(
+                namespace=self._user_id,
+                data_id=card.data_id,
+                signal=card.market_signal,
+                name=page.name or "",
+                lots=card.lots
+            )
+
+        if self._lot_snapshots is not None:
+            changed = self._lot_snapshots.save(
+                data_id=card.data_id,
+                signal=card.market_signal,
+                name=page.name or "",
+                lots=card.lots
+            )
+            if changed: self._progress.lots_changed += 1
+
+    async def _parse_cards_lots(self, *, cards_list):
         logger.info("Parsing cards lots")
-        for card in cards_list:
-            url = f"{MANGABUFF_URL}/market/card/{card.data_id}"
-            logger.debug(f"url: {url}")
-
-            sleep(self._request_delay) # block safety
-            response = self._session.get(url, timeout=10)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.content, features="html.parser")
-
-            card_show = soup.select_one(SELECTOR_MARKET_SHOW)
-            if not card_show: continue
-            card.name = card_show.get("data-name")
-
-            lots_divs = soup.select(SELECTOR_MARKET_SHOW_ITEM)
-            if not lots_divs: continue
-
-            for lot in lots_divs:
-                price = lot.select_one(SELECTOR_MARKET_SHOW_ITEM_PRICE)
-                if not price: continue
-                price_text = price.text.strip()
-                if not price_text: continue
-                card.lots.append(price_text)
+        self._progress.stage = "lots"
+        self._progress.cards_total = len(cards_list)
 
+        groups = defaultdict(list)
+        for card in cards_list:
+            groups[card.manga_name].append(card)
+        remaining = {manga_name: len(cards) for manga_name, cards in groups.items()}
+
+        async def parse_card_lots(card):
+            await self._parse_card_lots(card)
+            if self._on_card is not None:
+                result = self._on_card(card)
+                if inspect.isawaitable(result): await result
+            remaining[card.manga_name] -= 1
+            if remaining[card.manga_name] == 0 and self._on_group is not None:
+                self._on_group(groups[card.manga_name])
+
+        # Запросы стартуют по порядку тайтлов, так группы готовы одна за другой
+        await self._gather((
+            parse_card_lots(card) for manga_name in sorted(groups) for card in groups[manga_name]
+        ))
+        logger.info(
+            f"Lots parsed: {len(cards_list)} cards, fetches avoided: {self._progress.lots_skipped}, "
+            f"resumed from checkpoint: {self._progress.lots_resumed}, pages changed: {self._progress.lots_changed}"
+        )
+        if self._price_history is not None:
+            self._price_history.append(cards_list)
         return cards_list
 
-    def get_cards_lots(self, *, query=None, want=False, rank=None):
+    async def aget_cards_lots(
+            self,
+            *,
+            query=None,
+            want=False,
+            rank=None,
+            progress=None,
+            on_group=None,
+            on_card=None
+    ):
         logger.info(f"get_cards_lots called with query: {query}, want: {want}, rank: {rank}")
 
         try:
@@ -313,27 +932,99 @@ class MangabuffParser:
             }
 
             # url = https://mangabuff.ru/market?q=...&want=1
-            url = f"{MANGABUFF_URL}/market?{urlencode({k: v for k, v in params.items() if v})}"
+            url = f"{self._base_url}/market?{urlencode({k: v for k, v in params.items() if v})}"
             logger.debug(f"Try parse url: {url}")
 
-            result = self._parse_market(url=url, rank=rank)
+            profiling = self._profiler.profile() if self._profiler is not None else nullcontext()
+            with profiling:
+                async with self._scan_session(progress, on_group, on_card):
+                    result = CardIndex(await self._parse_market(url=url, rank=rank))
 
-            if not result: return []
+                    if not result:
+                        self.clear_checkpoint()
+                        return []
 
-            if want:
-                want_cards = self._parse_wish_list()
-                result = list(filter(lambda _card: _card in result, want_cards))
-            elif query:
-                for card in result:
-                    card.manga_name = query
+                    if want:
+                        want_cards = CardIndex(await self._parse_wish_list())
+                        result = want_cards.join(result)
+                    elif query:
+                        for card in result:
+                            card.manga_name = query
 
-            result = self._parse_cards_lots(cards_list=result)
+                    result = await self._parse_cards_lots(cards_list=result)
 
-            return result
+            self.clear_checkpoint()
+            return list(result)
         except Exception as e:
             logger.error(e)
             raise e
 
+    def clear_checkpoint(self):
+        if self._checkpoint is not None:
+            self._checkpoint.clear(namespace=self._user_id)
+
+    async def aget_market(self, *, progress=None, rank=None, query=None, want=False):
+        logger.info(f"get_market called with rank: {rank}, query: {query}, want: {want}")
+        params = {
+            "q": query,
+            "want": int(want)
+        }
+        url = f"{self._base_url}/market?{urlencode({k: v for k, v in params.items() if v})}"
+        async with self._scan_session(progress):
+            return await self._parse_market(url=url, rank=list(rank) if rank else list(CardRank))
+
+    async def aget_wish_list(self, *, progress=None, user_id=None, rank=None):
+        logger.info(f"get_wish_list called with user_id: {user_id}, rank: {rank}")
+        async with self._scan_session(progress):
+            return await self._parse_wish_list(user_id=user_id, rank=rank)
+
+    async def aget_lots(self, cards, *, progress=None, on_group=None, on_card=None):
+        logger.info(f"get_lots called with {len(cards)} cards")
+        async with self._scan_session(progress, on_group, on_card):
+            return await self._parse_cards_lots(cards_list=list(cards))
+
+    def get_cards_lots(self, *, query=None, want=False, rank=None):
+        return asyncio.run(self.aget_cards_lots(query=query, want=want, rank=rank))
+
+    async def aiter_cards_lots(self, *, query=None, want=False, rank=None, progress=None):
+        cards = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+
+        async def scan():
+            try:
+                await self.aget_cards_lots(query=query, want=want, rank=rank, progress=progress, on_card=cards.put)
+            finally:
+                # После отмены потребителя уже нет, и ждать места в очереди нельзя
+                if not asyncio.current_task().cancelling():
+                    await cards.put(None)
+
+        task = asyncio.create_task(scan())
+
+        try:
+            while (card := await cards.get()) is not None:
+                yield card
+            await task
+        finally:
+            if not task.done():
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+
+    def iter_cards_lots(self, *, query=None, want=False, rank=None):
+        with asyncio.Runner() as runner:
+            cards = self.aiter_cards_lots(query=query, want=want, rank=rank)
+            try:
+                while True:
+                    try:
+                        card = runner.run(anext(cards))
+                    except StopAsyncIteration:
+                        return
+                    yield card
+            finally:
+                runner.run(cards.aclose())
+
+    async def aget_want_market_formatted(self, *, progress=None):
+        return CardInfo.out_list(list(await self.aget_cards_lots(want=True, progress=progress)))
+
     def get_want_market_formatted(self):
         return CardInfo.out_list(list(self.get_cards_lots(want=True)))
 
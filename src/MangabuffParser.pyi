@@ -1,29 +1,40 @@
+import asyncio
+from array import array
 from enum import Enum
 from dataclasses import dataclass
-from typing import Type, Optional, Iterable
+from typing import Type, Optional, Iterable, Awaitable, Iterator, AsyncIterator, Callable, Generator, AsyncGenerator, NamedTuple
 
+import httpx
 from requests import Session
 
+from AsyncFetcher import AsyncFetcher, RETRIES, RETRY_BACKOFF
+from RateLimiter import AdaptiveRateLimiter
+from HtmlBackend import SoupBackend, LxmlBackend, ListingPage, LotItem
+from WishListCache import WishListCache
+from ResponseCache import ResponseCache
+from LotSnapshotStore import LotSnapshotStore
+from PriceHistoryStore import PriceHistoryStore
+from ScanMetrics import ScanMetrics
+from ScanProfiler import ScanProfiler
+from SessionStore import SessionStore
+from ScanCheckpoint import ScanCheckpoint
+
 
 MARKET_MAX_PAGES: int
 
+STREAM_QUEUE_SIZE: int
+
 AUTHORIZATION_ERROR_CODE: int
 
 MANGABUFF_URL: str
 
-SELECTOR_META_CSRF: str
-
-SELECTOR_MARKET_CARDS_LIST: str
-SELECTOR_MARKET_CARDS_WRAPPER: str
+SCRIPT_USER_ID_RE: str = ...
 
-SELECTOR_MARKET_SHOW: str
-SELECTOR_MARKET_SHOW_ITEM: str
-SELECTOR_MARKET_SHOW_ITEM_PRICE: str
+SESSION_EXPIRED_CODES: tuple[int, ...]
 
-SCRIPT_USER_ID_TEXT: str = ...
-SCRIPT_USER_ID_RE: str = ...
+LOGIN_PATH: str
 
-SELECTOR_WISH_LIST_CARDS: str = ...
+PRICE_DIGITS_RE: str = ...
 
 class CardRank(Enum):
     """Перечисления рангов карточек"""
@@ -46,7 +57,77 @@ class CardRank(Enum):
     def __str__(self) -> str: ...
 
 
-@dataclass
+class Lot(NamedTuple):
+    """Лот на торговой площадке
+
+    Attributes:
+        price (int) : Цена
+        lot_id (str): ID лота, пустая строка если его нет в разметке
+    """
+
+    price: int
+    lot_id: str = ...
+
+    def __str__(self) -> str:
+        """Цена лота"""
+        ...
+
+    @classmethod
+    def parse(cls, price_text: str, lot_id: str=...) -> Optional["Lot"]:
+        """Лот из текста цены, из текста берутся только цифры
+
+        Returns:
+            Optional[Lot]: Лот, None если в тексте нет цифр
+        """
+        ...
+
+
+class Lots:
+    """Лоты карты, упорядоченные по цене. Цены хранятся в array, а не объектами
+
+    Examples:
+        >>> lots = Lots([Lot(30), Lot(10, "7")])
+        >>> lots.min_price, lots.median_price, lots.count
+        (10, 10, 2)
+    """
+
+    _prices: array
+    _ids: tuple[str, ...]
+
+    def __init__(self, lots: Iterable[Lot|tuple[int, str]]=...) -> None: ...
+
+    def __len__(self) -> int: ...
+
+    def __iter__(self) -> Iterator[Lot]: ...
+
+    def __getitem__(self, index: int) -> Lot: ...
+
+    def __eq__(self, other: "Lots|list[Lot]|tuple[Lot, ...]") -> bool:
+        """Сравнение с другими лотами или списком лотов с учётом порядка"""
+        ...
+
+    @property
+    def prices(self) -> array:
+        """Цены по возрастанию"""
+        ...
+
+    @property
+    def count(self) -> int:
+        """Число лотов"""
+        ...
+
+    @property
+    def min_price(self) -> Optional[int]:
+        """Минимальная цена, None если лотов нет"""
+        ...
+
+    @property
+    def median_price(self) -> Optional[int]:
+        """Нижняя медиана цен, всегда одна из цен лотов. None если лотов нет"""
+        ...
+
+
+@dataclass(slots=True)
 class CardInfo:
     """Информация о карточке и активных лотах
 
@@ -55,21 +136,24 @@ class CardInfo:
         rank (CardRank) : Ранг карты
         name (str)      : Название карточки
         manga_name (str): Название тайтла
-        lots (list[str]): Список цен на лоты
+        lots (Lots)     : Лоты по возрастанию цены, список лотов приводится к Lots
+        market_signal (str): Признак изменения карты из выдачи торговой площадки
     """
 
     data_id: str
     rank: CardRank
     name: str = ...
     manga_name: str = ...
-    lots: list[str] = ...
+    lots: Lots = ...
+    market_signal: str = ...
 
     def __init__(self,
                  data_id: str,
                  rank: CardRank,
                  name: str=...,
                  manga_name: str=...,
-                 lots: list[str]=...
+                 lots: Lots|Iterable[Lot]=...,
+                 market_signal: str=...
                  ) -> None: ...
 
     def __str__(self) -> str: ...
@@ -78,6 +162,10 @@ class CardInfo:
 
     def __eq__(self, other: "CardInfo") -> bool: ...
 
+    def merge(self, other: "CardInfo") -> None:
+        """Заполняет пустые имя, название тайтла, лоты и признак из выдачи данными другой карты с тем же data_id"""
+        ...
+
     @staticmethod
     def out_list(cards_list: list[CardInfo]) -> str:
         """Вывод списка карт в стрку, в md формате
@@ -87,43 +175,244 @@ class CardInfo:
         ...
 
 
+class CardIndex:
+    """Индекс карт по data_id
+
+    Сохраняет порядок добавления. Повторное добавление карты с тем же data_id
+    не создаёт дубль, а дополняет уже сохранённую карту через CardInfo.merge.
+
+    Example:
+        >>> market = CardIndex([CardInfo(data_id="1", rank=CardRank.S)])
+        >>> wish = CardIndex([CardInfo(data_id="1", rank=CardRank.S, name="Имя", manga_name="Тайтл")])
+        >>> wish.join(market).get("1").manga_name
+    """
+
+    def __init__(self, cards: Iterable[CardInfo]=...) -> None: ...
+
+    def __len__(self) -> int: ...
+
+    def __iter__(self) -> Iterator[CardInfo]: ...
+
+    def __contains__(self, card: CardInfo|str) -> bool:
+        """Проверка по карте или по data_id за O(1)"""
+        ...
+
+    def __eq__(self, other: object) -> bool:
+        """Сравнение с другим индексом или списком карт с учётом порядка"""
+        ...
+
+    def add(self, card: CardInfo) -> None:
+        """Добавление карты, дубль по data_id дополняет сохранённую карту"""
+        ...
+
+    def get(self, data_id: str, default: Optional[CardInfo]=None) -> Optional[CardInfo]:
+        """Карта по data_id"""
+        ...
+
+    def join(self, other: "CardIndex") -> "CardIndex":
+        """Карты этого индекса, которые есть в other, за O(n).
+        Пустые поля карт дополняются данными карт из other
+
+        Returns:
+            CardIndex: Новый индекс в порядке этого индекса
+        """
+        ...
+
+
+@dataclass
+class ScanProgress:
+    """Прогресс текущего сканирования
+
+    Attributes:
+        stage (str)      : Текущий этап: market, wish_list, lots
+        requests (int)   : Выполнено сетевых запросов, ответы из кэша не учитываются
+        cards_total (int): Карт для парсинга лотов
+        cards_done (int) : Карт с загруженными лотами
+        lots_skipped (int): Карт, лоты которых взяты из снимка без запроса, признак в выдаче не изменился
+        lots_resumed (int): Карт, лоты которых взяты с контрольной точки прерванного сканирования
+        lots_changed (int): Загруженных страниц лотов, содержимое которых отличается от снимка
+    """
+
+    stage: str = ...
+    requests: int = ...
+    cards_total: int = ...
+    cards_done: int = ...
+    lots_skipped: int = ...
+    lots_resumed: int = ...
+    lots_changed: int = ...
+
+    def __init__(
+            self,
+            stage: str=...,
+            requests: int=...,
+            cards_total: int=...,
+            cards_done: int=...,
+            lots_skipped: int=...,
+            lots_resumed: int=...,
+            lots_changed: int=...
+    ) -> None: ...
+
+
 class NotAuthorized(Exception):
     """Вызывается когда не авторизован"""
     pass
 
 
+class RankNotFound(Exception):
+    """Вызывается когда ранг карты не удалось прочитать из разметки"""
+    pass
+
+
+class TooManyPages(Exception):
+    """Вызывается когда в списке без фильтра по рангу страниц больше лимита"""
+    pass
+
+
 class MangabuffParser:
     """Парсер торговой площадки mangabuff.ru
 
+    Авторизация выполняется синхронно через requests, страницы торговой площадки
+    загружаются асинхронно через httpx с ограниченной параллельностью.
+
     Example:
         >>> with MangabuffParser(mail='user@example.com', password='pass') as parser:
         ...     cards = parser.get_cards_lots(query='тайтл', want=True, rank=CardRank.S)
 
         >>> parser = MangabuffParser(mail='user@example.com', password='pass')
         >>> cards = parser.get_cards_lots(want=True)
+
+        >>> cards = await parser.aget_cards_lots(want=True)
     """
 
     _request_delay: float|int
+    _max_concurrency: int
+    _limiter: AdaptiveRateLimiter
+    _base_url: str
+    _wish_list_cache: Optional[WishListCache]
+    _response_cache: Optional[ResponseCache]
+    _lot_snapshots: Optional[LotSnapshotStore]
+    _price_history: Optional[PriceHistoryStore]
+    _metrics: ScanMetrics
+    _profiler: Optional[ScanProfiler]
+    _html: SoupBackend|LxmlBackend
     _session: Session
+    _fetcher: Optional[AsyncFetcher]
+    _progress: ScanProgress
+    _on_group: Optional[Callable[[list[CardInfo]], None]]
+    _on_card: Optional[Callable[[CardInfo], Optional[Awaitable[None]]]]
+    _requests_base: int
+    _session_store: Optional[SessionStore]
+    _mail: str
+    _password: str
+    _relogin_lock: Optional[asyncio.Lock]
+    _session_generation: int
+    _retries: int
+    _retry_backoff: float|int
+    _checkpoint: Optional[ScanCheckpoint]
     _user_id: str
 
-    def __init__(self, *, mail: str, password: str, request_delay: float|int = 2.0) -> None:
+    def __init__(
+            self,
+            *,
+            mail: str,
+            password: str,
+            request_delay: float|int = 2.0,
+            max_concurrency: int = 4,
+            min_request_delay: float|int = 0.5,
+            max_request_delay: float|int = 60.0,
+            wish_list_cache: Optional[WishListCache] = None,
+            html_backend: Optional[SoupBackend|LxmlBackend] = None,
+            response_cache: Optional[ResponseCache] = None,
+            lot_snapshots: Optional[LotSnapshotStore] = None,
+            price_history: Optional[PriceHistoryStore] = None,
+            base_url: str = MANGABUFF_URL,
+            metrics: Optional[ScanMetrics] = None,
+            profiler: Optional[ScanProfiler] = None,
+            session_store: Optional[SessionStore] = None,
+            retries: int = RETRIES,
+            retry_backoff: float|int = RETRY_BACKOFF,
+            checkpoint: Optional[ScanCheckpoint] = None
+    ) -> None:
         """Инициализатор
 
         Parameters:
             mail (str): Электронная почта для авторизации
             password (str): Пароль от аккаунта
-            request_delay (float|int): Задержка перед запросами
+            request_delay (float|int): Начальный интервал между стартами запросов,
+                дальше его подстраивает AdaptiveRateLimiter
+            max_concurrency (int): Максимум одновременных запросов
+            min_request_delay (float|int): Нижняя граница интервала. Если request_delay меньше,
+                нижней границей становится request_delay
+            max_request_delay (float|int): Верхняя граница интервала при замедлении
+            wish_list_cache (Optional[WishListCache]): Кэш списка желаемого, без него список обходится каждый раз
+            html_backend (Optional[SoupBackend|LxmlBackend]): Разбор страниц, по умолчанию default_backend()
+            response_cache (Optional[ResponseCache]): Кэш ответов сервера с условной перепроверкой, без него каждая страница загружается заново
+            lot_snapshots (Optional[LotSnapshotStore]): Снимки лотов, без них страница лотов загружается для каждой карты
+            price_history (Optional[PriceHistoryStore]): История цен, в неё дописываются лоты каждого сканирования
+            base_url (str): Адрес сайта, по умолчанию MANGABUFF_URL. Для локального стенда benchmarks.standin_server
+            metrics (Optional[ScanMetrics]): Метрики по этапам, по умолчанию собственные
+            profiler (Optional[ScanProfiler]): Профилирование сканирований по запросу, без него не профилируются
+            session_store (Optional[SessionStore]): Сохранённые сессии. Если сессия из него ещё действует,
+                вход и поиск user_id при запуске пропускаются
+            retries (int): Повторы запроса после сетевой ошибки или ответа 5xx
+            retry_backoff (float|int): Пауза перед первым повтором, дальше удваивается
+            checkpoint (Optional[ScanCheckpoint]): Контрольная точка. Сканирование, прерванное ошибкой,
+                при повторе берёт из неё готовые страницы и лоты вместо запросов
 
         Raises:
             TypeError: Неверные типы аргументов
-            ValueError: Пустые строки в электронной почте или пароле
+            ValueError: Пустые строки в электронной почте, пароле или base_url, отрицательные retries или retry_backoff
             EmailNotValidError: Почта не прошла валидацию
             NotAuthorized: Не авторован
             HTTPError: Проблемы сетевого характера, ID, CSRF не найден. Проблемы с HTML
         """
         ...
 
+    @property
+    def current_rate(self) -> float:
+        """Текущая частота запросов в секунду, которую выбрал ограничитель"""
+        ...
+
+    @property
+    def metrics(self) -> ScanMetrics:
+        """Метрики запросов и разбора по этапам"""
+        ...
+
+    @property
+    def profiler(self) -> Optional[ScanProfiler]:
+        """Профилировщик сканирований, если задан"""
+        ...
+
+    @property
+    def checkpoint(self) -> Optional[ScanCheckpoint]:
+        """Контрольная точка сканирований, если задана"""
+        ...
+
+    @property
+    def user_id(self) -> str:
+        """ID пользователя вошедшего аккаунта, из window.user_id главной страницы"""
+        ...
+
+    @property
+    def last_scan_requests(self) -> int:
+        """Число запросов последнего сканирования"""
+        ...
+
+    @property
+    def last_scan_lots_skipped(self) -> int:
+        """Число страниц лотов, которые последнее сканирование взяло из снимков без запроса"""
+        ...
+
+    @property
+    def last_scan_lots_resumed(self) -> int:
+        """Число карт, лоты которых последнее сканирование взяло с контрольной точки"""
+        ...
+
+    @property
+    def last_scan_lots_changed(self) -> int:
+        """Число загруженных последним сканированием страниц лотов, которые отличаются от снимка"""
+        ...
+
     def __enter__(self) -> "MangabuffParser":
         """Вход в контекстынй менеджер
 
@@ -163,32 +452,215 @@ class MangabuffParser:
         """
         ...
 
+    def _restore_session(self) -> bool:
+        """Сессия из session_store: cookies и user_id, проверенные одним запросом главной
+        без задержки и разбора разметки. Недействующая сессия удаляется из хранилища
+
+        Returns:
+            bool: True если сессия действует и вход не нужен
+        """
+        ...
+
+    def _save_session(self) -> None:
+        """Сохранение cookies и user_id в session_store, если он задан"""
+        ...
+
+    def _fetcher_cookies(self) -> httpx.Cookies:
+        """Cookies сессии requests для асинхронного загрузчика"""
+        ...
+
+    async def _relogin(self, generation: int) -> None:
+        """Повторный вход посреди сканирования. Одновременные запросы, потерявшие сессию,
+        входят один раз: вход пропускается, если сессия сменилась после generation.
+        Новые cookies сохраняются и передаются загрузчику
+
+        Raises:
+            NotAuthorized: Логин или пароль больше не подходят
+        """
+        ...
+
+    @staticmethod
+    def _session_lost(response: "httpx.Response") -> bool:
+        """Потеряна ли сессия: ответ из SESSION_EXPIRED_CODES или редирект на страницу входа"""
+        ...
+
+    def _sync_request(
+            self,
+            stage: str,
+            method: Callable[..., "requests.Response"],
+            url: str,
+            *,
+            wait: float = 0.0,
+            **kwargs
+    ) -> "requests.Response":
+        """Синхронный запрос сессии с записью в метрики этапа
+
+        Parameters:
+            stage (str): Этап для метрик
+            method (Callable): Метод сессии, get или post
+            url (str): URL запроса
+            wait (float): Время, проспанное перед запросом
+        """
+        ...
+
+    def _parse_html(self, stage: str, parse: Callable[[bytes], object], content: bytes) -> object:
+        """Разбор страницы бэкендом с записью времени в метрики этапа"""
+        ...
+
     def _close(self) -> None:
         """Закрытие сессии"""
         ...
 
-    def _parse_market(self, *, url: str, rank: Iterable[CardRank]) -> Iterable[CardInfo]:
-        """Парсинг основной страницы торговой площадки
+    def _open_fetcher(self) -> AsyncFetcher:
+        """Создание асинхронного загрузчика с заголовками и cookies текущей сессии.
+        Кэш ответов разделяется по user_id"""
+        ...
+
+    def _scan_session(
+            self,
+            progress: Optional[ScanProgress]=None,
+            on_group: Optional[Callable[[list[CardInfo]], None]]=None,
+            on_card: Optional[Callable[[CardInfo], Optional[Awaitable[None]]]]=None
+    ) -> AsyncIterator[AsyncFetcher]:
+        """Асинхронный контекстный менеджер одного сканирования.
+        Открывает загрузчик и сохраняет его в _fetcher на время сканирования,
+        отмечает начало и конец сканирования в метриках, если сканирование
+        в них ещё не идёт. Запросы сессии прибавляются к progress.requests.
+        В конце cookies загрузчика сохраняются в session_store
+
+        Parameters:
+            progress (Optional[ScanProgress]): Объект прогресса, который обновляется по ходу сканирования
+            on_group (Optional[Callable[[list[CardInfo]], None]]): Вызывается с картами тайтла, когда их лоты загружены
+            on_card (Optional[Callable[[CardInfo], Optional[Awaitable[None]]]]): Вызывается с картой, как только её лоты загружены.
+                Если возвращает awaitable, загрузка карты завершается после него
+        """
+        ...
+
+    async def _fetch(self, url: str) -> "httpx.Response":
+        """GET запрос через загрузчик, ответы из SESSION_EXPIRED_CODES возвращаются без исключения"""
+        ...
+
+    async def _get(self, url: str) -> "httpx.Response":
+        """GET запрос через загрузчик текущего сканирования с учётом прогресса,
+        в метрики пишется под текущим этапом. При потере сессии выполняется
+        повторный вход и запрос повторяется один раз
+
+        Raises:
+            NotAuthorized: Сессия не восстановилась после повторного входа
+        """
+        ...
+
+    async def _get_content(self, url: str) -> bytes:
+        """Загрузка страницы"""
+        ...
+
+    @staticmethod
+    def _read_rank(value: Optional[str]) -> CardRank:
+        """Ранг карты из значения атрибута data-rank
+
+        Raises:
+            RankNotFound: Атрибут не найден или ранг неизвестен
+        """
+        ...
+
+    @staticmethod
+    def _read_lots(items: Iterable[LotItem]) -> Lots:
+        """Лоты из разметки, лоты с нераспознанной ценой пропускаются"""
+        ...
+
+    @staticmethod
+    def _wish_list_fingerprint(page: Optional[ListingPage]) -> str:
+        """Отпечаток первой страницы списка желаемого: ID карт и число страниц"""
+        ...
+
+    @staticmethod
+    async def _gather(coroutines: Iterable[Awaitable]) -> list:
+        """asyncio.gather, который при первой ошибке отменяет остальные задачи и дожидается их отмены.
+        Отброшенные запросы не тратят слоты ограничителя, их ошибки не теряются"""
+        ...
+
+    async def _get_page(
+            self,
+            url: str,
+            parse_page: Callable[[bytes], Optional[ListingPage]],
+            content: Optional[bytes]=None
+    ) -> Optional[ListingPage]:
+        """Одна разобранная страница списка. Без content берётся из _checkpoint,
+        если там её нет, загружается. Разобранная страница сохраняется в _checkpoint"""
+        ...
+
+    async def _crawl_pages(
+            self,
+            *,
+            url: str,
+            parse_page: Callable[[bytes], Optional[ListingPage]],
+            max_pages: int,
+            first_content: Optional[bytes]=None,
+            strict: bool=False
+    ) -> list[CardInfo]:
+        """Обход страниц списка до последней из пагинации первой страницы или до первой пустой.
+        Страницы после первой загружаются параллельно через _gather:
+        ошибка одной страницы отменяет загрузку остальных
+
+        Parameters:
+            url (str): URL списка без параметра page
+            parse_page (Callable): Разбор страницы в карты, None если на странице нет карт
+            max_pages (int): Максимум страниц, лишние отбрасываются с предупреждением
+            first_content (Optional[bytes]): Уже загруженная первая страница
+            strict (bool): TooManyPages вместо обрезки, если страниц больше max_pages
+        """
+        ...
+
+    async def _crawl_unranked(
+            self,
+            *,
+            url: str,
+            parse_page: Callable[[bytes], Optional[ListingPage]],
+            max_pages: int,
+            first_content: Optional[bytes]=None
+    ) -> Optional[list[CardInfo]]:
+        """Обход списка без фильтра по рангу, ранг читается из разметки карт
+
+        Returns:
+            Optional[list[CardInfo]]: Карты, None если ранг не удалось прочитать
+                или страниц больше max_pages: тогда список обходится по рангам, у каждого свой лимит
+        """
+        ...
+
+    async def _parse_market(self, *, url: str, rank: Iterable[CardRank]) -> CardIndex:
+        """Парсинг основной страницы торговой площадки.
+        Если выбраны все ранги, сначала обходится список без фильтра по рангу.
+        По рангам, параллельно, обход идёт только когда ранг не читается из разметки
 
         Parameters:
             url (str): URL страницы с параметрами
             rank (Iterable[CardRank]): Выбранный ранг
 
         Returns:
-            list[CardInfo]: ID карточкек, Ранг карточки
+            CardIndex: ID карточкек, Ранг карточки
         """
         ...
 
-    def _parse_wish_list(self) -> Iterable[CardInfo]:
-        """Парсинг списка желаемых карточек
+    async def _parse_wish_list(self) -> CardIndex:
+        """Парсинг списка желаемых карточек.
+        Как и _parse_market, по рангам обходит только если ранг не читается из разметки.
+        С кэшем загружается только первая страница, если её отпечаток не изменился
+        и кэш не устарел, список берётся из кэша
 
         :return:
-            list[CardInfo]: Список всех желаемых пользователем карточек с названиями тайтлов
+            CardIndex: Все желаемые пользователем карточки с названиями тайтлов
         """
         ...
 
-    def _parse_cards_lots(self, *, cards_list: Iterable[CardInfo]) -> Iterable[CardInfo]:
-        """Парсинг страниц лотов кард
+    async def _parse_card_lots(self, card: CardInfo) -> None:
+        """Парсинг страницы лотов одной карты, заполняет имя и лоты карты.
+        Если признак карты в выдаче не изменился и снимок не устарел, лоты берутся из снимка.
+        Лоты, уже загруженные прерванным сканированием, берутся из _checkpoint"""
+        ...
+
+    async def _parse_cards_lots(self, *, cards_list: Iterable[CardInfo]) -> Iterable[CardInfo]:
+        """Парсинг страниц лотов кард, страницы загружаются параллельно по порядку тайтлов.
+        Готовые тайтлы сразу передаются в _on_group, итог дописывается в _price_history
 
         Parameters:
             cards_list (Iterable[CardInfo]): Список кард
@@ -198,6 +670,89 @@ class MangabuffParser:
         """
         ...
 
+    async def aget_cards_lots(
+            self,
+            *,
+            query: Optional[str]=None,
+            want: bool=False,
+            rank: Optional[CardRank]=None,
+            progress: Optional[ScanProgress]=None,
+            on_group: Optional[Callable[[list[CardInfo]], None]]=None,
+            on_card: Optional[Callable[[CardInfo], Optional[Awaitable[None]]]]=None
+    ) -> Iterable[CardInfo]:
+        """Асинхронная версия get_cards_lots
+
+        Parameters:
+            progress (Optional[ScanProgress]): Объект прогресса для наблюдения за сканированием
+            on_group (Optional[Callable[[list[CardInfo]], None]]): Вызывается с картами одного тайтла,
+                как только загружены лоты всех его карт. Тайтлы обрабатываются в алфавитном порядке
+            on_card (Optional[Callable[[CardInfo], Optional[Awaitable[None]]]]): Вызывается с каждой картой,
+                как только загружены её лоты. Если возвращает awaitable, загрузка карты завершается после него
+
+        После успешного сканирования контрольная точка очищается, после ошибки остаётся для повтора
+        """
+        ...
+
+    def clear_checkpoint(self) -> None:
+        """Очистка контрольной точки аккаунта. SharedMarketScan вызывает её после успешного сканирования"""
+        ...
+
+    async def aget_market(
+            self,
+            *,
+            progress: Optional[ScanProgress]=None,
+            rank: Optional[Iterable[CardRank]]=None,
+            query: Optional[str]=None,
+            want: bool=False
+    ) -> CardIndex:
+        """Торговая площадка по рангам, без лотов. Без want страницы общие для всех аккаунтов,
+        с want - только карты из желаемого вошедшего аккаунта. На них строятся SharedMarketScan и ShardedScan
+
+        Args:
+            rank (Iterable[CardRank], optional): Только эти ранги, по умолчанию все
+            query (str, optional): Поисковый запрос
+            want (bool): Вкладка «хочу», видна только вошедшему аккаунту
+
+        Returns:
+            CardIndex: ID, Ранг и сигнал изменения карт на торговой площадке
+        """
+        ...
+
+    async def aget_wish_list(
+            self,
+            *,
+            progress: Optional[ScanProgress]=None,
+            user_id: Optional[str]=None,
+            rank: Optional[Iterable[CardRank]]=None
+    ) -> CardIndex:
+        """Список желаемого аккаунта. Кэш списка желаемого используется только для всех рангов
+
+        Args:
+            user_id (str, optional): Чей список, по умолчанию вошедшего аккаунта
+            rank (Iterable[CardRank], optional): Только эти ранги, по умолчанию все
+
+        Returns:
+            CardIndex: ID, Ранг, Название и Название тайтла карт
+        """
+        ...
+
+    async def aget_lots(
+            self,
+            cards: Iterable[CardInfo],
+            *,
+            progress: Optional[ScanProgress]=None,
+            on_group: Optional[Callable[[list[CardInfo]], None]]=None,
+            on_card: Optional[Callable[[CardInfo], Optional[Awaitable[None]]]]=None
+    ) -> list[CardInfo]:
+        """Лоты переданных карт, карты дополняются на месте.
+        Лоты попадают в историю цен, как при aget_cards_lots
+
+        Parameters:
+            cards (Iterable[CardInfo]): Карты с названием тайтла
+            on_group, on_card: Как в aget_cards_lots
+        """
+        ...
+
     def get_cards_lots(
             self,
             *,
@@ -205,7 +760,8 @@ class MangabuffParser:
             want: bool=False,
             rank: Optional[CardRank]=None
     ) -> Iterable[CardInfo]:
-        """Получает информацию о карточках и лотах
+        """Получает информацию о карточках и лотах.
+        Нельзя вызывать из работающего event loop, там используется aget_cards_lots
 
         Parameters:
             query (Optional[str]): Запрос посика
@@ -221,6 +777,56 @@ class MangabuffParser:
         """
         ...
 
+    async def aiter_cards_lots(
+            self,
+            *,
+            query: Optional[str]=None,
+            want: bool=False,
+            rank: Optional[CardRank]=None,
+            progress: Optional[ScanProgress]=None
+    ) -> AsyncGenerator[CardInfo, None]:
+        """Асинхронная версия iter_cards_lots.
+        Сканирование идёт в фоновой задаче, при выходе из цикла раньше времени она отменяется.
+        Готовых карт в очереди не больше STREAM_QUEUE_SIZE: дальше сканирование ждёт потребителя
+
+        Parameters:
+            progress (Optional[ScanProgress]): Объект прогресса для наблюдения за сканированием
+        """
+        ...
+
+    def iter_cards_lots(
+            self,
+            *,
+            query: Optional[str]=None,
+            want: bool=False,
+            rank: Optional[CardRank]=None
+    ) -> Generator[CardInfo, None, None]:
+        """Отдаёт карточки по одной, как только загружены их лоты, не дожидаясь конца сканирования.
+        Сканирование продвигается только пока генератор ждут, работает в собственном event loop,
+        поэтому нельзя вызывать из работающего event loop
+
+        Parameters:
+            query (Optional[str]): Запрос посика
+            want (bool): Флаг желаемых карточек
+            rank (Optional[CardRank]): Ранг карточки
+
+        Yields:
+            CardInfo: Карточка с названием, тайтлом и лотами
+
+        Raises:
+            Те же исключения что и get_cards_lots, после уже отданных карт
+
+        Examples:
+            >>> parser = MangabuffParser(mail='user@example.com', password='pass')
+            >>> for card in parser.iter_cards_lots(want=True):
+            ...     print(card)
+        """
+        ...
+
+    async def aget_want_market_formatted(self, *, progress: Optional[ScanProgress]=None) -> str:
+        """Асинхронная версия get_want_market_formatted"""
+        ...
+
     def get_want_market_formatted(self) -> str:
         """Выводит информацию о карточках которые находятся в wish листе и
         выставляются на торговой площадке
@@ -0,0 +1,126 @@
+from collections import Counter
+from dataclasses import dataclass, field
+
+from resources.messages import (
+    MANGA_NAME_OUTPUT_STRING,
+    CARD_DELTA_OUTPUT_STRING,
+    LOTS_ADDED_OUTPUT_STRING,
+    LOTS_REMOVED_OUTPUT_STRING,
+    LOTS_CHANGED_OUTPUT_STRING
+)
+from MangabuffParser import CardInfo, Lot
+
+
+def _subtract(lots, other):
+    """Лоты из lots, которых нет в other, с учётом повторов и в порядке цены"""
+    rest = Counter(other)
+    result = list()
+    for lot in lots:
+        if rest[lot]:
+            rest[lot] -= 1
+            continue
+        result.append(lot)
+    return result
+
+
+def _pair(removed, added):
+    """Пары (старый, новый) для изменений цены: сначала лоты с тем же lot_id,
+    остальные по порядку цены"""
+    added_by_id = {lot.lot_id: lot for lot in added if lot.lot_id}
+    pairs = list()
+    for lot in list(removed):
+        new_lot = added_by_id.pop(lot.lot_id, None) if lot.lot_id else None
+        if new_lot is None: continue
+        pairs.append((lot, new_lot))
+        removed.remove(lot)
+        added.remove(new_lot)
+
+    paired = min(len(removed), len(added))
+    pairs.extend(zip(removed[:paired], added[:paired]))
+    del removed[:paired]
+    del added[:paired]
+    return pairs
+
+
+@dataclass
+class CardDelta:
+    card: CardInfo
+    added: list[Lot] = field(default_factory=list)
+    removed: list[Lot] = field(default_factory=list)
+    changed: list[tuple[Lot, Lot]] = field(default_factory=list)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def __str__(self):
+        lines = [CARD_DELTA_OUTPUT_STRING.format(name=self.card.name, rank=self.card.rank.value.capitalize())]
+        if self.changed:
+            lines.append(LOTS_CHANGED_OUTPUT_STRING.format(
+                lots="|".join(f"{old} → {new}" for old, new in self.changed)
+            ))
+        if self.added:
+            lines.append(LOTS_ADDED_OUTPUT_STRING.format(lots="|".join(str(lot) for lot in self.added)))
+        if self.removed:
+            lines.append(LOTS_REMOVED_OUTPUT_STRING.format(lots="|".join(str(lot) for lot in self.removed)))
+        return "\n".join(lines)
+
+    @classmethod
+    def between(cls, previous: CardInfo | None, current: CardInfo | None):
+        """Изменения лотов одной карты. Лот с тем же lot_id и другой ценой,
+        а также пропавший лот и появившийся вместо него считаются изменением цены"""
+        previous_lots = previous.lots if previous is not None else []
+        current_lots = current.lots if current is not None else []
+
+        added = _subtract(current_lots, previous_lots)
+        removed = _subtract(previous_lots, current_lots)
+        changed = _pair(removed, added)
+
+        return cls(
+            card=current if current is not None else previous,
+            added=added,
+            removed=removed,
+            changed=changed
+        )
+
+
+class MarketDelta:
+    """Разница двух сканирований: новые, снятые лоты и изменения цен по картам"""
+    def __init__(self, cards: list[CardDelta]):
+        self.cards = cards
+
+    def __bool__(self):
+        return bool(self.cards)
+
+    def __len__(self):
+        return len(self.cards)
+
+    @classmethod
+    def compute(cls, previous, current):
+        """Сравнение прошлого и текущего списка карт
+
+        :return:
+            MarketDelta: Только карты с изменившимися лотами, в порядке текущего списка
+        """
+        previous_by_id = {card.data_id: card for card in previous}
+        current_by_id = {card.data_id: card for card in current}
+
+        cards = list()
+        for data_id, card in current_by_id.items():
+            delta = CardDelta.between(previous_by_id.get(data_id), card)
+            if delta: cards.append(delta)
+        for data_id, card in previous_by_id.items():
+            if data_id in current_by_id: continue
+            delta = CardDelta.between(card, None)
+            if delta: cards.append(delta)
+        return cls(cards)
+
+    def out_list(self):
+        """Вывод изменений в строку, в md формате, с группировкой по тайтлам"""
+        title = str()
+        result = str()
+        for delta in sorted(self.cards, key=lambda x: x.card.manga_name):
+            if delta.card.manga_name != title:
+                title = delta.card.manga_name
+                result += MANGA_NAME_OUTPUT_STRING.format(title=title) + "\n"
+            result += f"{delta}\n"
+        return result
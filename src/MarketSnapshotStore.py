@@ -0,0 +1,61 @@
+import json
+import logging
+import os
+from pathlib import Path
+
+from MangabuffParser import CardInfo, CardRank, Lots
+
+
+logger = logging.getLogger(__name__)
+
+class MarketSnapshotStore:
+    """Снимок последнего отправленного сканирования в JSON файле
+
+    Файл перезаписывается целиком через временный файл,
+    так что оборванная запись не портит прошлый снимок.
+    """
+    def __init__(self, *, path):
+        self._path = Path(path)
+
+    def load(self) -> list[CardInfo] | None:
+        """Карты прошлого сканирования
+
+        :return:
+            list[CardInfo]|None: Карты, None если снимка нет или он не читается
+        """
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                data = json.load(f)
+            return [
+                CardInfo(
+                    data_id=card["data_id"],
+                    rank=CardRank(card["rank"]),
+                    name=card["name"],
+                    manga_name=card["manga_name"],
+                    lots=Lots(card["lots"])
+                ) for card in data["cards"]
+            ]
+        except FileNotFoundError:
+            return None
+        except (ValueError, KeyError, TypeError) as e:
+            logger.error(f"Market snapshot unreadable: {e}")
+            return None
+
+    def save(self, cards):
+        """Замена снимка"""
+        data = {
+            "cards": [
+                {
+                    "data_id": card.data_id,
+                    "rank": card.rank.value,
+                    "name": card.name,
+                    "manga_name": card.manga_name,
+                    "lots": [[lot.price, lot.lot_id] for lot in card.lots]
+                } for card in cards
+            ]
+        }
+        temp_path = self._path.with_name(self._path.name + ".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, self._path)
+        logger.info(f"Market snapshot saved: {len(data['cards'])} cards")
@@ -0,0 +1,81 @@
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+SPLIT_SEPARATORS = ("\n", "|")
+
+
+def message_length(text):
+    """Длина сообщения так, как её считает Telegram: в UTF-16 единицах"""
+    return len(text.encode("utf-16-le")) // 2
+
+
+def split_text(text, limit=TELEGRAM_MESSAGE_LIMIT, separators=SPLIT_SEPARATORS):
+    """Разбиение текста на части не длиннее limit.
+    Режет по первому разделителю, при котором части помещаются, в крайнем случае по символам"""
+    if message_length(text) <= limit: return [text]
+
+    if not separators:
+        parts = list()
+        part = str()
+        for char in text:
+            if message_length(part + char) > limit:
+                parts.append(part)
+                part = str()
+            part += char
+        if part: parts.append(part)
+        return parts
+
+    separator, *rest = separators
+    parts = list()
+    part = str()
+    for piece in text.split(separator):
+        candidate = f"{part}{separator}{piece}" if part else piece
+        if message_length(candidate) <= limit:
+            part = candidate
+            continue
+        if part: parts.append(part)
+        if message_length(piece) <= limit:
+            part = piece
+        else:
+            *pieces, part = split_text(piece, limit, rest)
+            parts.extend(pieces)
+    if part: parts.append(part)
+    return parts
+
+
+class MessageChunker:
+    """Сборка сообщений из блоков (групп тайтлов) с ограничением длины
+
+    Блоки склеиваются, пока сообщение помещается в limit.
+    Блок длиннее limit режется по строкам карт.
+    """
+    def __init__(self, limit=TELEGRAM_MESSAGE_LIMIT):
+        self._limit = limit
+        self._buffer = str()
+
+    def __bool__(self):
+        return bool(self._buffer)
+
+    def add(self, block) -> list[str]:
+        """Добавление блока
+
+        :return:
+            list[str]: Заполненные сообщения, готовые к отправке
+        """
+        block = block.strip("\n")
+        if not block: return []
+
+        candidate = f"{self._buffer}\n{block}" if self._buffer else block
+        if message_length(candidate) <= self._limit:
+            self._buffer = candidate
+            return []
+
+        ready = [self._buffer] if self._buffer else []
+        *parts, self._buffer = split_text(block, self._limit)
+        ready.extend(parts)
+        return ready
+
+    def flush(self) -> list[str]:
+        """Сообщение из накопленных блоков"""
+        ready = [self._buffer] if self._buffer else []
+        self._buffer = str()
+        return ready
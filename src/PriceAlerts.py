@@ -0,0 +1,168 @@
+import logging
+import sqlite3
+from collections import defaultdict
+from typing import NamedTuple
+
+from MangabuffParser import CardRank
+
+
+logger = logging.getLogger(__name__)
+
+class AlertRule(NamedTuple):
+    rule_id: int
+    below: int
+    data_id: str | None = None
+    manga_name: str | None = None
+    rank: CardRank | None = None
+
+    def matches(self, card):
+        """Подходит ли карта под условия правила, без учёта цены"""
+        if self.data_id is not None and card.data_id != self.data_id: return False
+        if self.manga_name is not None and card.manga_name.casefold() != self.manga_name.casefold(): return False
+        if self.rank is not None and card.rank != self.rank: return False
+        return True
+
+
+class PriceAlerts:
+    """Правила оповещений о цене с индексом по карте, тайтлу и рангу
+
+    Правило попадает в индекс по самому точному условию: ID карты,
+    затем тайтл, затем ранг. Для карты проверяются только правила
+    из её корзин, поэтому число всех правил на проверку не влияет.
+    Правило срабатывает, когда минимальная цена карты ниже порога,
+    и повторно только если цена опустилась ещё ниже. Последняя цена
+    оповещения хранится в той же базе, так что перезапуск бота
+    не присылает уже отправленные оповещения ещё раз.
+    """
+    def __init__(self, *, path):
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS alert_rules (
+                rule_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                below INTEGER NOT NULL,
+                data_id TEXT,
+                manga_name TEXT,
+                rank TEXT
+            );
+            CREATE TABLE IF NOT EXISTS alert_notified (
+                rule_id INTEGER NOT NULL,
+                data_id TEXT NOT NULL,
+                price INTEGER NOT NULL,
+                PRIMARY KEY (rule_id, data_id)
+            );
+        """)
+        self._rules: dict[int, AlertRule] = dict()
+        self._by_data_id = defaultdict(list)
+        self._by_manga = defaultdict(list)
+        self._by_rank = defaultdict(list)
+        self._global = list()
+        self._notified: dict[tuple[int, str], int] = dict()
+
+        rows = self._connection.execute("SELECT rule_id, below, data_id, manga_name, rank FROM alert_rules")
+        for rule_id, below, data_id, manga_name, rank in rows:
+            self._index(AlertRule(
+                rule_id=rule_id,
+                below=below,
+                data_id=data_id,
+                manga_name=manga_name,
+                rank=CardRank(rank) if rank is not None else None
+            ))
+        rows = self._connection.execute("SELECT rule_id, data_id, price FROM alert_notified")
+        self._notified.update(((rule_id, data_id), price) for rule_id, data_id, price in rows)
+        logger.info(f"Price alerts opened: {path}, {len(self._rules)} rules")
+
+    def __len__(self):
+        return len(self._rules)
+
+    def _bucket(self, rule):
+        if rule.data_id is not None: return self._by_data_id[rule.data_id]
+        if rule.manga_name is not None: return self._by_manga[rule.manga_name.casefold()]
+        if rule.rank is not None: return self._by_rank[rule.rank]
+        return self._global
+
+    def _index(self, rule):
+        self._rules[rule.rule_id] = rule
+        self._bucket(rule).append(rule)
+
+    @property
+    def rules(self) -> list[AlertRule]:
+        """Все правила в порядке добавления"""
+        return list(self._rules.values())
+
+    def add(self, *, below, data_id=None, manga_name=None, rank=None) -> AlertRule:
+        """Добавление правила
+
+        :return:
+            AlertRule: Правило с присвоенным rule_id
+        """
+        if not isinstance(below, int) or isinstance(below, bool):
+            raise TypeError("Порог цены должен быть целым числом")
+        if below <= 0:
+            raise ValueError("Порог цены должен быть больше нуля")
+        if not isinstance(rank, CardRank|None):
+            raise TypeError("rank должен быть CardRank типом")
+
+        with self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO alert_rules (below, data_id, manga_name, rank) VALUES (?, ?, ?, ?)",
+                (below, data_id, manga_name, rank.value if rank is not None else None)
+            )
+        rule = AlertRule(rule_id=cursor.lastrowid, below=below, data_id=data_id, manga_name=manga_name, rank=rank)
+        self._index(rule)
+        logger.info(f"Alert rule added: {rule}")
+        return rule
+
+    def remove(self, rule_id) -> bool:
+        """Удаление правила
+
+        :return:
+            bool: True если правило было
+        """
+        rule = self._rules.pop(rule_id, None)
+        if rule is None: return False
+
+        self._bucket(rule).remove(rule)
+        with self._connection:
+            self._connection.execute("DELETE FROM alert_rules WHERE rule_id = ?", (rule_id,))
+            self._connection.execute("DELETE FROM alert_notified WHERE rule_id = ?", (rule_id,))
+        for key in [key for key in self._notified if key[0] == rule_id]:
+            del self._notified[key]
+        logger.info(f"Alert rule removed: {rule_id}")
+        return True
+
+    def check(self, card) -> list[AlertRule]:
+        """Сработавшие на карте правила
+
+        :return:
+            list[AlertRule]: Правила, порог которых карта впервые или ещё сильнее пробила
+        """
+        price = card.lots.min_price
+        candidates = (
+            *self._by_data_id.get(card.data_id, ()),
+            *self._by_manga.get(card.manga_name.casefold(), ()),
+            *self._by_rank.get(card.rank, ()),
+            *self._global,
+        )
+
+        triggered = list()
+        for rule in candidates:
+            if not rule.matches(card): continue
+            key = (rule.rule_id, card.data_id)
+            if price is None or price >= rule.below:
+                if self._notified.pop(key, None) is not None:
+                    with self._connection:
+                        self._connection.execute("DELETE FROM alert_notified WHERE rule_id = ? AND data_id = ?", key)
+                continue
+            if key in self._notified and self._notified[key] <= price: continue
+            self._notified[key] = price
+            with self._connection:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO alert_notified (rule_id, data_id, price) VALUES (?, ?, ?)",
+                    (*key, price)
+                )
+            triggered.append(rule)
+        return triggered
+
+    def close(self):
+        """Закрытие базы"""
+        self._connection.close()
@@ -0,0 +1,168 @@
+import json
+import logging
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from time import time
+from typing import NamedTuple
+
+
+COLUMNS = {
+    "ts": "q",
+    "card": "i",
+    "min": "q",
+    "sum": "q",
+    "count": "i",
+}
+
+CARDS_FILE = "cards.jsonl"
+
+logger = logging.getLogger(__name__)
+
+class CardMeta(NamedTuple):
+    data_id: str
+    name: str
+    manga_name: str
+    rank: str
+
+
+class PriceStats(NamedTuple):
+    min_price: int
+    avg_price: float
+    last_price: int
+    last_seen: float
+    scans: int
+
+
+class PriceHistoryStore:
+    """Append-only история цен в колоночных файлах
+
+    На каждую карту с лотами за сканирование пишется одна строка:
+    время, номер карты, минимальная цена, сумма и число лотов.
+    Колонки хранятся отдельными файлами array и только дописываются,
+    номера карт ведутся в cards.jsonl. Строки идут по времени,
+    поэтому окно по карте находится бинарным поиском по её строкам.
+    """
+    def __init__(self, *, path):
+        self._path = Path(path)
+        self._path.mkdir(parents=True, exist_ok=True)
+
+        self._cards: list[CardMeta] = list()
+        self._card_numbers: dict[str, int] = dict()
+        cards_path = self._path / CARDS_FILE
+        if cards_path.exists():
+            with open(cards_path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip(): continue
+                    try:
+                        meta = CardMeta(*json.loads(line))
+                    except (ValueError, TypeError):
+                        # Оборваться может только последняя строка, её строки цен ещё не записаны
+                        logger.warning("Price history cards file has a broken tail, skipped")
+                        break
+                    self._add_card(meta)
+
+        self._columns = {name: array(typecode) for name, typecode in COLUMNS.items()}
+        for name, column in self._columns.items():
+            column_path = self._column_path(name)
+            if not column_path.exists(): continue
+            data = column_path.read_bytes()
+            column.frombytes(data[:len(data) - len(data) % column.itemsize])
+
+        # Оборванная запись оставляет колонки разной длины, лишний хвост отбрасывается
+        rows = min(len(column) for column in self._columns.values())
+        for name, column in self._columns.items():
+            if len(column) > rows:
+                del column[rows:]
+                with open(self._column_path(name), "wb") as f:
+                    column.tofile(f)
+
+        self._rows_by_card: dict[int, array] = dict()
+        for row, card_number in enumerate(self._columns["card"]):
+            self._rows_by_card.setdefault(card_number, array("l")).append(row)
+
+        logger.info(f"Price history opened: {path}, {rows} rows, {len(self._cards)} cards")
+
+    def __len__(self):
+        return len(self._columns["ts"])
+
+    def _column_path(self, name):
+        return self._path / f"{name}.{COLUMNS[name]}"
+
+    def _add_card(self, meta):
+        self._card_numbers[meta.data_id] = len(self._cards)
+        self._cards.append(meta)
+
+    def append(self, cards, *, timestamp=None):
+        """Запись цен карт одного сканирования, карты без лотов пропускаются"""
+        timestamp = int(timestamp if timestamp is not None else time())
+        new_cards = list()
+        rows = {name: array(typecode) for name, typecode in COLUMNS.items()}
+
+        for card in cards:
+            if not card.lots: continue
+            card_number = self._card_numbers.get(card.data_id)
+            if card_number is None:
+                meta = CardMeta(data_id=card.data_id, name=card.name or "", manga_name=card.manga_name, rank=card.rank.value)
+                self._add_card(meta)
+                new_cards.append(meta)
+                card_number = self._card_numbers[card.data_id]
+
+            rows["ts"].append(timestamp)
+            rows["card"].append(card_number)
+            rows["min"].append(card.lots.min_price)
+            rows["sum"].append(sum(card.lots.prices))
+            rows["count"].append(card.lots.count)
+
+        if new_cards:
+            with open(self._path / CARDS_FILE, "a", encoding="utf-8") as f:
+                for meta in new_cards:
+                    f.write(json.dumps(list(meta), ensure_ascii=False) + "\n")
+
+        first_row = len(self)
+        for name, column in rows.items():
+            with open(self._column_path(name), "ab") as f:
+                column.tofile(f)
+            self._columns[name].extend(column)
+        for row, card_number in enumerate(rows["card"], start=first_row):
+            self._rows_by_card.setdefault(card_number, array("l")).append(row)
+
+        logger.info(f"Price history appended: {len(rows['ts'])} rows")
+
+    def find(self, query, *, limit=10) -> list[CardMeta]:
+        """Карты истории по data_id или части названия карты и тайтла"""
+        query = query.strip()
+        if query in self._card_numbers:
+            return [self._cards[self._card_numbers[query]]]
+
+        query = query.lower()
+        return [
+            meta for meta in self._cards
+            if query in meta.name.lower() or query in meta.manga_name.lower()
+        ][:limit]
+
+    def stats(self, data_id, *, since, until=None) -> PriceStats | None:
+        """Минимальная, средняя и последняя цена карты за окно времени
+
+        :return:
+            PriceStats|None: Статистика, None если за окно карта не встречалась с лотами
+        """
+        card_number = self._card_numbers.get(data_id)
+        if card_number is None: return None
+
+        ts = self._columns["ts"]
+        rows = self._rows_by_card.get(card_number, ())
+        start = bisect_left(rows, since, key=lambda row: ts[row])
+        end = bisect_right(rows, until, key=lambda row: ts[row]) if until is not None else len(rows)
+        if start >= end: return None
+
+        window = rows[start:end]
+        min_column, sum_column, count_column = self._columns["min"], self._columns["sum"], self._columns["count"]
+        last_row = window[-1]
+        return PriceStats(
+            min_price=min(min_column[row] for row in window),
+            avg_price=sum(sum_column[row] for row in window) / sum(count_column[row] for row in window),
+            last_price=min_column[last_row],
+            last_seen=ts[last_row],
+            scans=len(window)
+        )
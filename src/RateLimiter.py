@@ -0,0 +1,139 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from time import monotonic, sleep
+
+
+RATE_INCREASE_STEP = 0.1
+BACKOFF_FACTOR = 2.0
+LATENCY_BACKOFF_FACTOR = 1.25
+LATENCY_RISE_RATIO = 2.0
+LATENCY_EWMA_ALPHA = 0.2
+LATENCY_MIN_SAMPLES = 5
+MIN_BACKOFF_DELAY = 0.1
+
+TOO_MANY_REQUESTS_CODE = 429
+
+logger = logging.getLogger(__name__)
+
+def parse_retry_after(value):
+    """Разбор заголовка Retry-After
+
+    :return:
+        float|None: Сколько секунд ждать, None если заголовок отсутствует или не разобран
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class AdaptiveRateLimiter:
+    """AIMD ограничитель частоты запросов
+
+    Пока ответы здоровые, частота растёт аддитивно на RATE_INCREASE_STEP запросов в секунду.
+    На 429, 5xx и ошибки сети интервал умножается на BACKOFF_FACTOR,
+    на заметный рост задержки ответа на LATENCY_BACKOFF_FACTOR.
+    Retry-After приостанавливает все запросы на указанное время.
+    """
+    def __init__(self, *, delay, min_delay, max_delay):
+        self._delay = delay
+        self._min_delay = min_delay
+        self._max_delay = max_delay
+        self._next_slot = 0.0
+        self._blocked_until = 0.0
+        self._latency = None
+        self._latency_samples = 0
+
+    @property
+    def delay(self) -> float:
+        """Текущий интервал между запросами в секундах"""
+        return self._delay
+
+    @property
+    def rate(self) -> float:
+        """Текущая частота запросов в секунду"""
+        return 1 / self._delay if self._delay else float("inf")
+
+    def reserve(self) -> float:
+        """Занять следующий слот для запроса
+
+        :return:
+            float: Сколько секунд ждать до слота
+        """
+        now = monotonic()
+        slot = max(now, self._next_slot, self._blocked_until)
+        self._next_slot = slot + self._delay
+        return slot - now
+
+    async def acquire(self):
+        """Ожидание своего слота для запроса"""
+        while True:
+            wait = self.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if monotonic() >= self._blocked_until:
+                return
+
+    def wait(self) -> float:
+        """Ожидание своего слота для синхронного запроса, например входа
+
+        :return:
+            float: Сколько секунд прошло в ожидании
+        """
+        started = monotonic()
+        while True:
+            wait = self.reserve()
+            if wait > 0:
+                sleep(wait)
+            if monotonic() >= self._blocked_until:
+                return monotonic() - started
+
+    def on_response(self, *, status_code, latency, retry_after=None):
+        """Учёт результата запроса
+
+        Parameters:
+            status_code (int): HTTP код ответа
+            latency (float): Время ответа в секундах
+            retry_after (float|None): Значение Retry-After в секундах
+        """
+        if retry_after is not None:
+            self._blocked_until = max(self._blocked_until, monotonic() + retry_after)
+            logger.warning(f"Retry-After {retry_after:.1f}s received")
+
+        if status_code == TOO_MANY_REQUESTS_CODE or status_code >= 500:
+            self._backoff(BACKOFF_FACTOR)
+            return
+
+        rising = (
+            self._latency is not None
+            and self._latency_samples >= LATENCY_MIN_SAMPLES
+            and latency > self._latency * LATENCY_RISE_RATIO
+        )
+        self._latency = latency if self._latency is None \
+            else LATENCY_EWMA_ALPHA * latency + (1 - LATENCY_EWMA_ALPHA) * self._latency
+        self._latency_samples += 1
+
+        if rising:
+            self._backoff(LATENCY_BACKOFF_FACTOR)
+            return
+
+        rate = self.rate + RATE_INCREASE_STEP
+        self._delay = max(self._min_delay, 1 / rate)
+
+    def on_error(self):
+        """Учёт сетевой ошибки"""
+        self._backoff(BACKOFF_FACTOR)
+
+    def _backoff(self, factor):
+        self._delay = min(self._max_delay, max(self._delay, self._min_delay, MIN_BACKOFF_DELAY) * factor)
+        logger.info(f"Rate limiter backoff, delay: {self._delay:.2f}s")
@@ -0,0 +1,138 @@
+import json
+import logging
+import re
+import sqlite3
+from time import time
+from typing import NamedTuple
+
+
+logger = logging.getLogger(__name__)
+
+class UrlClass(NamedTuple):
+    name: str
+    pattern: str
+    ttl: float
+    shared: bool
+
+
+URL_CLASSES = (
+    UrlClass(name="lots", pattern=r"/market/card/[^/?]+$", ttl=10 * 60, shared=True),
+    UrlClass(name="market", pattern=r"/market\?", ttl=10 * 60, shared=False),
+    UrlClass(name="wish_list", pattern=r"/cards/[^/]+/offers\?", ttl=60 * 60, shared=False),
+)
+
+VALIDATOR_HEADERS = ("ETag", "Last-Modified")
+
+
+class CachedResponse(NamedTuple):
+    content: bytes
+    headers: dict[str, str]
+    fresh: bool
+
+    def validators(self) -> dict[str, str]:
+        """Заголовки условного запроса"""
+        headers = dict()
+        if "ETag" in self.headers:
+            headers["If-None-Match"] = self.headers["ETag"]
+        if "Last-Modified" in self.headers:
+            headers["If-Modified-Since"] = self.headers["Last-Modified"]
+        return headers
+
+
+class ResponseCache:
+    """Кэш ответов в SQLite с ttl по классам URL и вытеснением давно не использованных
+
+    Кэшируются только URL из URL_CLASSES. Ответы классов с shared=False
+    хранятся отдельно для каждого пространства имён (пользователя).
+    """
+    def __init__(self, *, path, max_bytes=200 * 1024 * 1024, url_classes=URL_CLASSES):
+        self._max_bytes = max_bytes
+        self._url_classes = [(re.compile(url_class.pattern), url_class) for url_class in url_classes]
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                headers TEXT NOT NULL,
+                content BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+        """)
+        logger.info(f"Response cache opened: {path}")
+
+    def _url_class(self, url):
+        for pattern, url_class in self._url_classes:
+            if pattern.search(url): return url_class
+        return None
+
+    def _key(self, url, namespace):
+        url_class = self._url_class(url)
+        if url_class is None: return None, None
+        return (url if url_class.shared else f"{namespace}:{url}"), url_class
+
+    def lookup(self, url, *, namespace="") -> CachedResponse | None:
+        """Ответ из кэша
+
+        :return:
+            CachedResponse|None: Ответ и флаг свежести, None если URL не кэшируется или ответа нет
+        """
+        key, url_class = self._key(url, namespace)
+        if key is None: return None
+
+        row = self._connection.execute(
+            "SELECT headers, content, stored_at FROM responses WHERE key = ?",
+            (key,)
+        ).fetchone()
+        if row is None: return None
+
+        headers, content, stored_at = row
+        now = time()
+        with self._connection:
+            self._connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return CachedResponse(
+            content=content,
+            headers=json.loads(headers),
+            fresh=now - stored_at <= url_class.ttl
+        )
+
+    def store(self, url, *, namespace="", content, headers):
+        """Сохранение ответа, заголовки валидации берутся из headers"""
+        key, _ = self._key(url, namespace)
+        if key is None: return
+
+        validators = {name: headers[name] for name in VALIDATOR_HEADERS if name in headers}
+        now = time()
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, headers, content, size, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, json.dumps(validators), content, len(content), now, now)
+            )
+        self._evict()
+
+    def refresh(self, url, *, namespace=""):
+        """Продление свежести после ответа 304"""
+        key, _ = self._key(url, namespace)
+        if key is None: return
+        with self._connection:
+            self._connection.execute("UPDATE responses SET stored_at = ? WHERE key = ?", (time(), key))
+
+    def _evict(self):
+        total, = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if total <= self._max_bytes: return
+
+        evicted = 0
+        rows = self._connection.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        with self._connection:
+            for key, size in rows:
+                if total <= self._max_bytes: break
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                total -= size
+                evicted += 1
+        logger.info(f"Response cache evicted {evicted} entries")
+
+    def close(self):
+        """Закрытие базы"""
+        self._connection.close()
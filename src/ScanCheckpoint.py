@@ -0,0 +1,142 @@
+import json
+import logging
+import sqlite3
+from datetime import timedelta
+from time import time
+from typing import NamedTuple
+
+from MangabuffParser import CardInfo, CardRank, Lots
+from HtmlBackend import ListingPage
+
+
+logger = logging.getLogger(__name__)
+
+class CheckpointCard(NamedTuple):
+    name: str
+    lots: Lots
+
+
+class ScanCheckpoint:
+    """Контрольная точка сканирования в SQLite
+
+    Сохраняет разобранные страницы выдачи по адресу и карты, лоты которых
+    уже загружены. Сканирование, прерванное ошибкой, при повторе берёт
+    готовое отсюда и запрашивает только оставшееся. Успешное сканирование
+    очищает свою точку. Записи старше ttl не используются: выдача
+    торговой площадки за это время могла сдвинуться.
+    """
+    def __init__(self, *, path, ttl: timedelta = timedelta(hours=1)):
+        self._ttl = ttl
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS checkpoint_pages (
+                namespace TEXT NOT NULL,
+                url TEXT NOT NULL,
+                last_page INTEGER NOT NULL,
+                items TEXT NOT NULL,
+                saved_at REAL NOT NULL,
+                PRIMARY KEY (namespace, url)
+            );
+            CREATE TABLE IF NOT EXISTS checkpoint_cards (
+                namespace TEXT NOT NULL,
+                data_id TEXT NOT NULL,
+                signal TEXT NOT NULL,
+                name TEXT NOT NULL,
+                lots TEXT NOT NULL,
+                saved_at REAL NOT NULL,
+                PRIMARY KEY (namespace, data_id)
+            );
+        """)
+        self._drop_expired()
+        logger.info(f"Scan checkpoint opened: {path}")
+
+    def _expired(self, saved_at):
+        return time() - saved_at > self._ttl.total_seconds()
+
+    def _drop_expired(self):
+        oldest = time() - self._ttl.total_seconds()
+        with self._connection:
+            self._connection.execute("DELETE FROM checkpoint_pages WHERE saved_at < ?", (oldest,))
+            self._connection.execute("DELETE FROM checkpoint_cards WHERE saved_at < ?", (oldest,))
+
+    def load_page(self, *, namespace, url) -> ListingPage | None:
+        """Разобранная страница выдачи
+
+        :return:
+            ListingPage|None: Карты страницы и номер последней, None если её нет или она устарела
+        """
+        row = self._connection.execute(
+            "SELECT last_page, items, saved_at FROM checkpoint_pages WHERE namespace = ? AND url = ?",
+            (namespace, url)
+        ).fetchone()
+        if row is None: return None
+
+        last_page, items, saved_at = row
+        if self._expired(saved_at): return None
+        try:
+            cards = [
+                CardInfo(data_id=data_id, rank=CardRank(rank), name=name, manga_name=manga_name, market_signal=signal)
+                for data_id, rank, name, manga_name, signal in json.loads(items)
+            ]
+        except (ValueError, TypeError):
+            logger.warning(f"Checkpoint page {url} unreadable, fetching again")
+            return None
+        return ListingPage(items=cards, last_page=last_page)
+
+    def save_page(self, *, namespace, url, page):
+        """Сохранение разобранной страницы выдачи"""
+        items = json.dumps(
+            [[card.data_id, card.rank.value, card.name, card.manga_name, card.market_signal] for card in page.items],
+            ensure_ascii=False
+        )
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO checkpoint_pages (namespace, url, last_page, items, saved_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (namespace, url, page.last_page, items, time())
+            )
+
+    def load_card(self, *, namespace, data_id, signal) -> CheckpointCard | None:
+        """Загруженные лоты карты
+
+        :return:
+            CheckpointCard|None: Название и лоты, None если их нет, они устарели или признак из выдачи изменился
+        """
+        row = self._connection.execute(
+            "SELECT signal, name, lots, saved_at FROM checkpoint_cards WHERE namespace = ? AND data_id = ?",
+            (namespace, data_id)
+        ).fetchone()
+        if row is None: return None
+
+        saved_signal, name, lots, saved_at = row
+        if saved_signal != signal or self._expired(saved_at): return None
+        try:
+            lots = Lots(json.loads(lots))
+        except (ValueError, TypeError):
+            logger.warning(f"Checkpoint lots of {data_id} unreadable, fetching again")
+            return None
+        return CheckpointCard(name=name, lots=lots)
+
+    def save_card(self, *, namespace, data_id, signal, name, lots):
+        """Сохранение лотов карты"""
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO checkpoint_cards (namespace, data_id, signal, name, lots, saved_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    namespace, data_id, signal, name,
+                    json.dumps([[lot.price, lot.lot_id] for lot in lots], ensure_ascii=False), time()
+                )
+            )
+
+    def clear(self, *, namespace):
+        """Удаление точки после успешного сканирования"""
+        with self._connection:
+            pages = self._connection.execute("DELETE FROM checkpoint_pages WHERE namespace = ?", (namespace,)).rowcount
+            cards = self._connection.execute("DELETE FROM checkpoint_cards WHERE namespace = ?", (namespace,)).rowcount
+        if pages or cards:
+            logger.info(f"Scan checkpoint of {namespace} cleared: {pages} pages, {cards} cards")
+
+    def close(self):
+        """Закрытие базы"""
+        self._connection.close()
@@ -0,0 +1,63 @@
+import asyncio
+import logging
+
+from MangabuffParser import MangabuffParser, ScanProgress
+from SharedMarketScan import SharedMarketScan
+
+
+logger = logging.getLogger(__name__)
+
+class ScanManager:
+    """Управление фоновым сканированием торговой площадки
+
+    Одновременно выполняется не больше одного сканирования:
+    запуск во время работающего сканирования присоединяется к нему.
+    """
+    def __init__(self, *, parser: MangabuffParser | SharedMarketScan):
+        self._parser = parser
+        self._task: asyncio.Task | None = None
+        self._progress: ScanProgress | None = None
+
+    @property
+    def running(self) -> bool:
+        """Идёт ли сейчас сканирование"""
+        return self._task is not None and not self._task.done()
+
+    @property
+    def progress(self) -> ScanProgress | None:
+        """Прогресс текущего или последнего сканирования"""
+        return self._progress
+
+    def start(self, *, on_group=None, on_card=None) -> tuple[asyncio.Task, bool]:
+        """Запуск сканирования желаемого в фоне.
+        on_group получает готовые тайтлы, on_card готовые карты,
+        только если сканирование создано этим вызовом.
+        У SharedMarketScan первым аргументом в них приходит ключ аккаунта
+
+        :return:
+            tuple[asyncio.Task[list[CardInfo]], bool]: Задача сканирования и флаг, была ли она создана этим вызовом.
+            SharedMarketScan возвращает карты по ключам аккаунтов
+        """
+        if self.running:
+            logger.info("Scan already running, joining it")
+            return self._task, False
+
+        logger.info("Starting background scan")
+        self._progress = ScanProgress()
+        self._task = asyncio.create_task(
+            self._parser.aget_cards_lots(want=True, progress=self._progress, on_group=on_group, on_card=on_card),
+            name="mangabuff_scan"
+        )
+        return self._task, True
+
+    def cancel(self) -> bool:
+        """Отмена текущего сканирования
+
+        :return:
+            bool: True если было что отменять
+        """
+        if not self.running:
+            return False
+        logger.info("Cancelling background scan")
+        self._task.cancel()
+        return True
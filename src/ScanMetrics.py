@@ -0,0 +1,231 @@
+import logging
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from time import monotonic
+from typing import NamedTuple
+
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+STAGES = ("login", "user_id", "market", "wish_list", "lots")
+
+METRICS_PREFIX = "mangabuff"
+
+logger = logging.getLogger(__name__)
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин в секундах"""
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+
+class StageStats(NamedTuple):
+    requests: int
+    errors: int
+    bytes: int
+    cache_hits: int
+    network_seconds: float
+    parse_seconds: float
+    wait_seconds: float
+
+    def __sub__(self, other):
+        return StageStats(*(value - other_value for value, other_value in zip(self, other)))
+
+
+class ScanMetrics:
+    """Счётчики и гистограммы по этапам парсера
+
+    Этапы: вход, поиск user_id, торговая площадка, список желаемого, лоты.
+    На каждый этап считаются запросы по HTTP статусу, байты ответов,
+    попадания в кэш, время сети, разбора HTML и ожидания в ограничителе частоты.
+    Значения копятся с запуска, для сводки по сканированию
+    запоминается срез на его начало.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = defaultdict(int)
+        self._bytes = defaultdict(int)
+        self._cache_hits = defaultdict(int)
+        self._network = defaultdict(Histogram)
+        self._parse = defaultdict(Histogram)
+        self._wait = defaultdict(Histogram)
+        self._scans = 0
+        self._scan_started = None
+        self._scan_start_stats: dict[str, StageStats] = dict()
+        self._last_scan: dict[str, StageStats] = dict()
+        self._last_scan_duration = None
+
+    def observe_request(self, *, stage, status, size, seconds, wait=0.0):
+        """Запрос к сайту: status код ответа или "error" при сетевой ошибке"""
+        with self._lock:
+            self._requests[(stage, str(status))] += 1
+            self._bytes[stage] += size
+            self._network[stage].observe(seconds)
+            self._wait[stage].observe(wait)
+
+    def observe_cache_hit(self, *, stage):
+        with self._lock:
+            self._cache_hits[stage] += 1
+
+    def observe_parse(self, *, stage, seconds):
+        with self._lock:
+            self._parse[stage].observe(seconds)
+
+    def _stage_stats(self, stage):
+        requests = errors = 0
+        for (request_stage, status), count in self._requests.items():
+            if request_stage != stage: continue
+            requests += count
+            if not status.isdigit() or int(status) >= 400: errors += count
+        return StageStats(
+            requests=requests,
+            errors=errors,
+            bytes=self._bytes.get(stage, 0),
+            cache_hits=self._cache_hits.get(stage, 0),
+            network_seconds=self._network[stage].sum if stage in self._network else 0.0,
+            parse_seconds=self._parse[stage].sum if stage in self._parse else 0.0,
+            wait_seconds=self._wait[stage].sum if stage in self._wait else 0.0
+        )
+
+    def _stages(self):
+        seen = {stage for stage, _ in self._requests} | set(self._parse) | set(self._cache_hits)
+        return [stage for stage in STAGES if stage in seen] + sorted(seen - set(STAGES))
+
+    def totals(self) -> dict[str, StageStats]:
+        """Значения по этапам с запуска"""
+        with self._lock:
+            return {stage: self._stage_stats(stage) for stage in self._stages()}
+
+    def begin_scan(self):
+        """Начало сканирования: срез для сводки"""
+        with self._lock:
+            self._scan_started = monotonic()
+            self._scan_start_stats = {stage: self._stage_stats(stage) for stage in self._stages()}
+
+    def end_scan(self):
+        """Конец сканирования: сводка запоминается как последняя"""
+        if not self.running: return
+        self._last_scan = self.scan()
+        with self._lock:
+            self._last_scan_duration = monotonic() - self._scan_started
+            self._scan_started = None
+            self._scans += 1
+
+    @property
+    def running(self) -> bool:
+        return self._scan_started is not None
+
+    @property
+    def scan_duration(self) -> float | None:
+        """Сколько идёт текущее сканирование, None если не идёт"""
+        started = self._scan_started
+        return monotonic() - started if started is not None else None
+
+    @property
+    def last_scan_duration(self) -> float | None:
+        return self._last_scan_duration
+
+    def scan(self) -> dict[str, StageStats]:
+        """Значения по этапам текущего сканирования, если оно идёт, иначе последнего"""
+        if not self.running: return dict(self._last_scan)
+        with self._lock:
+            result = dict()
+            for stage in self._stages():
+                stats = self._stage_stats(stage)
+                start = self._scan_start_stats.get(stage)
+                stats = stats - start if start is not None else stats
+                if any(stats): result[stage] = stats
+            return result
+
+    def render(self) -> str:
+        """Значения в текстовом формате Prometheus"""
+        lines = list()
+        with self._lock:
+            lines.append(f"# TYPE {METRICS_PREFIX}_requests_total counter")
+            for (stage, status), count in sorted(self._requests.items()):
+                lines.append(f'{METRICS_PREFIX}_requests_total{{stage="{stage}",status="{status}"}} {count}')
+
+            lines.append(f"# TYPE {METRICS_PREFIX}_response_bytes_total counter")
+            for stage, size in sorted(self._bytes.items()):
+                lines.append(f'{METRICS_PREFIX}_response_bytes_total{{stage="{stage}"}} {size}')
+
+            lines.append(f"# TYPE {METRICS_PREFIX}_cache_hits_total counter")
+            for stage, count in sorted(self._cache_hits.items()):
+                lines.append(f'{METRICS_PREFIX}_cache_hits_total{{stage="{stage}"}} {count}')
+
+            for name, histograms in (
+                    ("network_seconds", self._network),
+                    ("parse_seconds", self._parse),
+                    ("rate_limit_wait_seconds", self._wait),
+            ):
+                metric = f"{METRICS_PREFIX}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for stage, histogram in sorted(histograms.items()):
+                    cumulative = 0
+                    for bound, count in zip((*BUCKETS, "+Inf"), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{metric}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{metric}_sum{{stage="{stage}"}} {histogram.sum}')
+                    lines.append(f'{metric}_count{{stage="{stage}"}} {histogram.count}')
+
+            lines.append(f"# TYPE {METRICS_PREFIX}_scans_total counter")
+            lines.append(f"{METRICS_PREFIX}_scans_total {self._scans}")
+            lines.append(f"# TYPE {METRICS_PREFIX}_scan_running gauge")
+            lines.append(f"{METRICS_PREFIX}_scan_running {int(self._scan_started is not None)}")
+            if self._last_scan_duration is not None:
+                lines.append(f"# TYPE {METRICS_PREFIX}_last_scan_duration_seconds gauge")
+                lines.append(f"{METRICS_PREFIX}_last_scan_duration_seconds {self._last_scan_duration}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """HTTP эндпоинт /metrics в фоновом потоке"""
+    def __init__(self, *, metrics: ScanMetrics, host="127.0.0.1", port=9108):
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                content = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._httpd.server_address[:2]
+
+    def start(self):
+        """Запуск в фоновом потоке"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="metrics_server", daemon=True)
+        self._thread.start()
+        host, port = self.address
+        logger.info(f"Metrics endpoint started on http://{host}:{port}/metrics")
+
+    def stop(self):
+        """Остановка сервера"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
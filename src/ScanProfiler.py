@@ -0,0 +1,106 @@
+import cProfile
+import io
+import logging
+import pstats
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+
+TOP_FUNCTIONS = 40
+
+TOP_ALLOCATIONS = 25
+
+TRACEMALLOC_FRAMES = 10
+
+logger = logging.getLogger(__name__)
+
+class ScanProfiler:
+    """Профилирование сканирования по запросу
+
+    Профилируется следующее сканирование после arm() или каждое, если enabled.
+    cProfile собирает время по функциям, tracemalloc пик и места выделения памяти.
+    Результат пишется в path: <время>-scan.prof для pstats/snakeviz
+    и <время>-scan.txt со сводкой. Пока профилирование не запрошено,
+    profile() возвращает пустой контекст.
+    """
+    def __init__(self, *, path: Path, enabled=False):
+        self._path = Path(path)
+        self._enabled = enabled
+        self._armed = False
+        self._active = False
+        self._last_dump: Path | None = None
+
+    @property
+    def armed(self) -> bool:
+        """Будет ли профилировано следующее сканирование"""
+        return self._enabled or self._armed
+
+    @property
+    def last_dump(self) -> Path | None:
+        """Сводка последнего профилирования"""
+        return self._last_dump
+
+    def arm(self):
+        """Профилировать следующее сканирование"""
+        logger.info("Profiling armed for the next scan")
+        self._armed = True
+
+    def profile(self):
+        """Контекст одного сканирования"""
+        if not self.armed or self._active:
+            return nullcontext()
+        self._armed = False
+        return self._profile()
+
+    @contextmanager
+    def _profile(self):
+        self._active = True
+        started = datetime.now()
+        profiler = cProfile.Profile()
+        was_tracing = tracemalloc.is_tracing()
+        if was_tracing:
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        logger.info("Scan profiling started")
+
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            if not was_tracing:
+                tracemalloc.stop()
+            self._active = False
+            try:
+                self._last_dump = self._dump(started, profiler, peak, snapshot)
+            except OSError as e:
+                logger.error(f"Profile dump failed: {e}")
+
+    def _dump(self, started, profiler, peak, snapshot):
+        self._path.mkdir(parents=True, exist_ok=True)
+        name = started.strftime("%Y%m%d-%H%M%S") + "-scan"
+        profiler.dump_stats(self._path / f"{name}.prof")
+
+        report = io.StringIO()
+        report.write(f"Scan started: {started.isoformat(timespec='seconds')}\n")
+        report.write(f"Duration: {(datetime.now() - started).total_seconds():.2f} s\n")
+        report.write(f"Peak traced memory: {peak / 1024 / 1024:.2f} MB\n\n")
+        report.write(f"Top {TOP_FUNCTIONS} functions by cumulative time:\n")
+        pstats.Stats(profiler, stream=report).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+        report.write(f"Top {TOP_ALLOCATIONS} allocations by line:\n")
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+            report.write(f"{stat}\n")
+
+        summary = self._path / f"{name}.txt"
+        summary.write_text(report.getvalue(), encoding="utf-8")
+        logger.info(f"Scan profile written to {summary}, peak memory: {peak / 1024 / 1024:.2f} MB")
+        return summary
@@ -0,0 +1,223 @@
+import json
+import logging
+import sqlite3
+from time import time
+from typing import NamedTuple
+
+
+# Сколько раз единица работы выдаётся снова после ошибки
+MAX_ATTEMPTS = 3
+
+logger = logging.getLogger(__name__)
+
+class WorkUnit(NamedTuple):
+    unit_id: int
+    kind: str
+    payload: dict
+    attempts: int
+
+
+class ScanQueue:
+    """Очередь единиц работы сканирования в SQLite для нескольких процессов
+
+    Координатор открывает сканирование и кладёт единицы работы, процессы
+    сканирования забирают их по одной, пока сканирование открыто, и
+    возвращают результат или ошибку. Выдача атомарна: единица достаётся
+    ровно одному процессу. Единицы упавшего процесса можно вернуть в очередь.
+    Каждый процесс открывает свою очередь на тот же файл.
+    Единицу с владельцем забирает только процесс-владелец.
+    """
+    def __init__(self, *, path):
+        self._connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS scans (
+                scan_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                open INTEGER NOT NULL,
+                started_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS workers (
+                scan_id INTEGER NOT NULL,
+                worker INTEGER NOT NULL,
+                user_id TEXT NOT NULL,
+                PRIMARY KEY (scan_id, worker)
+            );
+            CREATE TABLE IF NOT EXISTS units (
+                unit_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scan_id INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                state TEXT NOT NULL,
+                owner INTEGER,
+                worker INTEGER,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS units_state ON units (scan_id, state);
+        """)
+        logger.info(f"Scan queue opened: {path}")
+
+    def open_scan(self) -> int:
+        """Новое сканирование
+
+        :return:
+            int: ID сканирования
+        """
+        return self._connection.execute("INSERT INTO scans (open, started_at) VALUES (1, ?)", (time(),)).lastrowid
+
+    def close_scan(self, scan_id):
+        """Закрытие сканирования: процессы выходят, единицы работы удаляются"""
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._connection.execute("UPDATE scans SET open = 0 WHERE scan_id = ?", (scan_id,))
+            self._connection.execute("DELETE FROM units WHERE scan_id = ?", (scan_id,))
+            self._connection.execute("DELETE FROM workers WHERE scan_id = ?", (scan_id,))
+            self._connection.execute("COMMIT")
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+
+    def is_open(self, scan_id) -> bool:
+        row = self._connection.execute("SELECT open FROM scans WHERE scan_id = ?", (scan_id,)).fetchone()
+        return row is not None and bool(row[0])
+
+    def register(self, scan_id, worker, user_id):
+        """Процесс вошёл на сайт под пользователем user_id"""
+        self._connection.execute(
+            "INSERT OR REPLACE INTO workers (scan_id, worker, user_id) VALUES (?, ?, ?)",
+            (scan_id, worker, user_id)
+        )
+
+    def workers(self, scan_id) -> dict[int, str]:
+        """Вошедшие процессы: номер процесса и user_id"""
+        return dict(self._connection.execute("SELECT worker, user_id FROM workers WHERE scan_id = ?", (scan_id,)))
+
+    def put(self, scan_id, kind, payloads, *, owner=None) -> list[int]:
+        """Новые единицы работы одного вида, с owner их заберёт только этот процесс
+
+        :return:
+            list[int]: ID единиц работы в порядке payloads
+        """
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            unit_ids = [
+                self._connection.execute(
+                    "INSERT INTO units (scan_id, kind, payload, state, owner) VALUES (?, ?, ?, 'pending', ?)",
+                    (scan_id, kind, json.dumps(payload, ensure_ascii=False), owner)
+                ).lastrowid for payload in payloads
+            ]
+            self._connection.execute("COMMIT")
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        return unit_ids
+
+    def take(self, scan_id, worker) -> WorkUnit | None:
+        """Следующая единица работы для процесса worker, None если очередь пуста"""
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._connection.execute(
+                "SELECT unit_id, kind, payload, attempts FROM units "
+                "WHERE scan_id = ? AND state = 'pending' AND (owner IS NULL OR owner = ?) ORDER BY unit_id LIMIT 1",
+                (scan_id, worker)
+            ).fetchone()
+            if row is not None:
+                self._connection.execute(
+                    "UPDATE units SET state = 'taken', worker = ?, attempts = attempts + 1 WHERE unit_id = ?",
+                    (worker, row[0])
+                )
+            self._connection.execute("COMMIT")
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        if row is None: return None
+        unit_id, kind, payload, attempts = row
+        return WorkUnit(unit_id=unit_id, kind=kind, payload=json.loads(payload), attempts=attempts + 1)
+
+    def complete(self, unit_id, result):
+        """Результат единицы работы"""
+        self._connection.execute(
+            "UPDATE units SET state = 'done', result = ? WHERE unit_id = ?",
+            (json.dumps(result, ensure_ascii=False), unit_id)
+        )
+
+    def fail(self, unit_id, error, *, max_attempts=MAX_ATTEMPTS) -> bool:
+        """Ошибка единицы работы. Пока попытки не исчерпаны, единица возвращается в очередь
+
+        :return:
+            bool: Вернулась ли единица в очередь
+        """
+        self._connection.execute(
+            "UPDATE units SET state = CASE WHEN attempts < ? THEN 'pending' ELSE 'failed' END, "
+            "error = ?, worker = NULL WHERE unit_id = ?",
+            (max_attempts, error, unit_id)
+        )
+        row = self._connection.execute("SELECT state FROM units WHERE unit_id = ?", (unit_id,)).fetchone()
+        # Сканирование уже закрыто, единицы нет
+        if row is None: return False
+        state, = row
+        logger.warning(f"Work unit {unit_id} failed: {error}, {'retrying' if state == 'pending' else 'giving up'}")
+        return state == "pending"
+
+    def release(self, scan_id, worker) -> int:
+        """Возврат в очередь единиц, взятых процессом worker, например после его падения
+
+        :return:
+            int: Число возвращённых единиц
+        """
+        return self._connection.execute(
+            "UPDATE units SET state = 'pending', worker = NULL WHERE scan_id = ? AND worker = ? AND state = 'taken'",
+            (scan_id, worker)
+        ).rowcount
+
+    def owned(self, scan_id, worker) -> int:
+        """Число невыполненных единиц, которые может забрать только процесс worker"""
+        return self._connection.execute(
+            "SELECT count(*) FROM units WHERE scan_id = ? AND owner = ? AND state IN ('pending', 'taken')",
+            (scan_id, worker)
+        ).fetchone()[0]
+
+    def counts(self, scan_id) -> dict[str, int]:
+        """Число единиц работы по состояниям: pending, taken, done, failed"""
+        counts = dict.fromkeys(("pending", "taken", "done", "failed"), 0)
+        counts.update(self._connection.execute(
+            "SELECT state, count(*) FROM units WHERE scan_id = ? GROUP BY state",
+            (scan_id,)
+        ))
+        return counts
+
+    def done_by_worker(self, scan_id) -> dict[int, int]:
+        """Число выполненных единиц работы по процессам"""
+        return dict(self._connection.execute(
+            "SELECT worker, count(*) FROM units WHERE scan_id = ? AND state = 'done' GROUP BY worker",
+            (scan_id,)
+        ))
+
+    def result(self, unit_id) -> dict | None:
+        """Результат единицы работы, None пока она не выполнена"""
+        row = self._connection.execute(
+            "SELECT result FROM units WHERE unit_id = ? AND state = 'done'",
+            (unit_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def results(self, scan_id, kind) -> list[dict]:
+        """Результаты выполненных единиц работы вида kind"""
+        return [
+            json.loads(result) for result, in self._connection.execute(
+                "SELECT result FROM units WHERE scan_id = ? AND kind = ? AND state = 'done' ORDER BY unit_id",
+                (scan_id, kind)
+            )
+        ]
+
+    def errors(self, scan_id) -> list[str]:
+        """Ошибки единиц работы, от которых отказались"""
+        return [error for error, in self._connection.execute(
+            "SELECT error FROM units WHERE scan_id = ? AND state = 'failed' ORDER BY unit_id",
+            (scan_id,)
+        )]
+
+    def close(self):
+        """Закрытие базы"""
+        self._connection.close()
@@ -0,0 +1,73 @@
+import json
+import logging
+import os
+import sqlite3
+from time import time
+from typing import NamedTuple
+
+
+logger = logging.getLogger(__name__)
+
+class StoredSession(NamedTuple):
+    user_id: str
+    cookies: list[dict]
+    saved_at: float
+
+
+class SessionStore:
+    """Сессии mangabuff.ru в SQLite: cookies и user_id по адресу сайта и почте
+
+    Позволяет при запуске не входить заново, если сохранённая сессия
+    ещё действует. В базе лежат cookies входа, поэтому файл доступен
+    только владельцу.
+    """
+    def __init__(self, *, path):
+        if str(path) != ":memory:":
+            # Файл создаётся сразу с правами владельца, до подключения, а не после
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o600))
+                os.chmod(path, 0o600)
+            except OSError as e:
+                logger.warning(f"Session store permissions not changed: {e}")
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                base_url TEXT NOT NULL,
+                mail TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                cookies TEXT NOT NULL,
+                saved_at REAL NOT NULL,
+                PRIMARY KEY (base_url, mail)
+            );
+        """)
+        logger.info(f"Session store opened: {path}")
+
+    def load(self, *, base_url, mail) -> StoredSession | None:
+        """Сохранённая сессия, None если её нет"""
+        row = self._connection.execute(
+            "SELECT user_id, cookies, saved_at FROM sessions WHERE base_url = ? AND mail = ?",
+            (base_url, mail)
+        ).fetchone()
+        if row is None:
+            logger.info(f"No stored session for {mail}")
+            return None
+        user_id, cookies, saved_at = row
+        return StoredSession(user_id=user_id, cookies=json.loads(cookies), saved_at=saved_at)
+
+    def save(self, *, base_url, mail, user_id, cookies):
+        """Сохранение сессии. cookies - список словарей name, value, domain, path, expires, secure"""
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO sessions (base_url, mail, user_id, cookies, saved_at) VALUES (?, ?, ?, ?, ?)",
+                (base_url, mail, user_id, json.dumps(list(cookies)), time())
+            )
+        logger.info(f"Session of {mail} saved")
+
+    def delete(self, *, base_url, mail):
+        """Удаление сессии, например когда она больше не действует"""
+        with self._connection:
+            self._connection.execute("DELETE FROM sessions WHERE base_url = ? AND mail = ?", (base_url, mail))
+
+    def close(self):
+        """Закрытие базы"""
+        self._connection.close()
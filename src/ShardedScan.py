@@ -0,0 +1,314 @@
+import asyncio
+import logging
+import multiprocessing
+from math import ceil
+from time import sleep, monotonic
+
+from MangabuffParser import MangabuffParser, ScanProgress, CardInfo, CardIndex, CardRank, MANGABUFF_URL
+from ScanQueue import ScanQueue, MAX_ATTEMPTS
+from SessionStore import SessionStore
+
+
+# Рангов в одной единице обхода списков
+RANKS_PER_UNIT = 2
+
+# Карт в одной единице загрузки лотов, не больше
+LOTS_PER_UNIT = 20
+
+POLL_INTERVAL = 0.05
+
+# Сколько ждать входа процесса с аккаунтом, чей список желаемого сканируется
+LOGIN_TIMEOUT = 120.0
+
+WORKER_JOIN_TIMEOUT = 10.0
+
+logger = logging.getLogger(__name__)
+
+class ShardedScanError(Exception):
+    pass
+
+
+def _dump_card(card):
+    return [card.data_id, card.rank.value, card.name, card.manga_name, card.market_signal,
+            [[lot.price, lot.lot_id] for lot in card.lots]]
+
+
+def _load_card(record):
+    data_id, rank, name, manga_name, market_signal, lots = record
+    return CardInfo(
+        data_id=data_id,
+        rank=CardRank(rank),
+        name=name,
+        manga_name=manga_name,
+        market_signal=market_signal,
+        lots=lots
+    )
+
+
+async def _execute(parser, unit):
+    """Выполнение единицы работы сессией parser
+
+    :return:
+        dict: Карты единицы и число запросов
+    """
+    progress = ScanProgress()
+    payload = unit.payload
+    ranks = [CardRank(rank) for rank in payload.get("ranks", ())]
+    if unit.kind == "market":
+        cards = await parser.aget_market(
+            progress=progress,
+            rank=ranks,
+            query=payload["query"],
+            want=payload.get("want", False)
+        )
+    elif unit.kind == "wish_list":
+        cards = await parser.aget_wish_list(progress=progress, user_id=payload["user_id"], rank=ranks)
+    elif unit.kind == "lots":
+        cards = await parser.aget_lots([_load_card(record) for record in payload["cards"]], progress=progress)
+    else:
+        raise ValueError(f"Неизвестный вид работы {unit.kind}")
+    return {"cards": [_dump_card(card) for card in cards], "requests": progress.requests}
+
+
+def run_worker(*, queue_path, scan_id, worker, mail, password, options, session_store_path=None, initializer=None):
+    """Процесс сканирования: вход своим аккаунтом, затем единицы работы из очереди, пока сканирование открыто"""
+    if initializer is not None: initializer()
+
+    queue = ScanQueue(path=queue_path)
+    session_store = SessionStore(path=session_store_path) if session_store_path is not None else None
+    try:
+        parser = MangabuffParser(mail=mail, password=password, session_store=session_store, **options)
+        queue.register(scan_id, worker, parser.user_id)
+        logger.info(f"Worker {worker} logged in as {parser.user_id}")
+
+        while queue.is_open(scan_id):
+            unit = queue.take(scan_id, worker)
+            if unit is None:
+                sleep(POLL_INTERVAL)
+                continue
+            try:
+                result = asyncio.run(_execute(parser, unit))
+            except Exception as e:
+                queue.fail(unit.unit_id, f"{type(e).__name__}: {e}", max_attempts=MAX_ATTEMPTS)
+            else:
+                queue.complete(unit.unit_id, result)
+    finally:
+        queue.close()
+        if session_store is not None: session_store.close()
+
+
+class ShardedScan:
+    """Сканирование несколькими процессами, у каждого свой аккаунт, сессия и ограничитель частоты
+
+    Сканирование делится на единицы работы: обход торговой площадки и списка
+    желаемого по диапазонам рангов, затем загрузка лотов пачками карт.
+    Процессы забирают единицы из общей очереди ScanQueue в SQLite, так что
+    более быстрый процесс берёт больше работы. Результаты собираются в тот же
+    список, что вернул бы MangabuffParser.get_cards_lots.
+
+    Вкладка «хочу» (market?want=1) видна только своему аккаунту, поэтому её
+    целиком обходит процесс первого аккаунта, а список желаемого в это время
+    любой другой. Запросов столько же, сколько у MangabuffParser, параллельно
+    загружаются лоты. Единица работы, завершившаяся ошибкой, выдаётся снова
+    до MAX_ATTEMPTS раз, единицы упавшего процесса возвращаются в очередь.
+    """
+    def __init__(
+            self,
+            *,
+            accounts,
+            queue_path,
+            base_url=MANGABUFF_URL,
+            session_store_path=None,
+            initializer=None,
+            **options
+    ):
+        if not isinstance(accounts, list|tuple):
+            raise TypeError("accounts должен быть списком пар почта, пароль")
+        if not accounts:
+            raise ValueError("Нужен хотя бы один аккаунт")
+
+        self._accounts = [tuple(account) for account in accounts]
+        self._queue_path = queue_path
+        self._session_store_path = session_store_path
+        self._initializer = initializer
+        # Параметры MangabuffParser для процессов, только то, что передаётся между процессами
+        self._options = {"base_url": base_url, **options}
+        self._context = multiprocessing.get_context("spawn")
+        self._last_scan_requests = 0
+        self._last_scan_units = dict()
+        logger.info(f"Sharded scan with {len(self._accounts)} workers")
+
+    @property
+    def workers(self) -> int:
+        return len(self._accounts)
+
+    @property
+    def last_scan_requests(self) -> int:
+        """Число запросов последнего сканирования по всем процессам, без входа"""
+        return self._last_scan_requests
+
+    @property
+    def last_scan_units(self) -> dict[int, int]:
+        """Число выполненных единиц работы последнего сканирования по процессам"""
+        return dict(self._last_scan_units)
+
+    def _start_workers(self, scan_id):
+        processes = dict()
+        for worker, (mail, password) in enumerate(self._accounts):
+            process = self._context.Process(
+                target=run_worker,
+                kwargs={
+                    "queue_path": str(self._queue_path),
+                    "scan_id": scan_id,
+                    "worker": worker,
+                    "mail": mail,
+                    "password": password,
+                    "options": self._options,
+                    "session_store_path": str(self._session_store_path) if self._session_store_path else None,
+                    "initializer": self._initializer
+                },
+                name=f"scan-worker-{worker}",
+                daemon=True
+            )
+            process.start()
+            processes[worker] = process
+        return processes
+
+    @staticmethod
+    def _check_workers(queue, scan_id, processes):
+        """Возврат в очередь работы упавших процессов, ошибка если не осталось ни одного
+        или упавший процесс владел работой, которую другие аккаунты не выполнят"""
+        for worker, process in processes.items():
+            if not process.is_alive():
+                released = queue.release(scan_id, worker)
+                if released:
+                    logger.warning(f"Worker {worker} exited with {process.exitcode}, {released} units released")
+                if queue.owned(scan_id, worker):
+                    raise ShardedScanError(f"Процесс {worker} завершился, его работу не выполнит другой аккаунт")
+        if not any(process.is_alive() for process in processes.values()):
+            raise ShardedScanError("Все процессы сканирования завершились, проверьте почту и пароли аккаунтов")
+
+    @staticmethod
+    def _check_failed(queue, scan_id):
+        if queue.counts(scan_id)["failed"]:
+            raise ShardedScanError(f"Сканирование не удалось: {'; '.join(queue.errors(scan_id))}")
+
+    def _wait_user_id(self, queue, scan_id, processes):
+        """user_id первого аккаунта, чей список желаемого сканируется"""
+        deadline = monotonic() + LOGIN_TIMEOUT
+        while (user_id := queue.workers(scan_id).get(0)) is None:
+            if not processes[0].is_alive():
+                raise ShardedScanError("Первый аккаунт не вошёл на сайт, список желаемого недоступен")
+            if monotonic() > deadline:
+                raise ShardedScanError("Первый аккаунт не вошёл на сайт за отведённое время")
+            sleep(POLL_INTERVAL)
+        return user_id
+
+    @staticmethod
+    def _rank_units(rank):
+        ranks = [rank] if rank is not None else list(CardRank)
+        return [
+            [current_rank.value for current_rank in ranks[start:start + RANKS_PER_UNIT]]
+            for start in range(0, len(ranks), RANKS_PER_UNIT)
+        ]
+
+    @staticmethod
+    def _cards(result):
+        return CardIndex(_load_card(record) for record in result["cards"])
+
+    def _put_lots(self, queue, scan_id, cards, workers):
+        """Пачки загрузки лотов по порядку тайтлов, как у MangabuffParser"""
+        cards = sorted(cards, key=lambda card: card.manga_name)
+        batch = max(1, min(LOTS_PER_UNIT, ceil(len(cards) / workers)))
+        return queue.put(scan_id, "lots", (
+            {"cards": [_dump_card(card) for card in cards[start:start + batch]]}
+            for start in range(0, len(cards), batch)
+        ))
+
+    def get_cards_lots(self, *, query=None, want=False, rank=None) -> list[CardInfo]:
+        """Карты с лотами, как MangabuffParser.get_cards_lots, несколькими процессами"""
+        logger.info(f"Sharded get_cards_lots called with query: {query}, want: {want}, rank: {rank}")
+        if query:
+            if not isinstance(query, str):
+                raise TypeError("Запрос должен быть строкой")
+            query = query.strip().lower()
+        if not isinstance(want, bool):
+            raise TypeError("Флаг want должен быть только True или False")
+        if not query and not want:
+            raise ValueError("Нет возможности парсить основную страниуц торговой площадки")
+        if not isinstance(rank, CardRank|None):
+            raise TypeError("rank должен быть CardRank типом")
+
+        self._last_scan_requests = 0
+        self._last_scan_units = dict()
+        queue = ScanQueue(path=self._queue_path)
+        scan_id = queue.open_scan()
+        processes = self._start_workers(scan_id)
+        try:
+            if want:
+                # Вкладку «хочу» видит только первый аккаунт: она обходится одной единицей его процесса,
+                # без деления по рангам, как у MangabuffParser, а список желаемого берёт любой процесс
+                ranks = [current_rank.value for current_rank in ([rank] if rank is not None else CardRank)]
+                market_units = queue.put(scan_id, "market", [{"ranks": ranks, "query": query, "want": True}], owner=0)
+                user_id = self._wait_user_id(queue, scan_id, processes)
+                wish_units = queue.put(scan_id, "wish_list", [{"ranks": ranks, "user_id": user_id}])
+            else:
+                rank_units = self._rank_units(rank)
+                market_units = queue.put(scan_id, "market", ({"ranks": ranks, "query": query} for ranks in rank_units))
+                wish_units = [None] * len(rank_units)
+
+            # Ранг карты не меняется, поэтому диапазон рангов, у которого готовы
+            # торговая площадка и желаемое, сразу отдаёт лоты своих карт, не дожидаясь остальных
+            lists = dict(zip(market_units, wish_units))
+            lots_units = list()
+            cards = list()
+            while True:
+                self._check_failed(queue, scan_id)
+                for market_unit, wish_unit in list(lists.items()):
+                    market = queue.result(market_unit)
+                    wish_list = queue.result(wish_unit) if wish_unit is not None else None
+                    if market is None or (wish_unit is not None and wish_list is None): continue
+                    del lists[market_unit]
+
+                    range_cards = self._cards(market)
+                    if want:
+                        range_cards = self._cards(wish_list).join(range_cards)
+                    elif query:
+                        for card in range_cards:
+                            card.manga_name = query
+                    cards.extend(range_cards)
+                    lots_units.extend(self._put_lots(queue, scan_id, range_cards, len(processes)))
+
+                counts = queue.counts(scan_id)
+                if not lists and not counts["pending"] and not counts["taken"]: break
+                self._check_workers(queue, scan_id, processes)
+                sleep(POLL_INTERVAL)
+            self._check_failed(queue, scan_id)
+
+            lots = CardIndex()
+            for unit in lots_units:
+                for card in self._cards(queue.result(unit)):
+                    lots.add(card)
+            for card in cards:
+                loaded = lots.get(card.data_id)
+                if loaded is not None:
+                    card.name = loaded.name or card.name
+                    card.lots = loaded.lots
+            cards.sort(key=lambda card: card.manga_name)
+
+            self._last_scan_requests = sum(
+                result["requests"] for kind in ("market", "wish_list", "lots") for result in queue.results(scan_id, kind)
+            )
+            self._last_scan_units = queue.done_by_worker(scan_id)
+            logger.info(
+                f"Sharded scan finished: {len(cards)} cards, {self._last_scan_requests} requests, "
+                f"units by worker: {self._last_scan_units}"
+            )
+            return cards
+        finally:
+            queue.close_scan(scan_id)
+            queue.close()
+            for process in processes.values():
+                process.join(WORKER_JOIN_TIMEOUT)
+                if process.is_alive():
+                    process.terminate()
@@ -0,0 +1,125 @@
+import logging
+from collections import defaultdict
+from contextlib import nullcontext
+
+from MangabuffParser import MangabuffParser, ScanProgress, CardInfo, CardIndex
+
+
+logger = logging.getLogger(__name__)
+
+class SharedMarketScan:
+    """Сканирование желаемого нескольких аккаунтов с общей загрузкой лотов
+
+    Каждый аккаунт своей сессией загружает вкладку «хочу» торговой площадки
+    (market?want=1) и список желаемого, а страницы лотов загружаются
+    один раз сессией первого аккаунта. Так обход торговой площадки растёт
+    с числом желаемых карт, а не с её размером, а страниц лотов столько,
+    сколько разных карт, а не сумма по пользователям.
+    С одним аккаунтом сканирование идёт как раньше, через aget_cards_lots.
+    """
+    def __init__(self, *, accounts: dict[str, MangabuffParser]):
+        if not isinstance(accounts, dict):
+            raise TypeError("accounts должен быть словарём")
+        if not accounts:
+            raise ValueError("Нужен хотя бы один аккаунт")
+
+        self._accounts = dict(accounts)
+        self._crawler = next(iter(self._accounts.values()))
+        self._last_scan_requests = 0
+        logger.info(f"Shared market scan for {len(self._accounts)} accounts")
+
+    @property
+    def crawler(self) -> MangabuffParser:
+        """Аккаунт, сессией которого загружаются общие страницы"""
+        return self._crawler
+
+    @property
+    def accounts(self) -> list[str]:
+        return list(self._accounts)
+
+    @property
+    def last_scan_requests(self) -> int:
+        """Число запросов последнего сканирования по всем аккаунтам"""
+        return self._last_scan_requests
+
+    async def aget_cards_lots(self, *, want=True, progress=None, on_group=None, on_card=None) -> dict[str, list[CardInfo]]:
+        """Желаемое с лотами по каждому аккаунту.
+        on_group и on_card вызываются с ключом аккаунта первым аргументом
+
+        :return:
+            dict[str, list[CardInfo]]: Карты каждого аккаунта
+        """
+        if want is not True:
+            raise ValueError("Общее сканирование только по списку желаемого")
+        progress = progress if progress is not None else ScanProgress()
+
+        if len(self._accounts) == 1:
+            key, parser = next(iter(self._accounts.items()))
+            cards = await parser.aget_cards_lots(
+                want=True,
+                progress=progress,
+                on_group=(lambda cards: on_group(key, cards)) if on_group is not None else None,
+                on_card=(lambda card: on_card(key, card)) if on_card is not None else None
+            )
+            self._last_scan_requests = progress.requests
+            return {key: cards}
+
+        profiler = self._crawler.profiler
+        metrics = self._crawler.metrics
+        with profiler.profile() if profiler is not None else nullcontext():
+            metrics.begin_scan()
+            try:
+                result = await self._scan(progress, on_group, on_card)
+                for parser in self._accounts.values():
+                    parser.clear_checkpoint()
+                return result
+            finally:
+                metrics.end_scan()
+                self._last_scan_requests = progress.requests
+                logger.info(f"Shared scan finished, requests: {progress.requests}")
+
+    async def _scan(self, progress, on_group, on_card):
+        # Вкладка «хочу» уже отфильтрована по желаемому аккаунта, вся торговая площадка не нужна
+        wanted = dict()
+        for key, parser in self._accounts.items():
+            market = await parser.aget_market(progress=progress, want=True)
+            if not market:
+                wanted[key] = []
+                continue
+            wanted[key] = list((await parser.aget_wish_list(progress=progress)).join(market))
+
+        # Лоты каждой карты загружаются один раз, результат раздаётся всем, кто её хочет
+        distinct = CardIndex()
+        owners = defaultdict(list)
+        groups = {key: defaultdict(list) for key in self._accounts}
+        for key, cards in wanted.items():
+            for card in cards:
+                owners[card.data_id].append((key, card))
+                groups[key][card.manga_name].append(card)
+                if card.data_id not in distinct:
+                    distinct.add(CardInfo(
+                        data_id=card.data_id,
+                        rank=card.rank,
+                        name=card.name,
+                        manga_name=card.manga_name,
+                        market_signal=card.market_signal
+                    ))
+        remaining = {key: {manga_name: len(cards) for manga_name, cards in account_groups.items()}
+                     for key, account_groups in groups.items()}
+        logger.info(
+            f"Shared scan: {sum(len(cards) for cards in wanted.values())} wanted cards, "
+            f"{len(distinct)} distinct"
+        )
+
+        def card_done(card):
+            for key, own_card in owners[card.data_id]:
+                own_card.name = card.name
+                own_card.lots = card.lots
+                if on_card is not None:
+                    on_card(key, own_card)
+                remaining[key][own_card.manga_name] -= 1
+                if remaining[key][own_card.manga_name] == 0 and on_group is not None:
+                    on_group(key, groups[key][own_card.manga_name])
+
+        await self._crawler.aget_lots(distinct, progress=progress, on_card=card_done)
+        return wanted
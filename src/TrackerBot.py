@@ -1,15 +1,36 @@
-from datetime import time
+import asyncio
+from dataclasses import dataclass
+from datetime import time, datetime, timedelta
 import logging
 
 from telegram import Update
-from telegram.ext import ApplicationBuilder, Application, CallbackContext, CommandHandler
+from telegram.ext import ApplicationBuilder, Application, CallbackContext, CommandHandler, filters
+from telegram.error import BadRequest, TelegramError
 
 from resources.messages import *
-from MangabuffParser import MangabuffParser
+from MangabuffParser import MangabuffParser, CardInfo, CardIndex, CardRank
+from MarketDelta import MarketDelta
+from MarketSnapshotStore import MarketSnapshotStore
+from MessageChunker import MessageChunker, split_text
+from PriceAlerts import PriceAlerts, AlertRule
+from PriceHistoryStore import PriceHistoryStore
+from ScanManager import ScanManager
+from SharedMarketScan import SharedMarketScan
 
 
+HISTORY_DEFAULT_DAYS = 30
+
 logger = logging.getLogger(__name__)
 
+@dataclass
+class ChatAccount:
+    """Аккаунт mangabuff.ru и чат, куда приходят его отчёты и оповещения"""
+    chat_id: str
+    parser: MangabuffParser
+    market_snapshots: MarketSnapshotStore | None = None
+    price_alerts: PriceAlerts | None = None
+
+
 class TrackerBot:
     """Класс для инициации Telegram бота"""
     def __init__(
@@ -18,18 +39,44 @@ class TrackerBot:
             token: str,
             chat_id: str,
             parser: MangabuffParser,
-            timestamps: list[time]
+            timestamps: list[time],
+            market_snapshots: MarketSnapshotStore | None = None,
+            price_history: PriceHistoryStore | None = None,
+            price_alerts: PriceAlerts | None = None,
+            accounts: list[ChatAccount] = ()
     ):
+        """accounts - ещё аккаунты со своими чатами. Сканирование для всех общее:
+        каждый аккаунт загружает свою вкладку «хочу», лоты загружаются один раз сессией parser"""
         self._chat_id = chat_id
         self._parser = parser
         self._timestamps = timestamps
+        self._price_history = price_history
+        self._accounts = {
+            str(account.chat_id): account for account in (
+                ChatAccount(chat_id=chat_id, parser=parser, market_snapshots=market_snapshots, price_alerts=price_alerts),
+                *accounts
+            )
+        }
+        self._shared_scan = SharedMarketScan(accounts={key: account.parser for key, account in self._accounts.items()})
+        self._scans = ScanManager(parser=self._shared_scan)
 
         self._app = ApplicationBuilder()\
             .token(token)\
             .post_init(self._post_init_bot())\
             .build()
 
+        chat_filter = filters.Chat(chat_id=[int(key) for key in self._accounts])
+
         self._app.add_handler(CommandHandler("start", self._start))
+        self._app.add_handler(CommandHandler("scan", self._scan, filters=chat_filter))
+        self._app.add_handler(CommandHandler("progress", self._progress, filters=chat_filter))
+        self._app.add_handler(CommandHandler("cancel", self._cancel, filters=chat_filter))
+        self._app.add_handler(CommandHandler("history", self._history, filters=chat_filter))
+        self._app.add_handler(CommandHandler("alert", self._alert, filters=chat_filter))
+        self._app.add_handler(CommandHandler("alerts", self._alerts, filters=chat_filter))
+        self._app.add_handler(CommandHandler("unalert", self._unalert, filters=chat_filter))
+        self._app.add_handler(CommandHandler("stats", self._stats, filters=chat_filter))
+        self._app.add_handler(CommandHandler("profile", self._profile, filters=chat_filter))
 
         logger.info("Bot created")
 
@@ -39,18 +86,132 @@ class TrackerBot:
         Асинхронная функция для планировщика задач
         """
         async def callback(context: CallbackContext):
+            queues = {key: asyncio.Queue() for key in self._accounts}
+            alerts = set()
+            task, created = self._scans.start(
+                on_group=lambda key, cards: queues[key].put_nowait(cards),
+                on_card=self._alert_sender(context, alerts)
+            )
+            if not created:
+                logger.info("Scan already running, result will be sent by its owner")
+                return
+
+            def finished(_):
+                for queue in queues.values():
+                    queue.put_nowait(None)
+            task.add_done_callback(finished)
+
             logger.info("Started parsing for message")
-            try:
-                await context.bot.send_message(
-                    chat_id=self._chat_id,
-                    text=self._parser.get_want_market_formatted(),
-                    parse_mode="Markdown"
-                )
-            except Exception as e:
-                logger.error(e)
+            await asyncio.gather(*(
+                self._report(context, account, queues[key], task) for key, account in self._accounts.items()
+            ))
+            if alerts:
+                await asyncio.gather(*alerts)
             logger.info("Finished parsing for message")
         return callback
 
+    async def _report(self, context: CallbackContext, account: ChatAccount, groups: asyncio.Queue, task: asyncio.Task):
+        """Отправка отчёта одного аккаунта в его чат по мере готовности тайтлов"""
+        previous = account.market_snapshots.load() if account.market_snapshots is not None else None
+        previous = CardIndex(previous) if previous is not None else None
+        chunker = MessageChunker()
+        sent = 0
+        attempted = 0
+
+        try:
+            # Тайтлы отправляются по мере готовности, пока сканирование продолжается
+            while (cards := await groups.get()) is not None:
+                ready = chunker.add(self._group_report(cards, previous))
+                if groups.empty(): ready.extend(chunker.flush())
+                for text in ready:
+                    attempted += 1
+                    sent += await self._send(context, account.chat_id, text)
+
+            cards = (await task)[str(account.chat_id)]
+            if previous is not None:
+                chunker.add(self._removed_report(cards, previous))
+            ready = chunker.flush()
+            if not ready and not sent and previous is not None:
+                ready = [NO_CHANGES_MESSAGE]
+            for text in ready:
+                attempted += 1
+                sent += await self._send(context, account.chat_id, text)
+
+            logger.info(f"Scan report for chat {account.chat_id} sent in {sent} of {attempted} messages")
+            if account.market_snapshots is None: return
+            # Снимок - база следующего отчёта: изменения из недоставленных сообщений иначе потеряются
+            if sent < attempted:
+                logger.warning(f"Market snapshot for chat {account.chat_id} not saved, report not fully delivered")
+                return
+            account.market_snapshots.save(cards)
+        except asyncio.CancelledError:
+            logger.info("Scan cancelled")
+            if not task.cancelled(): raise
+        except Exception as e:
+            logger.error(e)
+
+    def _alert_sender(self, context: CallbackContext, pending: set):
+        """on_card для сканирования: сработавшие правила отправляются сразу, не дожидаясь отчёта
+
+        :return:
+            Функция, принимающая ключ аккаунта и готовую карту
+        """
+        def on_card(key, card):
+            account = self._accounts[key]
+            if account.price_alerts is None: return
+            for rule in account.price_alerts.check(card):
+                logger.info(f"Alert rule {rule.rule_id} triggered by {card.data_id}")
+                text = ALERT_TRIGGERED_MESSAGE.format(
+                    rule_id=rule.rule_id,
+                    name=card.name,
+                    manga_name=card.manga_name,
+                    rank=card.rank.value.capitalize(),
+                    price=card.lots.min_price,
+                    below=rule.below
+                )
+                task = asyncio.create_task(self._send(context, account.chat_id, text))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        return on_card
+
+    async def _send(self, context: CallbackContext, chat_id, text):
+        """Отправка одного сообщения. Если Telegram не разобрал разметку, текст отправляется без неё
+
+        :return:
+            int: 1 если сообщение отправлено, иначе 0
+        """
+        try:
+            await context.bot.send_message(chat_id=chat_id, text=text, parse_mode="Markdown")
+        except BadRequest as e:
+            logger.warning(f"Markdown rejected, sending plain text: {e}")
+            try:
+                await context.bot.send_message(chat_id=chat_id, text=text)
+            except TelegramError as plain_error:
+                logger.error(plain_error)
+                return 0
+        except TelegramError as e:
+            logger.error(e)
+            return 0
+        return 1
+
+    def _account(self, update: Update) -> ChatAccount:
+        """Аккаунт чата, из которого пришла команда"""
+        return self._accounts[str(update.effective_chat.id)]
+
+    @staticmethod
+    def _group_report(cards, previous):
+        """Текст по готовому тайтлу: изменения с прошлого отправленного снимка,
+        полный список если снимка нет"""
+        if previous is None:
+            return CardInfo.out_list(list(cards))
+        return MarketDelta.compute([previous.get(card.data_id) for card in cards if card in previous], cards).out_list()
+
+    @staticmethod
+    def _removed_report(cards, previous):
+        """Текст по картам прошлого снимка, которых больше нет в выдаче"""
+        current = CardIndex(cards)
+        return MarketDelta.compute([card for card in previous if card not in current], []).out_list()
+
     def _post_init_bot(self):
         """post_init функция для Telegram бота
         :return:
@@ -75,7 +236,199 @@ class TrackerBot:
         logger.debug(f"Received start command: {user.first_name}, id: {user.id}")
         await update.message.reply_text(START_MESSAGE)
 
+    async def _scan(self, update: Update, context: CallbackContext):
+        """Обработчик команды /scan, ручной запуск сканирования"""
+        logger.debug(f"Received scan command from {update.effective_user.id}")
+        if self._scans.running:
+            await update.message.reply_text(SCAN_JOINED_MESSAGE)
+            return
+
+        context.job_queue.run_once(
+            callback=self._message(),
+            when=0,
+            name="manual_message_job",
+            chat_id=int(self._chat_id)
+        )
+        await update.message.reply_text(SCAN_STARTED_MESSAGE)
+
+    async def _profile(self, update: Update, context: CallbackContext):
+        """Обработчик команды /profile, сканирование с профилированием"""
+        profiler = self._parser.profiler
+        if profiler is None:
+            await update.message.reply_text(PROFILE_UNAVAILABLE_MESSAGE)
+            return
+
+        profiler.arm()
+        if self._scans.running:
+            await update.message.reply_text(PROFILE_ARMED_MESSAGE)
+            return
+
+        context.job_queue.run_once(
+            callback=self._message(),
+            when=0,
+            name="profiled_message_job",
+            chat_id=int(self._chat_id)
+        )
+        await update.message.reply_text(PROFILE_STARTED_MESSAGE)
+
+    async def _progress(self, update: Update, _):
+        """Обработчик команды /progress"""
+        progress = self._scans.progress
+        if not self._scans.running or progress is None:
+            await update.message.reply_text(SCAN_IDLE_MESSAGE)
+            return
+
+        await update.message.reply_text(SCAN_PROGRESS_MESSAGE.format(
+            stage=SCAN_STAGES.get(progress.stage, progress.stage),
+            requests=progress.requests,
+            cards_done=progress.cards_done,
+            cards_total=progress.cards_total,
+            lots_skipped=progress.lots_skipped,
+            lots_resumed=progress.lots_resumed,
+            rate=self._parser.current_rate
+        ))
+
+    async def _cancel(self, update: Update, _):
+        """Обработчик команды /cancel"""
+        if self._scans.cancel():
+            await update.message.reply_text(SCAN_CANCELLED_MESSAGE)
+        else:
+            await update.message.reply_text(SCAN_IDLE_MESSAGE)
+
+    async def _history(self, update: Update, context: CallbackContext):
+        """Обработчик команды /history, история цен без запросов к сайту"""
+        args = list(context.args or ())
+        days = HISTORY_DEFAULT_DAYS
+        if len(args) > 1 and args[-1].isdigit():
+            days = int(args.pop())
+        query = " ".join(args)
+        if self._price_history is None or not query:
+            await update.message.reply_text(HISTORY_USAGE_MESSAGE)
+            return
+
+        now = datetime.now()
+        since = (now - timedelta(days=days)).timestamp()
+        lines = list()
+        for meta in self._price_history.find(query):
+            stats = self._price_history.stats(meta.data_id, since=since)
+            if stats is None: continue
+            lines.append(HISTORY_CARD_MESSAGE.format(
+                name=meta.name,
+                manga_name=meta.manga_name,
+                rank=meta.rank.capitalize(),
+                min_price=stats.min_price,
+                avg_price=stats.avg_price,
+                last_price=stats.last_price,
+                last_seen=datetime.fromtimestamp(stats.last_seen),
+                scans=stats.scans
+            ))
+
+        if not lines:
+            await update.message.reply_text(HISTORY_NOT_FOUND_MESSAGE.format(query=query, days=days))
+            return
+        for text in split_text("\n".join([HISTORY_HEADER_MESSAGE.format(days=days), *lines])):
+            await update.message.reply_text(text)
+
+    @staticmethod
+    def _stage_lines(stages):
+        """Строки сводки по этапам"""
+        return [
+            STATS_STAGE_MESSAGE.format(
+                stage=SCAN_STAGES.get(stage, stage),
+                requests=stats.requests,
+                errors=stats.errors,
+                megabytes=stats.bytes / 1024 / 1024,
+                cache_hits=stats.cache_hits,
+                network=stats.network_seconds,
+                parse=stats.parse_seconds,
+                wait=stats.wait_seconds
+            ) for stage, stats in stages.items()
+        ]
+
+    async def _stats(self, update: Update, _):
+        """Обработчик команды /stats, где сканирование тратит время"""
+        metrics = self._parser.metrics
+        if metrics.running:
+            lines = [STATS_RUNNING_MESSAGE.format(duration=metrics.scan_duration)]
+        elif metrics.last_scan_duration is not None:
+            lines = [STATS_LAST_SCAN_MESSAGE.format(duration=metrics.last_scan_duration)]
+        else:
+            lines = [STATS_NO_SCAN_MESSAGE]
+        lines.extend(self._stage_lines(metrics.scan()))
+        lines.append(STATS_TOTALS_MESSAGE)
+        lines.extend(self._stage_lines(metrics.totals()))
+
+        for text in split_text("\n".join(lines)):
+            await update.message.reply_text(text)
+
+    @staticmethod
+    def _parse_alert(args):
+        """Разбор аргументов /alert: цена, необязательный ранг, ID карты или тайтл
+
+        :return:
+            dict|None: Аргументы для PriceAlerts.add, None если разобрать не удалось
+        """
+        if not args or not args[0].isdigit() or int(args[0]) <= 0: return None
+        rule = {"below": int(args[0])}
+        rest = list(args[1:])
+        if rest and rest[0].lower() in {rank.value for rank in CardRank}:
+            rule["rank"] = CardRank(rest.pop(0).lower())
+
+        target = " ".join(rest)
+        if target.isdigit():
+            rule["data_id"] = target
+        elif target:
+            rule["manga_name"] = target
+        elif "rank" not in rule:
+            return None
+        return rule
+
+    @staticmethod
+    def _format_rule(rule: AlertRule):
+        """Правило одной строкой"""
+        target = ", ".join(
+            ALERT_TARGETS[field].format(value.value.capitalize() if isinstance(value, CardRank) else value)
+            for field, value in (("data_id", rule.data_id), ("manga_name", rule.manga_name), ("rank", rule.rank))
+            if value is not None
+        )
+        return ALERT_RULE_MESSAGE.format(rule_id=rule.rule_id, target=target, below=rule.below)
+
+    async def _alert(self, update: Update, context: CallbackContext):
+        """Обработчик команды /alert, добавление правила оповещения о цене"""
+        price_alerts = self._account(update).price_alerts
+        rule = self._parse_alert(list(context.args or ()))
+        if price_alerts is None or rule is None:
+            await update.message.reply_text(ALERT_USAGE_MESSAGE)
+            return
+
+        rule = price_alerts.add(**rule)
+        await update.message.reply_text(ALERT_ADDED_MESSAGE.format(rule=self._format_rule(rule)))
+
+    async def _alerts(self, update: Update, _):
+        """Обработчик команды /alerts, список правил"""
+        price_alerts = self._account(update).price_alerts
+        rules = price_alerts.rules if price_alerts is not None else []
+        if not rules:
+            await update.message.reply_text(ALERTS_EMPTY_MESSAGE)
+            return
+        for text in split_text("\n".join(self._format_rule(rule) for rule in rules)):
+            await update.message.reply_text(text)
+
+    async def _unalert(self, update: Update, context: CallbackContext):
+        """Обработчик команды /unalert, удаление правила"""
+        price_alerts = self._account(update).price_alerts
+        args = list(context.args or ())
+        if price_alerts is None or len(args) != 1 or not args[0].isdigit():
+            await update.message.reply_text(UNALERT_USAGE_MESSAGE)
+            return
+
+        rule_id = int(args[0])
+        if price_alerts.remove(rule_id):
+            await update.message.reply_text(ALERT_REMOVED_MESSAGE.format(rule_id=rule_id))
+        else:
+            await update.message.reply_text(ALERT_NOT_FOUND_MESSAGE.format(rule_id=rule_id))
+
     def run(self):
         """Функция run_polling"""
         logger.info("Bot running...")
-        self._app.run_polling()
\ No newline at end of file
+        self._app.run_polling()
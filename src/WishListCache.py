@@ -0,0 +1,88 @@
+import logging
+import sqlite3
+from datetime import timedelta
+from time import time
+
+from MangabuffParser import CardInfo, CardRank
+
+
+logger = logging.getLogger(__name__)
+
+class WishListCache:
+    """Локальное хранилище списка желаемых карт в SQLite
+
+    Список хранится по пользователю вместе с отпечатком первой страницы
+    и временем синхронизации. Кэш отдаётся только пока не истёк ttl
+    и отпечаток совпадает со свежим.
+    """
+    def __init__(self, *, path, ttl: timedelta = timedelta(days=1)):
+        self._ttl = ttl
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS wish_list_sync (
+                user_id TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                synced_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS wish_list_cards (
+                user_id TEXT NOT NULL,
+                data_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                manga_name TEXT NOT NULL,
+                rank TEXT NOT NULL,
+                PRIMARY KEY (user_id, data_id)
+            );
+        """)
+        logger.info(f"Wish list cache opened: {path}")
+
+    def load(self, *, user_id, fingerprint) -> list[CardInfo] | None:
+        """Список желаемого из кэша
+
+        :return:
+            list[CardInfo]|None: Карты, None если кэша нет, он устарел или отпечаток изменился
+        """
+        sync = self._connection.execute(
+            "SELECT fingerprint, synced_at FROM wish_list_sync WHERE user_id = ?",
+            (user_id,)
+        ).fetchone()
+        if sync is None:
+            logger.info("Wish list cache miss: empty")
+            return None
+
+        cached_fingerprint, synced_at = sync
+        if time() - synced_at > self._ttl.total_seconds():
+            logger.info("Wish list cache miss: expired")
+            return None
+        if cached_fingerprint != fingerprint:
+            logger.info("Wish list cache miss: changed")
+            return None
+
+        rows = self._connection.execute(
+            "SELECT data_id, name, manga_name, rank FROM wish_list_cards WHERE user_id = ?",
+            (user_id,)
+        )
+        cards = [
+            CardInfo(data_id=data_id, rank=CardRank(rank), name=name, manga_name=manga_name)
+            for data_id, name, manga_name, rank in rows
+        ]
+        logger.info(f"Wish list cache hit: {len(cards)} cards")
+        return cards
+
+    def save(self, *, user_id, fingerprint, cards):
+        """Замена списка желаемого пользователя в кэше"""
+        with self._connection:
+            self._connection.execute("DELETE FROM wish_list_cards WHERE user_id = ?", (user_id,))
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO wish_list_cards (user_id, data_id, name, manga_name, rank) "
+                "VALUES (?, ?, ?, ?, ?)",
+                ((user_id, card.data_id, card.name, card.manga_name, card.rank.value) for card in cards)
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO wish_list_sync (user_id, fingerprint, synced_at) VALUES (?, ?, ?)",
+                (user_id, fingerprint, time())
+            )
+        logger.info(f"Wish list cache saved: {len(cards)} cards")
+
+    def close(self):
+        """Закрытие базы"""
+        self._connection.close()
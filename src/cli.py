@@ -0,0 +1,178 @@
+"""Одно сканирование без Telegram бота, для cron и пакетных запусков
+
+Почта и пароль берутся из MANGABUFF_MAIL и MANGABUFF_PASSWORD, как у бота.
+Отчёт печатается в stdout, логи идут в stderr. Модули бота и хранилища
+импортируются только когда нужны, так что запуск не платит за Telegram.
+С --data-dir сессия, кэши и контрольная точка сохраняются между запусками:
+следующий запуск не входит заново и продолжает прерванное сканирование.
+
+Отчёт в Markdown, как у бота, или построчно по мере сканирования
+в NDJSON и CSV: отчёт тогда не собирается в памяти целиком.
+
+python src/cli.py --want > report.md
+python src/cli.py --query "тайтл" --rank s --data-dir data
+python src/cli.py --want --format ndjson --output cards.ndjson
+
+С --workers N сканирование делится между N процессами, у каждого свой
+аккаунт: MANGABUFF_MAIL, затем MANGABUFF_MAIL_2, MANGABUFF_PASSWORD_2 и так далее.
+python src/cli.py --want --workers 3
+"""
+import argparse
+import logging
+import sys
+from os import getenv, makedirs
+from pathlib import Path
+
+
+LOG_FORMAT = "%(asctime)s:%(levelname)s:%(name)s - %(message)s"
+
+EXIT_FAILED = 1
+
+EXIT_NOT_AUTHORIZED = 2
+
+
+def parse_args(argv=None):
+    arguments = argparse.ArgumentParser(description="Одно сканирование торговой площадки mangabuff.ru")
+    arguments.add_argument("--want", action="store_true", help="Только карты из списка желаемого")
+    arguments.add_argument("--query", help="Поиск по названию карты или тайтла")
+    arguments.add_argument("--rank", help="Только карты этого ранга")
+    arguments.add_argument("--format", choices=("text", "ndjson", "csv"), default="text", help="Формат отчёта")
+    arguments.add_argument("--output", type=Path, help="Файл отчёта, по умолчанию stdout")
+    arguments.add_argument("--data-dir", type=Path, help="Папка для сессии, кэшей и контрольной точки между запусками")
+    arguments.add_argument("--base-url", default=getenv("MANGABUFF_URL"), help="Адрес сайта, по умолчанию mangabuff.ru")
+    arguments.add_argument("--request-delay", type=float, default=2.0, help="Начальный интервал между запросами, с")
+    arguments.add_argument("--max-concurrency", type=int, default=4)
+    arguments.add_argument("--workers", type=int, default=1, help="Число процессов сканирования, по аккаунту на процесс")
+    arguments.add_argument("--verbose", "-v", action="store_true", help="Логи уровня INFO")
+    args = arguments.parse_args(argv)
+    if not args.want and not args.query:
+        arguments.error("нужен --want или --query")
+    if args.workers < 1:
+        arguments.error("--workers должен быть больше 0")
+    return args
+
+
+def _stores(data_path):
+    """Хранилища в data_path, те же что у бота, без истории цен и оповещений"""
+    from ResponseCache import ResponseCache
+    from WishListCache import WishListCache
+    from LotSnapshotStore import LotSnapshotStore
+    from SessionStore import SessionStore
+    from ScanCheckpoint import ScanCheckpoint
+
+    makedirs(data_path, exist_ok=True)
+    return {
+        "response_cache": ResponseCache(path=data_path / "responses.sqlite3"),
+        "wish_list_cache": WishListCache(path=data_path / "wish_list.sqlite3"),
+        "lot_snapshots": LotSnapshotStore(path=data_path / "lot_snapshots.sqlite3"),
+        "session_store": SessionStore(path=data_path / "sessions.sqlite3"),
+        "checkpoint": ScanCheckpoint(path=data_path / "checkpoints.sqlite3")
+    }
+
+
+def _accounts(count):
+    """Почта и пароль count аккаунтов, как у бота: MANGABUFF_MAIL, затем MANGABUFF_MAIL_2 и так далее"""
+    accounts = [(getenv("MANGABUFF_MAIL") or "", getenv("MANGABUFF_PASSWORD") or "")]
+    for number in range(2, count + 1):
+        mail = getenv(f"MANGABUFF_MAIL_{number}")
+        if not mail:
+            raise ValueError(f"Для {count} процессов нужны аккаунты до MANGABUFF_MAIL_{count}, нет MANGABUFF_MAIL_{number}")
+        accounts.append((mail, getenv(f"MANGABUFF_PASSWORD_{number}") or ""))
+    return accounts
+
+
+def _sharded_scan(args, rank):
+    """Сканирование несколькими процессами. Очередь работы в --data-dir или во временной папке
+
+    :return:
+        list[CardInfo]: Карты с лотами
+    """
+    from tempfile import TemporaryDirectory
+    from ShardedScan import ShardedScan
+    from MangabuffParser import MANGABUFF_URL
+
+    with TemporaryDirectory() as directory:
+        data_path = args.data_dir if args.data_dir is not None else Path(directory)
+        makedirs(data_path, exist_ok=True)
+        scan = ShardedScan(
+            accounts=_accounts(args.workers),
+            queue_path=data_path / "scan_queue.sqlite3",
+            base_url=args.base_url or MANGABUFF_URL,
+            session_store_path=data_path / "sessions.sqlite3" if args.data_dir is not None else None,
+            request_delay=args.request_delay,
+            max_concurrency=args.max_concurrency
+        )
+        return scan.get_cards_lots(query=args.query, want=args.want, rank=rank)
+
+
+def iter_scan(args):
+    """Сканирование по аргументам, карты отдаются по мере загрузки их лотов
+
+    :return:
+        Iterator[CardInfo]: Карты с лотами
+    """
+    from MangabuffParser import MangabuffParser, CardRank, MANGABUFF_URL
+
+    rank = None
+    if args.rank:
+        try:
+            rank = CardRank(args.rank.strip().lower())
+        except ValueError:
+            raise ValueError(f"Неизвестный ранг {args.rank}")
+
+    if args.workers > 1:
+        yield from _sharded_scan(args, rank)
+        return
+
+    stores = _stores(args.data_dir) if args.data_dir is not None else {}
+    try:
+        with MangabuffParser(
+            mail=getenv("MANGABUFF_MAIL") or "",
+            password=getenv("MANGABUFF_PASSWORD") or "",
+            base_url=args.base_url or MANGABUFF_URL,
+            request_delay=args.request_delay,
+            max_concurrency=args.max_concurrency,
+            **stores
+        ) as parser:
+            yield from parser.iter_cards_lots(query=args.query, want=args.want, rank=rank)
+    finally:
+        for store in stores.values():
+            store.close()
+
+
+def write_report(args):
+    """Отчёт в args.output или stdout. NDJSON и CSV пишутся по карте, текст после сканирования"""
+    if args.format == "text":
+        from MangabuffParser import CardInfo
+        report = CardInfo.out_list(list(iter_scan(args)))
+        if args.output is None:
+            sys.stdout.write(report)
+        else:
+            args.output.write_text(report, encoding="utf-8")
+        return
+
+    from CardExport import EXPORT_FORMATS, open_export
+    export = open_export(args.output, args.format) if args.output is not None else EXPORT_FORMATS[args.format](sys.stdout)
+    with export:
+        for card in iter_scan(args):
+            export.write(card)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(stream=sys.stderr, format=LOG_FORMAT, level=logging.INFO if args.verbose else logging.WARNING)
+
+    from MangabuffParser import NotAuthorized
+    try:
+        write_report(args)
+    except NotAuthorized as e:
+        print(f"Вход не выполнен: {e}", file=sys.stderr)
+        return EXIT_NOT_AUTHORIZED
+    except Exception as e:
+        print(f"Сканирование не удалось: {e}", file=sys.stderr)
+        return EXIT_FAILED
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
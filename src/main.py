@@ -1,10 +1,21 @@
 from pathlib import Path
 from os import getenv, makedirs
 import logging
-from datetime import time
+from datetime import time, timedelta
 
-from TrackerBot import TrackerBot
-from MangabuffParser import MangabuffParser
+from TrackerBot import TrackerBot, ChatAccount
+from MangabuffParser import MangabuffParser, MANGABUFF_URL
+from AsyncFetcher import RETRIES, RETRY_BACKOFF
+from WishListCache import WishListCache
+from ResponseCache import ResponseCache
+from LotSnapshotStore import LotSnapshotStore
+from MarketSnapshotStore import MarketSnapshotStore
+from PriceHistoryStore import PriceHistoryStore
+from PriceAlerts import PriceAlerts
+from SessionStore import SessionStore
+from ScanCheckpoint import ScanCheckpoint
+from ScanMetrics import ScanMetrics, MetricsServer
+from ScanProfiler import ScanProfiler
 
 
 # ------------------- ENV - for debug mode ----------------------
@@ -28,11 +39,76 @@ def main():
     logging.basicConfig(filename=log_file_path / log_file_name, format=LOG_FORMAT, level=logging.INFO, encoding="utf-8")
     logger.info("Starting mangabuff-card-tracker")
 
-    parser = MangabuffParser(
-        mail=getenv("MANGABUFF_MAIL"),
-        password=getenv("MANGABUFF_PASSWORD")
+    data_path = PROJECT_ROOT / "data"
+    makedirs(data_path, exist_ok=True)
+
+    wish_list_cache = WishListCache(
+        path=data_path / "wish_list.sqlite3",
+        ttl=timedelta(hours=float(getenv("WISH_LIST_TTL_HOURS", "24")))
+    )
+
+    response_cache = ResponseCache(
+        path=data_path / "responses.sqlite3",
+        max_bytes=int(float(getenv("RESPONSE_CACHE_MB", "200")) * 1024 * 1024)
+    )
+
+    lot_snapshots = LotSnapshotStore(
+        path=data_path / "lot_snapshots.sqlite3",
+        ttl=timedelta(hours=float(getenv("LOT_SNAPSHOT_TTL_HOURS", "6")))
+    )
+
+    price_history = PriceHistoryStore(path=data_path / "price_history")
+
+    session_store = SessionStore(path=data_path / "sessions.sqlite3")
+
+    checkpoint = ScanCheckpoint(
+        path=data_path / "checkpoints.sqlite3",
+        ttl=timedelta(hours=float(getenv("CHECKPOINT_TTL_HOURS", "1")))
     )
 
+    metrics = ScanMetrics()
+    metrics_port = getenv("METRICS_PORT")
+    if metrics_port:
+        MetricsServer(metrics=metrics, host=getenv("METRICS_HOST", "127.0.0.1"), port=int(metrics_port)).start()
+
+    def make_parser(mail, password, profiler=None):
+        return MangabuffParser(
+            mail=mail,
+            password=password,
+            wish_list_cache=wish_list_cache,
+            response_cache=response_cache,
+            lot_snapshots=lot_snapshots,
+            price_history=price_history,
+            base_url=getenv("MANGABUFF_URL", MANGABUFF_URL),
+            metrics=metrics,
+            profiler=profiler,
+            session_store=session_store,
+            retries=int(getenv("REQUEST_RETRIES", str(RETRIES))),
+            retry_backoff=float(getenv("RETRY_BACKOFF", str(RETRY_BACKOFF))),
+            checkpoint=checkpoint
+        )
+
+    parser = make_parser(
+        getenv("MANGABUFF_MAIL"),
+        getenv("MANGABUFF_PASSWORD"),
+        ScanProfiler(
+            path=log_file_path / "profiles",
+            enabled=getenv("PROFILE_SCANS", "False").lower().strip() in ('true', '1')
+        )
+    )
+
+    # Ещё аккаунты: MANGABUFF_MAIL_2, MANGABUFF_PASSWORD_2, CHAT_ID_2 и так далее
+    accounts = list()
+    number = 2
+    while chat_id := getenv(f"CHAT_ID_{number}"):
+        accounts.append(ChatAccount(
+            chat_id=chat_id,
+            parser=make_parser(getenv(f"MANGABUFF_MAIL_{number}"), getenv(f"MANGABUFF_PASSWORD_{number}")),
+            market_snapshots=MarketSnapshotStore(path=data_path / f"market_snapshot_{chat_id}.json"),
+            price_alerts=PriceAlerts(path=data_path / f"alerts_{chat_id}.sqlite3")
+        ))
+        number += 1
+
     tracker = TrackerBot(
         token=getenv("BOT_TOKEN"),
         chat_id=getenv("CHAT_ID"),
@@ -40,7 +116,11 @@ def main():
         timestamps=[
             time(11,0,0),
             time(15,0,0)
-        ]
+        ],
+        market_snapshots=MarketSnapshotStore(path=data_path / "market_snapshot.json"),
+        price_history=price_history,
+        price_alerts=PriceAlerts(path=data_path / "alerts.sqlite3"),
+        accounts=accounts
     )
 
     print('START - MangaBuff Card Tracker Bot')
@@ -3,9 +3,41 @@ import json
 
 
 START_MESSAGE: str
+SCAN_STARTED_MESSAGE: str
+SCAN_JOINED_MESSAGE: str
+SCAN_CANCELLED_MESSAGE: str
+SCAN_IDLE_MESSAGE: str
+NO_CHANGES_MESSAGE: str
+HISTORY_USAGE_MESSAGE: str
+HISTORY_NOT_FOUND_MESSAGE: str
+HISTORY_HEADER_MESSAGE: str
+HISTORY_CARD_MESSAGE: str
+ALERT_USAGE_MESSAGE: str
+UNALERT_USAGE_MESSAGE: str
+ALERT_ADDED_MESSAGE: str
+ALERT_REMOVED_MESSAGE: str
+ALERT_NOT_FOUND_MESSAGE: str
+ALERTS_EMPTY_MESSAGE: str
+ALERT_RULE_MESSAGE: str
+ALERT_TARGETS: dict[str, str]
+ALERT_TRIGGERED_MESSAGE: str
+STATS_RUNNING_MESSAGE: str
+STATS_LAST_SCAN_MESSAGE: str
+STATS_NO_SCAN_MESSAGE: str
+STATS_TOTALS_MESSAGE: str
+STATS_STAGE_MESSAGE: str
+PROFILE_STARTED_MESSAGE: str
+PROFILE_ARMED_MESSAGE: str
+PROFILE_UNAVAILABLE_MESSAGE: str
+SCAN_PROGRESS_MESSAGE: str
+SCAN_STAGES: dict[str, str]
 
 MANGA_NAME_OUTPUT_STRING: str
 CARD_OUTPUT_STRING: str
+CARD_DELTA_OUTPUT_STRING: str
+LOTS_ADDED_OUTPUT_STRING: str
+LOTS_REMOVED_OUTPUT_STRING: str
+LOTS_CHANGED_OUTPUT_STRING: str
 
 def message_init():
     current_dir = Path(__file__).parent.resolve()
@@ -13,19 +45,126 @@ def message_init():
     cards_output_file = current_dir / "cards_output.json"
 
     global START_MESSAGE
+    global SCAN_STARTED_MESSAGE
+    global SCAN_JOINED_MESSAGE
+    global SCAN_CANCELLED_MESSAGE
+    global SCAN_IDLE_MESSAGE
+    global NO_CHANGES_MESSAGE
+    global HISTORY_USAGE_MESSAGE
+    global HISTORY_NOT_FOUND_MESSAGE
+    global HISTORY_HEADER_MESSAGE
+    global HISTORY_CARD_MESSAGE
+    global ALERT_USAGE_MESSAGE
+    global UNALERT_USAGE_MESSAGE
+    global ALERT_ADDED_MESSAGE
+    global ALERT_REMOVED_MESSAGE
+    global ALERT_NOT_FOUND_MESSAGE
+    global ALERTS_EMPTY_MESSAGE
+    global ALERT_RULE_MESSAGE
+    global ALERT_TARGETS
+    global ALERT_TRIGGERED_MESSAGE
+    global STATS_RUNNING_MESSAGE
+    global STATS_LAST_SCAN_MESSAGE
+    global STATS_NO_SCAN_MESSAGE
+    global STATS_TOTALS_MESSAGE
+    global STATS_STAGE_MESSAGE
+    global PROFILE_STARTED_MESSAGE
+    global PROFILE_ARMED_MESSAGE
+    global PROFILE_UNAVAILABLE_MESSAGE
+    global SCAN_PROGRESS_MESSAGE
+    global SCAN_STAGES
 
     with open(bot_message_file, encoding="utf-8") as f:
         messages = json.load(f)
         START_MESSAGE = messages["start"]
+        SCAN_STARTED_MESSAGE = messages["scan_started"]
+        SCAN_JOINED_MESSAGE = messages["scan_joined"]
+        SCAN_CANCELLED_MESSAGE = messages["scan_cancelled"]
+        SCAN_IDLE_MESSAGE = messages["scan_idle"]
+        NO_CHANGES_MESSAGE = messages["no_changes"]
+        HISTORY_USAGE_MESSAGE = messages["history_usage"]
+        HISTORY_NOT_FOUND_MESSAGE = messages["history_not_found"]
+        HISTORY_HEADER_MESSAGE = messages["history_header"]
+        HISTORY_CARD_MESSAGE = messages["history_card"]
+        ALERT_USAGE_MESSAGE = messages["alert_usage"]
+        UNALERT_USAGE_MESSAGE = messages["unalert_usage"]
+        ALERT_ADDED_MESSAGE = messages["alert_added"]
+        ALERT_REMOVED_MESSAGE = messages["alert_removed"]
+        ALERT_NOT_FOUND_MESSAGE = messages["alert_not_found"]
+        ALERTS_EMPTY_MESSAGE = messages["alerts_empty"]
+        ALERT_RULE_MESSAGE = messages["alert_rule"]
+        ALERT_TARGETS = messages["alert_targets"]
+        ALERT_TRIGGERED_MESSAGE = messages["alert_triggered"]
+        STATS_RUNNING_MESSAGE = messages["stats_running"]
+        STATS_LAST_SCAN_MESSAGE = messages["stats_last_scan"]
+        STATS_NO_SCAN_MESSAGE = messages["stats_no_scan"]
+        STATS_TOTALS_MESSAGE = messages["stats_totals"]
+        STATS_STAGE_MESSAGE = messages["stats_stage"]
+        PROFILE_STARTED_MESSAGE = messages["profile_started"]
+        PROFILE_ARMED_MESSAGE = messages["profile_armed"]
+        PROFILE_UNAVAILABLE_MESSAGE = messages["profile_unavailable"]
+        SCAN_PROGRESS_MESSAGE = messages["scan_progress"]
+        SCAN_STAGES = messages["scan_stages"]
 
     global MANGA_NAME_OUTPUT_STRING
     global CARD_OUTPUT_STRING
+    global CARD_DELTA_OUTPUT_STRING
+    global LOTS_ADDED_OUTPUT_STRING
+    global LOTS_REMOVED_OUTPUT_STRING
+    global LOTS_CHANGED_OUTPUT_STRING
 
     with open(cards_output_file, encoding="utf-8") as f:
         strings = json.load(f)
         MANGA_NAME_OUTPUT_STRING = strings["manga_name"]
         CARD_OUTPUT_STRING = strings["card_line"]
+        CARD_DELTA_OUTPUT_STRING = strings["card_delta"]
+        LOTS_ADDED_OUTPUT_STRING = strings["lots_added"]
+        LOTS_REMOVED_OUTPUT_STRING = strings["lots_removed"]
+        LOTS_CHANGED_OUTPUT_STRING = strings["lots_changed"]
 
-message_init()
 
-__all__ = ["START_MESSAGE", "MANGA_NAME_OUTPUT_STRING", "CARD_OUTPUT_STRING"]
\ No newline at end of file
+__all__ = [
+    "START_MESSAGE",
+    "SCAN_STARTED_MESSAGE",
+    "SCAN_JOINED_MESSAGE",
+    "SCAN_CANCELLED_MESSAGE",
+    "SCAN_IDLE_MESSAGE",
+    "NO_CHANGES_MESSAGE",
+    "HISTORY_USAGE_MESSAGE",
+    "HISTORY_NOT_FOUND_MESSAGE",
+    "HISTORY_HEADER_MESSAGE",
+    "HISTORY_CARD_MESSAGE",
+    "ALERT_USAGE_MESSAGE",
+    "UNALERT_USAGE_MESSAGE",
+    "ALERT_ADDED_MESSAGE",
+    "ALERT_REMOVED_MESSAGE",
+    "ALERT_NOT_FOUND_MESSAGE",
+    "ALERTS_EMPTY_MESSAGE",
+    "ALERT_RULE_MESSAGE",
+    "ALERT_TARGETS",
+    "ALERT_TRIGGERED_MESSAGE",
+    "STATS_RUNNING_MESSAGE",
+    "STATS_LAST_SCAN_MESSAGE",
+    "STATS_NO_SCAN_MESSAGE",
+    "STATS_TOTALS_MESSAGE",
+    "STATS_STAGE_MESSAGE",
+    "PROFILE_STARTED_MESSAGE",
+    "PROFILE_ARMED_MESSAGE",
+    "PROFILE_UNAVAILABLE_MESSAGE",
+    "SCAN_PROGRESS_MESSAGE",
+    "SCAN_STAGES",
+    "MANGA_NAME_OUTPUT_STRING",
+    "CARD_OUTPUT_STRING",
+    "CARD_DELTA_OUTPUT_STRING",
+    "LOTS_ADDED_OUTPUT_STRING",
+    "LOTS_REMOVED_OUTPUT_STRING",
+    "LOTS_CHANGED_OUTPUT_STRING"
+]
+
+
+def __getattr__(name):
+    """Сообщения читаются из JSON при первом обращении, а не при импорте"""
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    message_init()
+    return globals()[name]
@@ -0,0 +1,49 @@
+from unittest import TestCase, main
+
+from parameterized import parameterized
+
+from benchmarks.bench_parsing import FIXTURES_PATH, PAGES, _backends, compare
+
+
+BASELINE = {
+    "calibration_ms": 10.0,
+    "metrics": {
+        "parse.lxml.market.ms": 2.0,
+        "parse.lxml.market.peak_kb": 100.0,
+    }
+}
+
+
+class TestBenchParsing(TestCase):
+    @parameterized.expand([
+        ("same", 10.0, 2.0, 100.0, []),
+        ("within_tolerance", 10.0, 2.4, 105.0, []),
+        ("slower_machine", 20.0, 4.8, 100.0, []),
+        ("time", 10.0, 2.6, 100.0, ["parse.lxml.market.ms"]),
+        ("time_on_faster_machine", 5.0, 1.3, 100.0, ["parse.lxml.market.ms"]),
+        ("memory", 10.0, 2.0, 120.0, ["parse.lxml.market.peak_kb"]),
+    ])
+    def test_compare(self, _, calibration_ms, parse_ms, peak_kb, expected):
+        """Тест порога регрессии с поправкой на калибровку"""
+        result = {
+            "calibration_ms": calibration_ms,
+            "metrics": {
+                "parse.lxml.market.ms": parse_ms,
+                "parse.lxml.market.peak_kb": peak_kb,
+                "parse.lxml.new.ms": 100.0,
+            }
+        }
+        regressions = compare(result, BASELINE, tolerance=0.25, memory_tolerance=0.10)
+        self.assertEqual([regression.split(":")[0] for regression in regressions], expected)
+
+    def test_fixtures_parse(self):
+        """Тест разбора фикстур всеми бэкендами"""
+        for backend in _backends():
+            for page in PAGES:
+                result = getattr(backend, f"{page}_page")((FIXTURES_PATH / f"{page}.html").read_bytes())
+                self.assertIsNotNone(result, f"{backend.name} {page}")
+                self.assertTrue(result.items, f"{backend.name} {page}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+import csv
+import json
+import tracemalloc
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from src.CardExport import NdjsonExport, CsvExport, open_export, CSV_FIELDS
+from src.MangabuffParser import CardInfo, CardRank, Lot
+
+
+class TestCardExport(TestCase):
+    def setUp(self):
+        self.cards = [
+            CardInfo(
+                data_id="1",
+                rank=CardRank.S,
+                name="test 1",
+                manga_name="manga, 1",
+                market_signal="3",
+                lots=[Lot(20, "2"), Lot(10, "1"), Lot(30, "3")]
+            ),
+            CardInfo(data_id="2", rank=CardRank.A, name="test 2", manga_name="manga 2")
+        ]
+
+    def test_ndjson(self):
+        """Тест строки NDJSON на карту со сводкой по лотам"""
+        stream = StringIO()
+        with NdjsonExport(stream) as export:
+            for card in self.cards:
+                export.write(card)
+
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(export.count, 2)
+        self.assertEqual(records[0], {
+            "data_id": "1",
+            "rank": "s",
+            "name": "test 1",
+            "manga_name": "manga, 1",
+            "market_signal": "3",
+            "lots_count": 3,
+            "min_price": 10,
+            "median_price": 20,
+            "lots": [{"price": 10, "lot_id": "1"}, {"price": 20, "lot_id": "2"}, {"price": 30, "lot_id": "3"}]
+        })
+        self.assertEqual((records[1]["lots"], records[1]["min_price"]), ([], None))
+
+    def test_csv(self):
+        """Тест CSV: строка на лот, карта без лотов одной строкой"""
+        stream = StringIO()
+        with CsvExport(stream) as export:
+            for card in self.cards:
+                export.write(card)
+
+        rows = list(csv.reader(StringIO(stream.getvalue())))
+        self.assertEqual(rows[0], list(CSV_FIELDS))
+        self.assertEqual(rows[1:], [
+            ["1", "s", "test 1", "manga, 1", "3", "10", "1"],
+            ["1", "s", "test 1", "manga, 1", "3", "20", "2"],
+            ["1", "s", "test 1", "manga, 1", "3", "30", "3"],
+            ["2", "a", "test 2", "manga 2", "", "", ""]
+        ])
+        self.assertEqual(export.count, 2)
+
+    def test_open_export(self):
+        """Тест экспорта в файл и неизвестного формата"""
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / "cards.ndjson"
+            with open_export(path, "ndjson") as export:
+                export.write(self.cards[0])
+            self.assertEqual(json.loads(path.read_text(encoding="utf-8"))["data_id"], "1")
+
+            with self.assertRaises(ValueError):
+                open_export(Path(directory) / "cards.xml", "xml")
+
+    def test_memory_flat(self):
+        """Тест: память экспорта не растёт с числом карт"""
+        def cards(count):
+            for number in range(count):
+                yield CardInfo(
+                    data_id=str(number),
+                    rank=CardRank.S,
+                    name=f"card {number}",
+                    manga_name="manga",
+                    lots=[Lot(price, str(price)) for price in range(10)]
+                )
+
+        peaks = list()
+        with TemporaryDirectory() as directory:
+            for count in (1000, 10000):
+                tracemalloc.start()
+                try:
+                    with open_export(Path(directory) / "cards.csv", "csv") as export:
+                        for card in cards(count):
+                            export.write(card)
+                    peaks.append(tracemalloc.get_traced_memory()[1])
+                finally:
+                    tracemalloc.stop()
+        self.assertLess(peaks[1], peaks[0] * 2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+from unittest import TestCase, main
+
+from src.MangabuffParser import CardIndex, CardInfo, CardRank, Lot
+
+
+class TestCardIndex(TestCase):
+    def setUp(self):
+        self.index = CardIndex([
+            CardInfo(data_id="1", rank=CardRank.S, name="test 1", manga_name="first manga"),
+            CardInfo(data_id="2", rank=CardRank.X, name="test 2", manga_name="second manga"),
+            CardInfo(data_id="3", rank=CardRank.S, name="test 3", manga_name="second manga"),
+        ])
+
+    def test_contains(self):
+        """Тест поиска по карте и по data_id"""
+        self.assertIn("1", self.index)
+        self.assertIn(CardInfo(data_id="2", rank=CardRank.X), self.index)
+        self.assertNotIn("4", self.index)
+        self.assertEqual(len(self.index), 3)
+
+    def test_add_duplicate_merges(self):
+        """Тест дополнения карты при повторном добавлении"""
+        index = CardIndex([CardInfo(data_id="1", rank=CardRank.S)])
+        index.add(CardInfo(data_id="1", rank=CardRank.S, name="test 1", manga_name="first manga", lots=[Lot(1)]))
+
+        card = index.get("1")
+        self.assertEqual(len(index), 1)
+        self.assertEqual((card.name, card.manga_name, card.lots), ("test 1", "first manga", [Lot(1)]))
+
+    def test_join(self):
+        """Тест пересечения индексов с дополнением данных"""
+        market = CardIndex([
+            CardInfo(data_id="3", rank=CardRank.S, lots=[Lot(10)]),
+            CardInfo(data_id="1", rank=CardRank.S),
+            CardInfo(data_id="5", rank=CardRank.A),
+        ])
+
+        result = self.index.join(market)
+
+        self.assertEqual([card.data_id for card in result], ["1", "3"])
+        self.assertEqual(result.get("3").lots, [Lot(10)])
+        self.assertEqual(result.get("3").manga_name, "second manga")
+
+    def test_equal_to_list(self):
+        """Тест сравнения индекса со списком с учётом порядка"""
+        self.assertEqual(self.index, list(self.index))
+        self.assertNotEqual(self.index, list(reversed(list(self.index))))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,6 @@
 from unittest import TestCase ,main
 
-from src.MangabuffParser import CardInfo, CardRank
+from src.MangabuffParser import CardInfo, CardRank, Lot, Lots
 from resources.messages import MANGA_NAME_OUTPUT_STRING, CARD_OUTPUT_STRING
 
 
@@ -12,42 +12,42 @@ class TestCardInfo(TestCase):
                 rank=CardRank(CardRank.X),
                 name="test_name",
                 manga_name="first manga",
-                lots=["1A", "2A"]
+                lots=[Lot(1), Lot(2)]
             ),
             CardInfo(
                 data_id="2",
                 rank=CardRank(CardRank.B),
                 name="test_name",
                 manga_name="second manga",
-                lots=["1A", "2A"]
+                lots=[Lot(1), Lot(2)]
             ),
             CardInfo(
                 data_id="3",
                 rank=CardRank(CardRank.A),
                 name="test_name",
                 manga_name="first manga",
-                lots=["1A", "2A"]
+                lots=[Lot(1), Lot(2)]
             ),
             CardInfo(
                 data_id="4",
                 rank=CardRank(CardRank.X),
                 name="test_name",
                 manga_name="first manga",
-                lots=["1A", "2A"]
+                lots=[Lot(1), Lot(2)]
             ),
             CardInfo(
                 data_id="5",
                 rank=CardRank(CardRank.B),
                 name="test_name",
                 manga_name="second manga",
-                lots=["1A", "2A"]
+                lots=[Lot(1), Lot(2)]
             ),
             CardInfo(
                 data_id="6",
                 rank=CardRank(CardRank.S),
                 name="test_name",
                 manga_name="first manga",
-                lots=["1A", "2A"]
+                lots=[Lot(1), Lot(2)]
             ),
         ]
         expect_result = MANGA_NAME_OUTPUT_STRING.format(title="first manga") + "\n"
@@ -59,6 +59,28 @@ class TestCardInfo(TestCase):
 
         self.assertEqual(expect_result, CardInfo.out_list(input_data))
 
+    def test_lot_parse(self):
+        """Тест разбора цены лота"""
+        self.assertEqual(Lot.parse("1 200 ₽", "7"), Lot(price=1200, lot_id="7"))
+        self.assertIsNone(Lot.parse("—"))
+
+    def test_lots_stats(self):
+        """Тест упорядоченных по цене лотов и их статистики"""
+        lots = Lots([Lot(30, "a"), Lot(10, "b"), Lot(20, "c"), Lot(40, "d")])
+
+        self.assertEqual(list(lots), [Lot(10, "b"), Lot(20, "c"), Lot(30, "a"), Lot(40, "d")])
+        self.assertEqual((lots.count, lots.min_price, lots.median_price), (4, 10, 20))
+        self.assertEqual(lots[-1], Lot(40, "d"))
+        self.assertEqual((Lots().min_price, Lots().median_price, bool(Lots())), (None, None, False))
+
+    def test_card_slots(self):
+        """Тест карты без __dict__ и приведения списка лотов"""
+        card = CardInfo(data_id="1", rank=CardRank.S, lots=[Lot(20), Lot(10)])
+
+        self.assertFalse(hasattr(card, "__dict__"))
+        self.assertIsInstance(card.lots, Lots)
+        self.assertEqual(card.lots.min_price, 10)
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,104 @@
+import csv
+import json
+import subprocess
+import sys
+from contextlib import redirect_stdout, redirect_stderr
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from benchmarks.standin_server import StandinServer, StandinConfig
+from src import cli
+
+
+SRC_PATH = Path(__file__).parent.parent / "src"
+
+
+class TestCli(TestCase):
+    def run_cli(self, server, *argv, password=None):
+        env = {"MANGABUFF_MAIL": server.config.mail, "MANGABUFF_PASSWORD": password or server.config.password}
+        stdout, stderr = StringIO(), StringIO()
+        with patch.dict("os.environ", env), redirect_stdout(stdout), redirect_stderr(stderr):
+            code = cli.main(["--base-url", server.url, "--request-delay", "0", *argv])
+        return code, stdout.getvalue()
+
+    def test_lazy_imports(self):
+        """Тест: импорт cli с парсером не тянет Telegram, бот, профилировщик и не читает сообщения"""
+        code = (
+            "import sys, json, cli, MangabuffParser, resources.messages; "
+            "print(json.dumps({"
+            "'modules': [m for m in ('telegram', 'TrackerBot', 'cProfile', 'http.server') if m in sys.modules], "
+            "'messages_loaded': 'CARD_OUTPUT_STRING' in vars(resources.messages)}))"
+        )
+        output = subprocess.run([sys.executable, "-c", code], cwd=SRC_PATH, capture_output=True, text=True, check=True)
+        self.assertEqual(json.loads(output.stdout), {"modules": [], "messages_loaded": False})
+
+    def test_scan(self):
+        """Тест одного сканирования желаемого с отчётом в stdout"""
+        with StandinServer(StandinConfig(cards=30, page_size=7)) as server:
+            code, output = self.run_cli(server, "--want")
+
+            self.assertEqual(code, 0)
+            wanted = [card for card in server.catalogue if card.data_id in server.expected_want_cards()]
+            for card in wanted:
+                self.assertIn(card.name, output)
+                self.assertIn(card.manga_name, output)
+
+    def test_export(self):
+        """Тест экспорта в NDJSON файл и CSV в stdout"""
+        with StandinServer(StandinConfig(cards=30, page_size=7)) as server, TemporaryDirectory() as directory:
+            path = Path(directory) / "cards.ndjson"
+            code, output = self.run_cli(server, "--want", "--format", "ndjson", "--output", str(path))
+            self.assertEqual((code, output), (0, ""))
+            records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+            self.assertEqual({record["data_id"] for record in records}, server.expected_want_cards())
+            self.assertTrue(all(record["lots"] for record in records))
+
+            code, output = self.run_cli(server, "--want", "--format", "csv")
+            self.assertEqual(code, 0)
+            rows = list(csv.DictReader(StringIO(output)))
+            self.assertEqual({row["data_id"] for row in rows}, server.expected_want_cards())
+
+    def test_data_dir(self):
+        """Тест: с --data-dir следующий запуск берёт сохранённую сессию без входа"""
+        with StandinServer(StandinConfig(cards=10)) as server, TemporaryDirectory() as data_dir:
+            first, _ = self.run_cli(server, "--want", "--data-dir", data_dir)
+            second, _ = self.run_cli(server, "--want", "--data-dir", data_dir)
+
+            self.assertEqual((first, second), (0, 0))
+            self.assertEqual(server.stats["logins"], 1)
+
+    def test_workers(self):
+        """Тест сканирования двумя процессами со вторым аккаунтом из MANGABUFF_MAIL_2"""
+        with StandinServer(StandinConfig(cards=30, page_size=7, users=2)) as server, TemporaryDirectory() as directory:
+            path = Path(directory) / "cards.ndjson"
+            second = server.accounts[1]
+            with patch.dict("os.environ", {"MANGABUFF_MAIL_2": second.mail, "MANGABUFF_PASSWORD_2": second.password}):
+                code, _ = self.run_cli(server, "--want", "--workers", "2", "--format", "ndjson", "--output", str(path))
+                missing, _ = self.run_cli(server, "--want", "--workers", "3")
+
+            self.assertEqual((code, missing), (0, cli.EXIT_FAILED))
+            records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+            self.assertEqual({record["data_id"] for record in records}, server.expected_want_cards())
+            self.assertTrue(all(record["lots"] for record in records))
+
+    def test_not_authorized(self):
+        """Тест кода выхода при неверном пароле"""
+        with StandinServer(StandinConfig(cards=5)) as server:
+            code, output = self.run_cli(server, "--want", password="wrong")
+        self.assertEqual((code, output), (cli.EXIT_NOT_AUTHORIZED, ""))
+
+    def test_arguments(self):
+        """Тест ошибок аргументов"""
+        with redirect_stderr(StringIO()):
+            with self.assertRaises(SystemExit):
+                cli.parse_args([])
+        with StandinServer(StandinConfig(cards=5)) as server:
+            code, _ = self.run_cli(server, "--query", "test", "--rank", "z")
+        self.assertEqual(code, cli.EXIT_FAILED)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+from unittest import TestCase, main
+
+from parameterized import parameterized
+
+from src.HtmlBackend import SoupBackend, LxmlBackend, ListingPage, MarketItem, WishListItem, LotPage, LotItem
+
+
+MARKET_PAGE = (
+    "<html><head><meta charset=\"utf-8\"></head><body>"
+    "<div class=\"market-list__cards market-list__cards--all manga-cards\">"
+    "<div class=\"manga-cards__item-wrapper\" data-id=\" 1 \" data-rank=\"s\"></div>"
+    "<div class=\"manga-cards__item-wrapper extra\" data-id=\"2\" data-lots=\"3\">"
+    "<div class=\"manga-cards__item\" data-rank=\"A\"><div data-rank=\"x\"></div></div>"
+    "<span> от  120 </span><span>₽</span><script>var a = 1;</script></div>"
+    "<div class=\"manga-cards__item-wrapper\" data-id=\"3\"><!-- comment --></div>"
+    "<div class=\"manga-cards__item-wrapper\"></div>"
+    "</div>"
+    "<div class=\"manga-cards__item-wrapper\" data-id=\"outside\"></div>"
+    "<ul><li><a href=\"/market?want=1&amp;page=2\">2</a></li><li><a href=\"/market?page=12\">12</a></li>"
+    "<li><a href=\"/market?want=1\">x</a></li></ul>"
+    "</body></html>"
+)
+
+WISH_LIST_PAGE = (
+    "<div class=\"manga-cards\">"
+    "<div class=\"manga-cards__item\" data-card-id=\"1\" data-name=\" Имя &amp; фамилия \""
+    " data-manga-name=\"Тайтл\" data-rank=\"g\"></div>"
+    "<div class=\"manga-cards__item\" data-card-id=\"2\" data-name=\"Второй\"></div>"
+    "<div class=\"manga-cards__item-wrapper\" data-card-id=\"3\" data-name=\"x\" data-manga-name=\"y\"></div>"
+    "</div>"
+)
+
+LOT_PAGE = (
+    "<div class=\"card-show\" data-name=\"Карта\">"
+    "<div class=\"market-show__item\" data-id=\"55\"><div class=\"market-show__item-price\"> 120 <span>₽</span> </div></div>"
+    "<div class=\"market-show__item\"><div class=\"market-show__item-price\"><!-- 5 --> </div></div>"
+    "<div class=\"market-show__item\"><div class=\"market-show__item-price\">"
+    "7<script>var a = 1;</script></div></div>"
+    "<div class=\"market-show__item\"></div>"
+    "</div>"
+)
+
+HIDDEN_TEXT_MARKET_PAGE = (
+    "<div class=\"market-list__cards market-list__cards--all manga-cards\">"
+    "<div class=\"manga-cards__item-wrapper\" data-id=\"1\">"
+    "<script>window.lots = 3;</script><style>.price { color: red; }</style>"
+    "<template><span>5 лотов</span></template><!-- 7 -->"
+    "<span>3 лота</span></div>"
+    "<div class=\"manga-cards__item-wrapper\" data-id=\"2\"><script>var a = 1;</script></div>"
+    "</div>"
+)
+
+USER_ID_PAGE = (
+    "<script>var other = 1;</script>"
+    "<script>\n  window.user_id = 123;\n</script>"
+)
+
+CSRF_PAGE = "<head><meta name=\"csrf-token\" content=\"token\"></head>"
+
+
+class TestHtmlBackend(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.soup = SoupBackend()
+        cls.lxml = LxmlBackend()
+
+    @parameterized.expand([
+        ("market_page", MARKET_PAGE, ListingPage(
+            items=[
+                MarketItem(data_id="1", rank="s"),
+                MarketItem(data_id="2", rank="A", signal="data-lots=3|от 120 ₽"),
+                MarketItem(data_id="3", rank=None),
+                MarketItem(data_id="", rank=None),
+            ],
+            last_page=12
+        )),
+        ("wish_list_page", WISH_LIST_PAGE, ListingPage(
+            items=[
+                WishListItem(data_id="1", name="Имя & фамилия", manga_name="Тайтл", rank="g"),
+                WishListItem(data_id="2", name="Второй", manga_name="", rank=None),
+            ],
+            last_page=0
+        )),
+        ("lot_page", LOT_PAGE, LotPage(name="Карта", items=[LotItem(lot_id="55", price="120 ₽"), LotItem(lot_id="", price="7")])),
+        ("user_id_script", USER_ID_PAGE, "\n  window.user_id = 123;\n"),
+        ("csrf_token", CSRF_PAGE, "token"),
+    ])
+    def test_backends_equal(self, method, content, expect_result):
+        """Тест одинакового результата обоих разборщиков, строкой и байтами"""
+        for payload in (content, content.encode("utf-8")):
+            self.assertEqual(getattr(self.soup, method)(payload), expect_result)
+            self.assertEqual(getattr(self.lxml, method)(payload), expect_result)
+
+    def test_market_signal_hidden_text(self):
+        """Тест: текст script/style/template и комментарии плитки не входят в сигнал обоих разборщиков"""
+        expect_result = ListingPage(
+            items=[MarketItem(data_id="1", rank=None, signal="|3 лота"), MarketItem(data_id="2", rank=None)],
+            last_page=0
+        )
+
+        self.assertEqual(self.soup.market_page(HIDDEN_TEXT_MARKET_PAGE), expect_result)
+        self.assertEqual(self.lxml.market_page(HIDDEN_TEXT_MARKET_PAGE), expect_result)
+
+    @parameterized.expand([
+        ("market_page",),
+        ("wish_list_page",),
+        ("lot_page",),
+        ("user_id_script",),
+        ("csrf_token",),
+    ])
+    def test_empty_page(self, method):
+        """Тест пустых страниц"""
+        for content in ("", "<html></html>", b""):
+            self.assertIsNone(getattr(self.soup, method)(content))
+            self.assertIsNone(getattr(self.lxml, method)(content))
+
+
+if __name__ == '__main__':
+    main()
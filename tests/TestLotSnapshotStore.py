@@ -0,0 +1,47 @@
+from datetime import timedelta
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from src.LotSnapshotStore import LotSnapshotStore
+from src.MangabuffParser import Lot
+
+
+class TestLotSnapshotStore(TestCase):
+    def setUp(self):
+        self.store = LotSnapshotStore(path=":memory:", ttl=timedelta(hours=1))
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_save_load(self):
+        """Тест сохранения и загрузки снимка"""
+        self.store.save(data_id="1", signal="3 лота", name="test 1", lots=[Lot(10, "1"), Lot(20, "2")])
+        snapshot = self.store.load(data_id="1", signal="3 лота")
+
+        self.assertEqual((snapshot.name, snapshot.lots), ("test 1", [Lot(10, "1"), Lot(20, "2")]))
+        self.assertEqual(snapshot.fingerprint, LotSnapshotStore.fingerprint("test 1", [Lot(10, "1"), Lot(20, "2")]))
+
+    def test_signal_changed(self):
+        """Тест промаха при изменившемся или пустом признаке из выдачи"""
+        self.store.save(data_id="1", signal="3 лота", name="test 1", lots=[])
+        self.assertIsNone(self.store.load(data_id="1", signal="2 лота"))
+
+        self.store.save(data_id="2", signal="", name="test 2", lots=[])
+        self.assertIsNone(self.store.load(data_id="2", signal=""))
+
+    def test_expired(self):
+        """Тест промаха по истечении ttl"""
+        with patch("src.LotSnapshotStore.time", return_value=1000.0):
+            self.store.save(data_id="1", signal="3 лота", name="test 1", lots=[])
+        with patch("src.LotSnapshotStore.time", return_value=1000.0 + 3601):
+            self.assertIsNone(self.store.load(data_id="1", signal="3 лота"))
+
+    def test_save_reports_change(self):
+        """Тест признака изменения содержимого при сохранении"""
+        self.assertTrue(self.store.save(data_id="1", signal="a", name="test 1", lots=[Lot(10)]))
+        self.assertFalse(self.store.save(data_id="1", signal="b", name="test 1", lots=[Lot(10)]))
+        self.assertTrue(self.store.save(data_id="1", signal="b", name="test 1", lots=[Lot(15)]))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,15 @@
+import asyncio
 from unittest import TestCase, main
-from unittest.mock import patch, MagicMock, call
+from unittest.mock import patch, MagicMock, AsyncMock, call
 
 from requests import HTTPError
 from parameterized import parameterized
-from src.MangabuffParser import MANGABUFF_URL, AUTHORIZATION_ERROR_CODE, SCRIPT_USER_ID_TEXT
-from src.MangabuffParser import MangabuffParser, NotAuthorized, CardRank, CardInfo
+from src.MangabuffParser import MANGABUFF_URL, AUTHORIZATION_ERROR_CODE
+from src.MangabuffParser import MangabuffParser, NotAuthorized, CardRank, CardInfo, Lot, RankNotFound
+from src.HtmlBackend import ListingPage, SCRIPT_USER_ID_TEXT
+from src.LotSnapshotStore import LotSnapshotStore
+from src.RateLimiter import AdaptiveRateLimiter
+from src.ScanCheckpoint import ScanCheckpoint
 
 
 VALID_EMAIL = "testmail@gmail.com"
@@ -19,6 +24,10 @@ CARD_SHOW_ITEM_PRICE_SELECTOR = "market-show__item-price"
 
 WISH_LIST_CARDS_SELECTOR = "manga-cards__item"
 
+def mock_response(content):
+    """Успешный ответ httpx клиента"""
+    return MagicMock(content=content, status_code=200, headers=dict())
+
 class TestInitLoginMangabuffParser(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -73,6 +82,43 @@ class TestInitLoginMangabuffParser(TestCase):
         mock_login.assert_not_called()
         mock_get_user_id.assert_not_called()
 
+    @parameterized.expand([
+        (0, ValueError),
+        (-1, ValueError),
+        (2.5, TypeError),
+        (True, TypeError),
+        ("4", TypeError),
+    ])
+    @patch.object(MangabuffParser, "_login")
+    @patch.object(MangabuffParser, "_get_user_id")
+    def test_init_invalid_max_concurrency(self, max_concurrency, exc_raise, mock_get_user_id, mock_login):
+        """Тест на проверку невалидного max_concurrency"""
+        with self.assertRaises(exc_raise):
+            MangabuffParser(mail=VALID_EMAIL, password=VALID_PASSWORD, max_concurrency=max_concurrency)
+        mock_login.assert_not_called()
+        mock_get_user_id.assert_not_called()
+
+    @parameterized.expand([
+        ("", ValueError),
+        ("  ", ValueError),
+        (None, TypeError),
+    ])
+    @patch.object(MangabuffParser, "_login")
+    @patch.object(MangabuffParser, "_get_user_id")
+    def test_init_invalid_base_url(self, base_url, exc_raise, mock_get_user_id, mock_login):
+        """Тест на проверку невалидного base_url"""
+        with self.assertRaises(exc_raise):
+            MangabuffParser(mail=VALID_EMAIL, password=VALID_PASSWORD, base_url=base_url)
+        mock_login.assert_not_called()
+
+    @patch.object(MangabuffParser, "_login")
+    @patch.object(MangabuffParser, "_get_user_id")
+    def test_init_base_url(self, mock_get_user_id, mock_login):
+        """Тест адреса сайта без завершающего слэша"""
+        parser = MangabuffParser(mail=VALID_EMAIL, password=VALID_PASSWORD, base_url=" http://127.0.0.1:8080/ ")
+        self.assertEqual(parser._base_url, "http://127.0.0.1:8080")
+        self.assertEqual(MangabuffParser(mail=VALID_EMAIL, password=VALID_PASSWORD)._base_url, MANGABUFF_URL)
+
     @patch.object(MangabuffParser, "_get_user_id")
     def test_csrf_not_found(self, mock_get_user_id):
         """Тест на отсутствие CSRF токена"""
@@ -158,6 +204,19 @@ class TestGetCardsLots(TestCase):
         with patch("requests.Session", return_value=cls.mock_session):
             cls.parser = MangabuffParser(mail=VALID_EMAIL, password=VALID_PASSWORD)
 
+        cls.mock_client = MagicMock()
+        cls.mock_client.get = AsyncMock()
+        cls.mock_client.aclose = AsyncMock()
+
+    def run_in_scan(self, coroutine_function, on_group=None, **kwargs):
+        """Запуск корутины парсера внутри сканирования с замоканным httpx клиентом"""
+        async def runner():
+            async with self.parser._scan_session(on_group=on_group):
+                return await coroutine_function(**kwargs)
+
+        with patch("httpx.AsyncClient", return_value=self.mock_client):
+            return asyncio.run(runner())
+
     @parameterized.expand([
         (1, True, CardRank.X, TypeError),
         ("test query", dict(), CardRank.X, TypeError),
@@ -268,25 +327,176 @@ class TestGetCardsLots(TestCase):
         ])
 
 
+class TestIterCardsLots(TestGetCardsLots):
+    def setUp(self):
+        self.mock_client.get.reset_mock(return_value=True, side_effect=True)
+        self.mock_client.get.side_effect = lambda url, **_: mock_response(
+            f"<div class=\"{CARD_SHOW_SELECTOR}\" data-name=\"{url.rsplit('/', 1)[-1]}\">"
+            f"<div class=\"{CARD_SHOW_ITEM_SELECTOR}\">"
+            f"<div class=\"{CARD_SHOW_ITEM_PRICE_SELECTOR}\">1 ₽</div>"
+            f"</div>"
+            f"</div>"
+        )
+        self.market = [CardInfo(data_id=str(data_id), rank=CardRank(CardRank.X)) for data_id in range(1, 4)]
+
+    def test_iter_cards_lots(self):
+        """Тест отдачи карт по одной с загруженными лотами"""
+        with patch.object(MangabuffParser, "_parse_market", return_value=self.market), \
+                patch("httpx.AsyncClient", return_value=self.mock_client):
+            result = list(self.parser.iter_cards_lots(query="test"))
+
+        self.assertEqual(
+            sorted((card.data_id, card.name, card.manga_name, card.lots) for card in result),
+            [("1", "1", "test", [Lot(1)]), ("2", "2", "test", [Lot(1)]), ("3", "3", "test", [Lot(1)])]
+        )
+
+    def test_iter_cards_lots_break(self):
+        """Тест отмены сканирования при выходе из цикла"""
+        with patch.object(MangabuffParser, "_parse_market", return_value=self.market), \
+                patch("httpx.AsyncClient", return_value=self.mock_client):
+            cards = self.parser.iter_cards_lots(query="test")
+            first = next(cards)
+            cards.close()
+
+        self.assertEqual(first.lots, [Lot(1)])
+        self.assertIsNone(self.parser._fetcher)
+        self.assertIsNone(self.parser._on_card)
+
+    def test_iter_cards_lots_bounded_queue(self):
+        """Тест: сканирование ждёт потребителя при полной очереди и отменяется с полной очередью"""
+        with patch("src.MangabuffParser.STREAM_QUEUE_SIZE", 1), \
+                patch.object(MangabuffParser, "_parse_market", return_value=self.market), \
+                patch("httpx.AsyncClient", return_value=self.mock_client):
+            result = list(self.parser.iter_cards_lots(query="test"))
+            cards = self.parser.iter_cards_lots(query="test")
+            next(cards)
+            cards.close()
+
+        self.assertEqual(sorted(card.data_id for card in result), ["1", "2", "3"])
+        self.assertIsNone(self.parser._fetcher)
+
+    def test_iter_cards_lots_except(self):
+        """Тест исключения неверных аргументов из генератора"""
+        with self.assertRaises(ValueError):
+            list(self.parser.iter_cards_lots())
+
+
 class TestParseMarket(TestGetCardsLots):
     def setUp(self):
-        self.mock_session.get.reset_mock(return_value=True, side_effect=True)
-    
+        self.mock_client.get.reset_mock(return_value=True, side_effect=True)
+
     @parameterized.expand([
-        ("url?q=q", [CardRank.X,]),
-        ("url?q=q", list(CardRank))
+        ("url?q=q", [CardRank.X,], ["url?q=q&rank=x&page=1"]),
+        ("url?q=q", [CardRank.X, CardRank.S], ["url?q=q&rank=x&page=1", "url?q=q&rank=s&page=1"]),
+        ("url?q=q", list(CardRank), ["url?q=q&page=1"])
     ])
-    def test_prase_market_url_build(self, input_url, input_rank):
+    def test_prase_market_url_build(self, input_url, input_rank, expect_urls):
         """Тест построения url"""
-        self.mock_session.get.return_value = MagicMock(content="<html></html>")
+        self.mock_client.get.return_value = mock_response("<html></html>")
 
         calls = list()
-        for rank in input_rank:
-            calls.append(call(f"{input_url}&rank={rank}&page=1", timeout=10))
-            calls.append(call().raise_for_status())
+        for url in expect_urls:
+            calls.append(call(url, timeout=10))
+
+        self.run_in_scan(self.parser._parse_market, url=input_url, rank=input_rank)
+        self.mock_client.get.assert_has_calls(calls, any_order=True)
+        self.assertEqual(self.mock_client.get.call_count, len(expect_urls))
+
+    def test_parse_market_rank_from_markup(self):
+        """Тест обхода без фильтра по рангу, ранг и число страниц читаются из разметки"""
+        pages = {
+            "url?q=q&page=1":
+                f"<div class=\"{MARKET_LIST_CARDS_SELECTOR}\">"
+                f"<div class=\"{MARKET_CARDS_WRAPPER_SELECTOR}\" data-id=\"1\" data-rank=\"s\"></div>"
+                f"<div class=\"{MARKET_CARDS_WRAPPER_SELECTOR}\" data-id=\"2\">"
+                f"<div class=\"manga-cards__item\" data-rank=\"A\"></div></div>"
+                f"</div>"
+                f"<a href=\"/market?want=1&page=2\">2</a><a href=\"/market?want=1&page=3\">3</a>",
+            "url?q=q&page=2":
+                f"<div class=\"{MARKET_LIST_CARDS_SELECTOR}\">"
+                f"<div class=\"{MARKET_CARDS_WRAPPER_SELECTOR}\" data-id=\"3\" data-rank=\"x\"></div>"
+                f"</div>",
+            "url?q=q&page=3":
+                f"<div class=\"{MARKET_LIST_CARDS_SELECTOR}\">"
+                f"<div class=\"{MARKET_CARDS_WRAPPER_SELECTOR}\" data-id=\"4\" data-rank=\"x\"></div>"
+                f"</div>",
+        }
+        self.mock_client.get.side_effect = lambda url, **_: mock_response(pages.get(url, "<html></html>"))
+
+        result = self.run_in_scan(self.parser._parse_market, url="url?q=q", rank=list(CardRank))
+
+        self.assertDictEqual(
+            {card.data_id: card.rank for card in result},
+            {"1": CardRank.S, "2": CardRank.A, "3": CardRank.X, "4": CardRank.X}
+        )
+        self.mock_client.get.assert_has_calls([call(url, timeout=10) for url in pages], any_order=True)
+        # Последняя страница известна из пагинации, пустая после неё не запрашивается
+        self.assertEqual(self.mock_client.get.call_count, len(pages))
+        self.assertEqual(self.parser.last_scan_requests, len(pages))
+
+    def test_parse_market_rank_fallback(self):
+        """Тест обхода по рангам, когда ранг не читается из разметки"""
+        page = (
+            f"<div class=\"{MARKET_LIST_CARDS_SELECTOR}\">"
+            f"<div class=\"{MARKET_CARDS_WRAPPER_SELECTOR}\" data-id=\"1\"></div>"
+            f"</div>"
+        )
+        pages = {"url?q=q&page=1": page, "url?q=q&rank=s&page=1": page}
+        self.mock_client.get.side_effect = lambda url, **_: mock_response(pages.get(url, "<html></html>"))
 
-        self.parser._parse_market(url=input_url, rank=input_rank)
-        self.mock_session.get.assert_has_calls(calls)
+        result = self.run_in_scan(self.parser._parse_market, url="url?q=q", rank=list(CardRank))
+
+        self.assertEqual([(card.data_id, card.rank) for card in result], [("1", CardRank.S)])
+        self.assertEqual(self.mock_client.get.call_count, 1 + len(CardRank) + 1)
+
+    def test_parse_market_too_many_pages(self):
+        """Тест: список без фильтра длиннее лимита страниц обходится по рангам, а не обрезается"""
+        max_pages = 3
+        card = (
+            f"<div class=\"{MARKET_LIST_CARDS_SELECTOR}\">"
+            f"<div class=\"{MARKET_CARDS_WRAPPER_SELECTOR}\" data-id=\"{{}}\" data-rank=\"s\"></div>"
+            f"</div>"
+        )
+        pages = {
+            "url?q=q&page=1": card.format(1) + f"<a href=\"/market?q=q&page={max_pages + 1}\">last</a>",
+            "url?q=q&rank=s&page=1": card.format(2) + f"<a href=\"/market?q=q&rank=s&page={max_pages + 1}\">last</a>",
+        }
+        self.mock_client.get.side_effect = lambda url, **_: mock_response(
+            pages.get(url, card.format(3) if "rank=s" in url else "<html></html>")
+        )
+
+        with self.assertLogs("src.MangabuffParser", level="WARNING") as logs, \
+                patch("src.MangabuffParser.MARKET_MAX_PAGES", max_pages), \
+                patch.object(self.parser, "_limiter", AdaptiveRateLimiter(delay=0, min_delay=0, max_delay=0)):
+            result = self.run_in_scan(self.parser._parse_market, url="url?q=q", rank=list(CardRank))
+
+        requested = [request.args[0] for request in self.mock_client.get.call_args_list]
+        self.assertNotIn("url?q=q&page=2", requested)
+        self.assertEqual(len([url for url in requested if "rank=s" in url]), max_pages)
+        self.assertEqual({card.data_id for card in result}, {"2", "3"})
+        self.assertIn("limit", logs.output[0])
+
+    def test_crawl_pages_cancel_on_error(self):
+        """Тест: ошибка одной страницы отменяет загрузку остальных до обхода по рангам"""
+        finished = list()
+
+        async def get_page(url, parse_page, content=None):
+            if url.endswith("page=1"):
+                return ListingPage(items=[CardInfo(data_id="1", rank=CardRank.X)], last_page=3)
+            if url.endswith("page=2"):
+                raise RankNotFound("Ранг карты не найден в разметке")
+            await asyncio.sleep(0.1)
+            finished.append(url)
+
+        async def crawl():
+            result = await self.parser._crawl_unranked(url="url?", parse_page=None, max_pages=3)
+            # Без отмены загрузка третьей страницы закончилась бы здесь
+            await asyncio.sleep(0.2)
+            return result
+
+        with patch.object(self.parser, "_get_page", side_effect=get_page):
+            self.assertIsNone(asyncio.run(crawl()))
+        self.assertEqual(finished, [])
 
     @parameterized.expand([
         (
@@ -317,9 +527,9 @@ class TestParseMarket(TestGetCardsLots):
         """Тест функции _parse_market"""
         content_side_effect = list()
         for content in mock_content:
-            content_side_effect.append(MagicMock(content=content))
-        self.mock_session.get.side_effect = content_side_effect
-        result = self.parser._parse_market(url="url?q=q", rank=[CardRank(CardRank.X),])
+            content_side_effect.append(mock_response(content))
+        self.mock_client.get.side_effect = content_side_effect
+        result = self.run_in_scan(self.parser._parse_market, url="url?q=q", rank=[CardRank(CardRank.X),])
 
         result = set(result)
         expect_result = set(expect_result)
@@ -329,37 +539,54 @@ class TestParseMarket(TestGetCardsLots):
 
 class TestParseWishList(TestGetCardsLots):
     def setUp(self):
-        self.mock_session.get.reset_mock(return_value=True, side_effect=True)
+        self.mock_client.get.reset_mock(return_value=True, side_effect=True)
 
     def test_parse_wish_list_url_build(self):
         """Тест построения url функции _parse_wish_list"""
-        self.mock_session.get.return_value.content = "<html></html>"
+        self.mock_client.get.return_value = mock_response("<html></html>")
 
-        calls = list()
-        for rank in CardRank:
-            calls.append(call(f"{MANGABUFF_URL}/cards/{self.user_id}/offers?type_w=0&type={rank}&page=1", timeout=10))
-            calls.append(call().raise_for_status())
+        self.run_in_scan(self.parser._parse_wish_list)
+        self.mock_client.get.assert_called_once_with(
+            f"{MANGABUFF_URL}/cards/{self.user_id}/offers?type_w=0&page=1",
+            timeout=10
+        )
 
-        self.parser._parse_wish_list()
-        self.mock_session.get.assert_has_calls(calls)
+    def test_parse_wish_list_rank_from_markup(self):
+        """Тест обхода списка желаемого без фильтра по рангу"""
+        url = f"{MANGABUFF_URL}/cards/{self.user_id}/offers?type_w=0"
+        pages = {
+            f"{url}&page=1":
+                f"<div class=\"{WISH_LIST_CARDS_SELECTOR}\" data-card-id=\"1\" data-rank=\"s\""
+                f" data-name=\"test 1\" data-manga-name=\"test manga name\"></div>"
+                f"<div class=\"{WISH_LIST_CARDS_SELECTOR}\" data-card-id=\"2\" data-rank=\"g\""
+                f" data-name=\"test 2\" data-manga-name=\"test manga name\"></div>",
+            f"{url}&page=2":
+                f"<div class=\"{WISH_LIST_CARDS_SELECTOR}\" data-card-id=\"3\" data-rank=\"x\""
+                f" data-name=\"test 3\" data-manga-name=\"test manga name\"></div>",
+        }
+        self.mock_client.get.side_effect = lambda url, **_: mock_response(pages.get(url, "<html></html>"))
+
+        result = self.run_in_scan(self.parser._parse_wish_list)
+
+        self.assertDictEqual(
+            {card.data_id: card.rank for card in result},
+            {"1": CardRank.S, "2": CardRank.G, "3": CardRank.X}
+        )
+        self.assertEqual(self.mock_client.get.call_count, len(pages) + 1)
 
     def test_parse_wish_list(self):
         """Тест parse_wish_list"""
         mock_content = list()
-        for _ in range(0, len(CardRank)):
-            mock_content.append(MagicMock(content="<html></html>"))
 
-        mock_content[0] = MagicMock(
-            content=
+        mock_content.append(mock_response(
             f"<div class=\"{WISH_LIST_CARDS_SELECTOR}\" data-card-id=\"1\""
             f" data-name=\"test 1\" data-manga-name=\"test manga name\"></div>"
             f"<div class=\"{WISH_LIST_CARDS_SELECTOR}\" data-card-id=\"2\""
             f" data-name=\"test 2\" data-manga-name=\"test manga name\"></div>"
             f"<div class=\"{WISH_LIST_CARDS_SELECTOR}\" data-card-id=\"3\""
             f" data-name=\"test 3\" data-manga-name=\"test manga name\"></div>"
-        )
-        mock_content.insert(1, MagicMock(
-            content=
+        ))
+        mock_content.append(mock_response(
             f"<div class=\"{WISH_LIST_CARDS_SELECTOR}\" data-card-id=\"2\""
             f" data-name=\"test 2\" data-manga-name=\"test manga name\"></div>"
             f"<div class=\"{WISH_LIST_CARDS_SELECTOR}\" data-card-id=\"3\""
@@ -369,8 +596,7 @@ class TestParseWishList(TestGetCardsLots):
             f"<div class=\"{WISH_LIST_CARDS_SELECTOR}\" data-card-id=\"5\""
             f" data-name=\"test 5\" data-manga-name=\"test manga name\"></div>"
         ))
-        mock_content.insert(2, MagicMock(
-            content=
+        mock_content.append(mock_response(
             f"<div class=\"{WISH_LIST_CARDS_SELECTOR}\" data-card-id=\"\""
             f" data-name=\"test\" data-manga-name=\"test manga name\"></div>"
             f"<div class=\"{WISH_LIST_CARDS_SELECTOR}\" data-card-id=\"6\""
@@ -380,7 +606,7 @@ class TestParseWishList(TestGetCardsLots):
             f"<div class=\"{WISH_LIST_CARDS_SELECTOR}\" data-card-id=\"8\""
             f" data-name=\"test 8\" data-manga-name=\"test manga name\"></div>"
         ))
-        mock_content.insert(3, MagicMock(content="<html></html>"))
+        mock_content.append(mock_response("<html></html>"))
 
         expect_result = [
             CardInfo(data_id="1", rank=CardRank(list(CardRank)[0]), name="test 1", manga_name="test manga name"),
@@ -391,21 +617,78 @@ class TestParseWishList(TestGetCardsLots):
             CardInfo(data_id="8", rank=CardRank(list(CardRank)[0]), name="test 8", manga_name="test manga name"),
         ]
 
-        self.mock_session.get.side_effect = mock_content
+        unranked_url = f"{MANGABUFF_URL}/cards/{self.user_id}/offers?type_w=0&page=1"
+        first_rank_url = f"{MANGABUFF_URL}/cards/{self.user_id}/offers?type_w=0&type={list(CardRank)[0]}&page="
+        first_rank_pages = iter(mock_content)
 
-        result = set(self.parser._parse_wish_list())
+        def get_side_effect(url, **_):
+            if url == unranked_url:
+                return mock_content[0]
+            if url.startswith(first_rank_url):
+                return next(first_rank_pages)
+            return mock_response("<html></html>")
+
+        self.mock_client.get.side_effect = get_side_effect
+
+        result = set(self.run_in_scan(self.parser._parse_wish_list))
         expect_result = set(expect_result)
 
         self.assertSetEqual(result, expect_result)
 
+    def test_parse_wish_list_cache_hit(self):
+        """Тест списка желаемого из кэша, загружается только первая страница"""
+        cached = [CardInfo(data_id="1", rank=CardRank.S, name="test 1", manga_name="test manga name")]
+        mock_cache = MagicMock()
+        mock_cache.load.return_value = cached
+        self.mock_client.get.return_value = mock_response(
+            f"<div class=\"{WISH_LIST_CARDS_SELECTOR}\" data-card-id=\"1\" data-rank=\"s\""
+            f" data-name=\"test 1\" data-manga-name=\"test manga name\"></div>"
+        )
+
+        with patch.object(self.parser, "_wish_list_cache", mock_cache):
+            result = self.run_in_scan(self.parser._parse_wish_list)
+
+        self.assertEqual(result, cached)
+        self.assertEqual(self.mock_client.get.call_count, 1)
+        mock_cache.load.assert_called_once_with(
+            user_id=self.user_id,
+            fingerprint=MangabuffParser._wish_list_fingerprint(
+                self.parser._html.wish_list_page(self.mock_client.get.return_value.content)
+            )
+        )
+        mock_cache.save.assert_not_called()
+
+    def test_parse_wish_list_cache_miss(self):
+        """Тест обхода и сохранения списка при промахе кэша, первая страница не загружается повторно"""
+        mock_cache = MagicMock()
+        mock_cache.load.return_value = None
+        url = f"{MANGABUFF_URL}/cards/{self.user_id}/offers?type_w=0"
+        pages = {
+            f"{url}&page=1":
+                f"<div class=\"{WISH_LIST_CARDS_SELECTOR}\" data-card-id=\"1\" data-rank=\"s\""
+                f" data-name=\"test 1\" data-manga-name=\"test manga name\"></div>",
+        }
+        self.mock_client.get.side_effect = lambda url, **_: mock_response(pages.get(url, "<html></html>"))
+
+        with patch.object(self.parser, "_wish_list_cache", mock_cache):
+            result = self.run_in_scan(self.parser._parse_wish_list)
+
+        self.assertEqual([card.data_id for card in result], ["1"])
+        self.assertEqual(self.mock_client.get.call_count, 2)
+        mock_cache.save.assert_called_once()
+        self.assertEqual(
+            [card.data_id for card in mock_cache.save.call_args.kwargs["cards"]],
+            ["1"]
+        )
+
 
 class TestParseCardsLots(TestGetCardsLots):
     def setUp(self):
-        self.mock_session.get.reset_mock(return_value=True, side_effect=True)
+        self.mock_client.get.reset_mock(return_value=True, side_effect=True)
 
     def test_url_build(self):
         """Тест построения url"""
-        self.mock_session.get.return_value = MagicMock(content="<html></html>")
+        self.mock_client.get.return_value = mock_response("<html></html>")
         input_data = [
             CardInfo(data_id="1", rank=CardRank(CardRank.X)),
             CardInfo(data_id="2", rank=CardRank(CardRank.X)),
@@ -416,10 +699,9 @@ class TestParseCardsLots(TestGetCardsLots):
         calls = list()
         for card in input_data:
             calls.append(call(f"{MANGABUFF_URL}/market/card/{card.data_id}", timeout=10))
-            calls.append(call().raise_for_status())
 
-        self.parser._parse_cards_lots(cards_list=input_data)
-        self.mock_session.get.assert_has_calls(calls)
+        self.run_in_scan(self.parser._parse_cards_lots, cards_list=input_data)
+        self.mock_client.get.assert_has_calls(calls, any_order=True)
 
     @parameterized.expand([
         (
@@ -429,22 +711,22 @@ class TestParseCardsLots(TestGetCardsLots):
                 CardInfo(data_id="3", rank=CardRank(CardRank.X))
             ],
             [
-                CardInfo(data_id="1", rank=CardRank(CardRank.X), name='1', lots=['2X', '3X']),
-                CardInfo(data_id="2", rank=CardRank(CardRank.X), name='2', lots=['2X']),
+                CardInfo(data_id="1", rank=CardRank(CardRank.X), name='1', lots=[Lot(2, "10"), Lot(3)]),
+                CardInfo(data_id="2", rank=CardRank(CardRank.X), name='2', lots=[Lot(1200)]),
                 CardInfo(data_id="3", rank=CardRank(CardRank.X), name='3', lots=[]),
             ],
             [
                 f"<div class=\"{CARD_SHOW_SELECTOR}\" data-name=\"1\">"
                 f"<div class=\"{CARD_SHOW_ITEM_SELECTOR}\">"
-                f"<div class=\"{CARD_SHOW_ITEM_PRICE_SELECTOR}\">2X</div>"
+                f"<div class=\"{CARD_SHOW_ITEM_PRICE_SELECTOR}\">  3  </div>"
                 f"</div>"
-                f"<div class=\"{CARD_SHOW_ITEM_SELECTOR}\">"
-                f"<div class=\"{CARD_SHOW_ITEM_PRICE_SELECTOR}\">  3X  </div>"
+                f"<div class=\"{CARD_SHOW_ITEM_SELECTOR}\" data-id=\"10\">"
+                f"<div class=\"{CARD_SHOW_ITEM_PRICE_SELECTOR}\">2 ₽</div>"
                 f"</div>"
                 f"</div>",
                 f"<div class=\"{CARD_SHOW_SELECTOR}\" data-name=\"2\">"
                 f"<div class=\"{CARD_SHOW_ITEM_SELECTOR}\">"
-                f"<div class=\"{CARD_SHOW_ITEM_PRICE_SELECTOR}\">2X</div>"
+                f"<div class=\"{CARD_SHOW_ITEM_PRICE_SELECTOR}\">1 200</div>"
                 f"</div>"
                 f"</div>",
                 f"<div class=\"{CARD_SHOW_SELECTOR}\" data-name=\"3\">"
@@ -470,12 +752,12 @@ class TestParseCardsLots(TestGetCardsLots):
     ])
     def test_parse_cards_lots(self, input_data, expect_result, mock_content):
         """Тест функции _parse_cards_lots"""
-        content_side_effect = list()
-        for content in mock_content:
-            content_side_effect.append(MagicMock(content=content))
-        self.mock_session.get.side_effect = content_side_effect
+        content_by_url = dict()
+        for card, content in zip(input_data, mock_content):
+            content_by_url[f"{MANGABUFF_URL}/market/card/{card.data_id}"] = mock_response(content)
+        self.mock_client.get.side_effect = lambda url, **_: content_by_url[url]
 
-        result = self.parser._parse_cards_lots(cards_list=input_data)
+        result = self.run_in_scan(self.parser._parse_cards_lots, cards_list=input_data)
 
         result = set(result)
         expect_result = set(expect_result)
@@ -486,7 +768,92 @@ class TestParseCardsLots(TestGetCardsLots):
             self.assertEqual(card1.data_id, card2.data_id)
             self.assertEqual(card1.rank, card2.rank)
             self.assertEqual(card1.name, card2.name)
-            self.assertListEqual(card1.lots, card2.lots)
+            self.assertEqual(card1.lots, card2.lots)
+
+    def test_parse_cards_lots_groups(self):
+        """Тест передачи тайтлов по мере готовности их лотов"""
+        self.mock_client.get.return_value = mock_response("<html></html>")
+        input_data = [
+            CardInfo(data_id="1", rank=CardRank(CardRank.X), manga_name="second manga"),
+            CardInfo(data_id="2", rank=CardRank(CardRank.X), manga_name="first manga"),
+            CardInfo(data_id="3", rank=CardRank(CardRank.X), manga_name="second manga"),
+        ]
+        groups = list()
+
+        result = self.run_in_scan(
+            self.parser._parse_cards_lots,
+            on_group=lambda cards: groups.append([card.data_id for card in cards]),
+            cards_list=input_data
+        )
+
+        self.assertEqual(groups, [["2"], ["1", "3"]])
+        self.assertEqual([card.data_id for card in result], ["1", "2", "3"])
+        self.assertIsNone(self.parser._on_group)
+
+    def test_parse_cards_lots_price_history(self):
+        """Тест записи результата в историю цен"""
+        self.mock_client.get.return_value = mock_response("<html></html>")
+        input_data = [CardInfo(data_id="1", rank=CardRank(CardRank.X))]
+        mock_history = MagicMock()
+
+        with patch.object(self.parser, "_price_history", mock_history):
+            self.run_in_scan(self.parser._parse_cards_lots, cards_list=input_data)
+
+        mock_history.append.assert_called_once_with(input_data)
+
+    def test_parse_cards_lots_snapshots(self):
+        """Тест пропуска загрузки лотов карты, не изменившейся в выдаче"""
+        snapshots = LotSnapshotStore(path=":memory:")
+        snapshots.save(data_id="1", signal="3 лота", name="1", lots=[Lot(2)])
+        snapshots.save(data_id="2", signal="1 лот", name="2", lots=[Lot(2)])
+        input_data = [
+            CardInfo(data_id="1", rank=CardRank(CardRank.X), market_signal="3 лота"),
+            CardInfo(data_id="2", rank=CardRank(CardRank.X), market_signal="2 лота"),
+        ]
+        self.mock_client.get.return_value = mock_response(
+            f"<div class=\"{CARD_SHOW_SELECTOR}\" data-name=\"2\">"
+            f"<div class=\"{CARD_SHOW_ITEM_SELECTOR}\">"
+            f"<div class=\"{CARD_SHOW_ITEM_PRICE_SELECTOR}\">5</div>"
+            f"</div>"
+            f"</div>"
+        )
+
+        with patch.object(self.parser, "_lot_snapshots", snapshots):
+            result = self.run_in_scan(self.parser._parse_cards_lots, cards_list=input_data)
+
+        self.assertEqual([card.lots for card in result], [[Lot(2)], [Lot(5)]])
+        self.mock_client.get.assert_called_once_with(f"{MANGABUFF_URL}/market/card/2", timeout=10)
+        self.assertEqual(self.parser.last_scan_lots_skipped, 1)
+        self.assertEqual(self.parser.last_scan_lots_changed, 1)
+        self.assertEqual(snapshots.load(data_id="2", signal="2 лота").lots, [Lot(5)])
+
+        # Признак в выдаче изменился, а страница та же: загружена, но не изменилась
+        input_data = [CardInfo(data_id="2", rank=CardRank(CardRank.X), market_signal="3 лота")]
+        with patch.object(self.parser, "_lot_snapshots", snapshots):
+            self.run_in_scan(self.parser._parse_cards_lots, cards_list=input_data)
+        self.assertEqual((self.parser.last_scan_lots_skipped, self.parser.last_scan_lots_changed), (0, 0))
+        snapshots.close()
+
+    def test_parse_cards_lots_resumed(self):
+        """Тест: лоты с контрольной точки считаются отдельно от пропусков по снимкам"""
+        checkpoint = ScanCheckpoint(path=":memory:")
+        checkpoint.save_card(namespace=self.user_id, data_id="1", signal="3 лота", name="1", lots=[Lot(2)])
+        snapshots = LotSnapshotStore(path=":memory:")
+        snapshots.save(data_id="2", signal="1 лот", name="2", lots=[Lot(3)])
+        input_data = [
+            CardInfo(data_id="1", rank=CardRank(CardRank.X), market_signal="3 лота"),
+            CardInfo(data_id="2", rank=CardRank(CardRank.X), market_signal="1 лот"),
+        ]
+        self.mock_client.get.reset_mock()
+
+        with patch.object(self.parser, "_lot_snapshots", snapshots), patch.object(self.parser, "_checkpoint", checkpoint):
+            result = self.run_in_scan(self.parser._parse_cards_lots, cards_list=input_data)
+
+        self.assertEqual([card.lots for card in result], [[Lot(2)], [Lot(3)]])
+        self.mock_client.get.assert_not_called()
+        self.assertEqual((self.parser.last_scan_lots_resumed, self.parser.last_scan_lots_skipped), (1, 1))
+        checkpoint.close()
+        snapshots.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,67 @@
+from unittest import TestCase, main
+
+from src.MangabuffParser import CardInfo, CardRank, Lot
+from src.MarketDelta import MarketDelta, CardDelta
+from resources.messages import MANGA_NAME_OUTPUT_STRING
+
+
+def card(data_id, lots, manga_name="manga"):
+    return CardInfo(data_id=data_id, rank=CardRank.S, name=f"test {data_id}", manga_name=manga_name, lots=lots)
+
+
+class TestMarketDelta(TestCase):
+    def test_no_changes(self):
+        """Тест отсутствия изменений при тех же лотах в другом порядке"""
+        delta = MarketDelta.compute([card("1", [Lot(10), Lot(20)])], [card("1", [Lot(20), Lot(10)])])
+        self.assertFalse(delta)
+        self.assertEqual(delta.out_list(), "")
+
+    def test_card_delta(self):
+        """Тест новых, снятых лотов и изменения цены с учётом повторов"""
+        delta = CardDelta.between(
+            card("1", [Lot(10), Lot(10), Lot(20)]),
+            card("1", [Lot(10), Lot(15), Lot(30), Lot(40)])
+        )
+
+        self.assertEqual(delta.changed, [(Lot(10), Lot(15)), (Lot(20), Lot(30))])
+        self.assertEqual(delta.added, [Lot(40)])
+        self.assertEqual(delta.removed, [])
+
+    def test_card_delta_by_lot_id(self):
+        """Тест изменения цены лота с тем же lot_id"""
+        delta = CardDelta.between(
+            card("1", [Lot(10, "a"), Lot(20, "b")]),
+            card("1", [Lot(5, "c"), Lot(25, "a"), Lot(20, "b")])
+        )
+
+        self.assertEqual(delta.changed, [(Lot(10, "a"), Lot(25, "a"))])
+        self.assertEqual(delta.added, [Lot(5, "c")])
+
+    def test_new_and_removed_cards(self):
+        """Тест карт, появившихся и пропавших с торговой площадки"""
+        delta = MarketDelta.compute(
+            [card("1", [Lot(10)]), card("2", [Lot(20)])],
+            [card("2", [Lot(20)]), card("3", [Lot(30)])]
+        )
+
+        self.assertEqual([(item.card.data_id, item.added, item.removed) for item in delta.cards], [
+            ("3", [Lot(30)], []),
+            ("1", [], [Lot(10)]),
+        ])
+
+    def test_out_list(self):
+        """Тест вывода изменений с группировкой по тайтлам"""
+        delta = MarketDelta.compute(
+            [],
+            [card("1", [Lot(10)], "second manga"), card("2", [Lot(20)], "first manga")]
+        )
+
+        self.assertEqual(
+            delta.out_list(),
+            MANGA_NAME_OUTPUT_STRING.format(title="first manga") + "\n" + f"{delta.cards[1]}\n"
+            + MANGA_NAME_OUTPUT_STRING.format(title="second manga") + "\n" + f"{delta.cards[0]}\n"
+        )
+
+
+if __name__ == '__main__':
+    main()
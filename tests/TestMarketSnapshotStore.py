@@ -0,0 +1,40 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from src.MangabuffParser import CardInfo, CardRank, Lot
+from src.MarketSnapshotStore import MarketSnapshotStore
+
+
+class TestMarketSnapshotStore(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = Path(self.directory.name) / "snapshot.json"
+        self.store = MarketSnapshotStore(path=self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_load_empty(self):
+        """Тест отсутствия снимка"""
+        self.assertIsNone(self.store.load())
+
+    def test_save_load(self):
+        """Тест сохранения и загрузки снимка"""
+        cards = [CardInfo(data_id="1", rank=CardRank.S, name="test 1", manga_name="манга", lots=[Lot(10, "5")])]
+        self.store.save(cards)
+        result = self.store.load()
+
+        self.assertEqual(
+            [(card.data_id, card.rank.value, card.name, card.manga_name, card.lots) for card in result],
+            [("1", "s", "test 1", "манга", [Lot(10, "5")])]
+        )
+
+    def test_load_broken(self):
+        """Тест повреждённого снимка"""
+        self.path.write_text("{", encoding="utf-8")
+        self.assertIsNone(self.store.load())
+
+
+if __name__ == '__main__':
+    main()
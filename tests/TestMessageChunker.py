@@ -0,0 +1,38 @@
+from unittest import TestCase, main
+
+from src.MessageChunker import MessageChunker, split_text, message_length
+
+
+class TestMessageChunker(TestCase):
+    def test_message_length(self):
+        """Тест длины в UTF-16 единицах"""
+        self.assertEqual(message_length("ab"), 2)
+        self.assertEqual(message_length("🃏"), 2)
+
+    def test_blocks_joined(self):
+        """Тест склейки блоков до предела"""
+        chunker = MessageChunker(limit=10)
+
+        self.assertEqual(chunker.add("abc\n"), [])
+        self.assertEqual(chunker.add("def"), [])
+        self.assertEqual(chunker.add("ghij"), ["abc\ndef"])
+        self.assertEqual(chunker.flush(), ["ghij"])
+        self.assertEqual(chunker.flush(), [])
+
+    def test_long_block_split(self):
+        """Тест разбиения блока длиннее предела по строкам, лотам и символам"""
+        chunker = MessageChunker(limit=10)
+
+        ready = chunker.add("title\nline 1\n1|2|3|4|5|6\nabcdefghijklm")
+        ready.extend(chunker.flush())
+
+        self.assertEqual(ready, ["title", "line 1", "1|2|3|4|5", "6", "abcdefghij", "klm"])
+        self.assertTrue(all(message_length(text) <= 10 for text in ready))
+
+    def test_split_short_text(self):
+        """Тест текста, который помещается целиком"""
+        self.assertEqual(split_text("text", limit=10), ["text"])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from parameterized import parameterized
+
+# Правила хранят CardRank того же модуля, что импортирует PriceAlerts
+from MangabuffParser import CardInfo, CardRank, Lot
+from src.PriceAlerts import PriceAlerts
+
+
+def card(data_id, prices, rank=CardRank.S, manga_name="test manga"):
+    return CardInfo(
+        data_id=data_id,
+        rank=rank,
+        name=f"test {data_id}",
+        manga_name=manga_name,
+        lots=[Lot(price) for price in prices]
+    )
+
+
+class TestPriceAlerts(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = Path(self.directory.name) / "alerts.sqlite3"
+        self.alerts = PriceAlerts(path=self.path)
+
+    def tearDown(self):
+        self.alerts.close()
+        self.directory.cleanup()
+
+    @parameterized.expand([
+        ("card", {"data_id": "1"}, card("1", [90]), True),
+        ("card_other", {"data_id": "1"}, card("2", [90]), False),
+        ("manga", {"manga_name": "Test Manga"}, card("1", [90]), True),
+        ("manga_rank", {"manga_name": "test manga", "rank": CardRank.S}, card("1", [90]), True),
+        ("manga_other_rank", {"manga_name": "test manga", "rank": CardRank.A}, card("1", [90]), False),
+        ("rank", {"rank": CardRank.S}, card("1", [90]), True),
+        ("price_equal", {"data_id": "1"}, card("1", [100]), False),
+        ("no_lots", {"data_id": "1"}, card("1", []), False),
+    ])
+    def test_check(self, _, target, checked_card, expected):
+        """Тест срабатывания правила по карте, тайтлу и рангу"""
+        rule = self.alerts.add(below=100, **target)
+        self.assertEqual(self.alerts.check(checked_card), [rule] if expected else [])
+
+    def test_check_repeats_only_on_lower_price(self):
+        """Тест повторного срабатывания только при новой, более низкой цене"""
+        rule = self.alerts.add(below=100, data_id="1")
+
+        self.assertEqual(self.alerts.check(card("1", [90])), [rule])
+        self.assertEqual(self.alerts.check(card("1", [90])), [])
+        self.assertEqual(self.alerts.check(card("1", [80])), [rule])
+        self.assertEqual(self.alerts.check(card("1", [120])), [])
+        self.assertEqual(self.alerts.check(card("1", [95])), [rule])
+
+    def test_check_touches_only_indexed_rules(self):
+        """Тест проверки только правил из корзин карты"""
+        for data_id in range(1000):
+            self.alerts.add(below=100, data_id=str(data_id + 10))
+        rule = self.alerts.add(below=100, manga_name="test manga")
+
+        candidates = [
+            *self.alerts._by_data_id.get("1", ()),
+            *self.alerts._by_manga.get("test manga", ()),
+            *self.alerts._by_rank.get(CardRank.S, ()),
+            *self.alerts._global,
+        ]
+        self.assertEqual(candidates, [rule])
+        self.assertEqual(self.alerts.check(card("1", [50])), [rule])
+
+    def test_remove(self):
+        """Тест удаления правила"""
+        rule = self.alerts.add(below=100, data_id="1")
+
+        self.assertTrue(self.alerts.remove(rule.rule_id))
+        self.assertFalse(self.alerts.remove(rule.rule_id))
+        self.assertEqual(self.alerts.check(card("1", [50])), [])
+        self.assertEqual(len(self.alerts), 0)
+
+    def test_reopen(self):
+        """Тест загрузки правил из базы"""
+        first = self.alerts.add(below=100, manga_name="test manga", rank=CardRank.S)
+        second = self.alerts.add(below=50, data_id="2")
+        self.alerts.close()
+
+        self.alerts = PriceAlerts(path=self.path)
+        self.assertEqual(self.alerts.rules, [first, second])
+        self.assertEqual(self.alerts.check(card("1", [90])), [first])
+
+    def test_reopen_keeps_notified(self):
+        """Тест: после перезапуска уже отправленное оповещение не повторяется"""
+        rule = self.alerts.add(below=100, manga_name="test manga")
+        removed = self.alerts.add(below=100, data_id="1")
+        self.assertEqual(self.alerts.check(card("1", [90])), [removed, rule])
+        self.assertEqual(self.alerts.check(card("2", [90])), [rule])
+        self.assertEqual(self.alerts.check(card("2", [120])), [])
+        self.alerts.remove(removed.rule_id)
+        self.alerts.close()
+
+        self.alerts = PriceAlerts(path=self.path)
+        self.assertEqual(self.alerts._notified, {(rule.rule_id, "1"): 90})
+        self.assertEqual(self.alerts.check(card("1", [90])), [])
+        self.assertEqual(self.alerts.check(card("1", [80])), [rule])
+        self.assertEqual(self.alerts.check(card("2", [90])), [rule])
+
+    @parameterized.expand([
+        ("zero", 0, ValueError),
+        ("negative", -5, ValueError),
+        ("str", "100", TypeError),
+    ])
+    def test_add_invalid(self, _, below, error):
+        """Тест проверки порога"""
+        with self.assertRaises(error):
+            self.alerts.add(below=below, data_id="1")
+
+
+if __name__ == '__main__':
+    main()
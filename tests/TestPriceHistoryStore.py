@@ -0,0 +1,72 @@
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from src.MangabuffParser import CardInfo, CardRank, Lot
+from src.PriceHistoryStore import PriceHistoryStore, PriceStats
+
+
+def card(data_id, prices, name="test", manga_name="test manga"):
+    return CardInfo(
+        data_id=data_id,
+        rank=CardRank.S,
+        name=name,
+        manga_name=manga_name,
+        lots=[Lot(price) for price in prices]
+    )
+
+
+class TestPriceHistoryStore(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.store = PriceHistoryStore(path=self.directory.name)
+        self.store.append([card("1", [10, 30]), card("2", [], name="empty")], timestamp=100)
+        self.store.append([card("1", [20]), card("3", [5], name="other")], timestamp=200)
+        self.store.append([card("1", [40, 50])], timestamp=300)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_stats(self):
+        """Тест статистики за окно"""
+        self.assertEqual(
+            self.store.stats("1", since=0),
+            PriceStats(min_price=10, avg_price=30.0, last_price=40, last_seen=300, scans=3)
+        )
+        self.assertEqual(
+            self.store.stats("1", since=150, until=250),
+            PriceStats(min_price=20, avg_price=20.0, last_price=20, last_seen=200, scans=1)
+        )
+        self.assertIsNone(self.store.stats("1", since=400))
+        self.assertIsNone(self.store.stats("2", since=0))
+
+    def test_reopen(self):
+        """Тест чтения истории после перезапуска"""
+        store = PriceHistoryStore(path=self.directory.name)
+
+        self.assertEqual(len(store), 4)
+        self.assertEqual(store.stats("1", since=0), self.store.stats("1", since=0))
+        self.assertEqual(store.stats("3", since=0).last_price, 5)
+
+    def test_broken_tail(self):
+        """Тест отбрасывания оборванной записи"""
+        with open(f"{self.directory.name}/ts.q", "ab") as f:
+            f.write(b"\x01\x02\x03")
+        with open(f"{self.directory.name}/min.q", "ab") as f:
+            f.write(b"\x00" * 8)
+
+        store = PriceHistoryStore(path=self.directory.name)
+        store.append([card("3", [7])], timestamp=400)
+
+        self.assertEqual(len(store), 5)
+        self.assertEqual(store.stats("3", since=0).last_price, 7)
+        self.assertEqual(len(PriceHistoryStore(path=self.directory.name)), 5)
+
+    def test_find(self):
+        """Тест поиска карт по ID и названию"""
+        self.assertEqual([meta.data_id for meta in self.store.find("3")], ["3"])
+        self.assertEqual([meta.data_id for meta in self.store.find("OTH")], ["3"])
+        self.assertEqual([meta.data_id for meta in self.store.find("test manga")], ["1", "3"])
+
+
+if __name__ == '__main__':
+    main()
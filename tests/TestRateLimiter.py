@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from unittest import TestCase, IsolatedAsyncioTestCase, main
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from parameterized import parameterized
+
+import httpx
+
+from src.RateLimiter import AdaptiveRateLimiter, parse_retry_after, RATE_INCREASE_STEP, BACKOFF_FACTOR
+from src.AsyncFetcher import AsyncFetcher, RATE_LIMIT_RETRIES, RETRIES, RETRY_BACKOFF
+
+
+class TestParseRetryAfter(TestCase):
+    @parameterized.expand([
+        (None, None),
+        ("", None),
+        ("5", 5.0),
+        (" 12 ", 12.0),
+        ("not a date", None),
+    ])
+    def test_parse_retry_after(self, value, expect_result):
+        """Тест разбора Retry-After в секундах"""
+        self.assertEqual(parse_retry_after(value), expect_result)
+
+    def test_parse_retry_after_http_date(self):
+        """Тест разбора Retry-After в формате HTTP даты"""
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+        self.assertAlmostEqual(parse_retry_after(format_datetime(retry_at, usegmt=True)), 30, delta=2)
+
+
+class TestAdaptiveRateLimiter(TestCase):
+    def setUp(self):
+        self.limiter = AdaptiveRateLimiter(delay=2.0, min_delay=0.5, max_delay=8.0)
+
+    def test_increase_on_healthy_responses(self):
+        """Тест аддитивного роста частоты на здоровых ответах"""
+        self.limiter.on_response(status_code=200, latency=0.1)
+        self.assertAlmostEqual(self.limiter.rate, 0.5 + RATE_INCREASE_STEP)
+
+        for _ in range(100):
+            self.limiter.on_response(status_code=200, latency=0.1)
+        self.assertAlmostEqual(self.limiter.delay, 0.5)
+
+    @parameterized.expand([(429,), (500,), (503,)])
+    def test_backoff_on_errors(self, status_code):
+        """Тест мультипликативного замедления на 429 и 5xx"""
+        self.limiter.on_response(status_code=status_code, latency=0.1)
+        self.assertAlmostEqual(self.limiter.delay, 2.0 * BACKOFF_FACTOR)
+
+        for _ in range(10):
+            self.limiter.on_response(status_code=status_code, latency=0.1)
+        self.assertAlmostEqual(self.limiter.delay, 8.0)
+
+    def test_backoff_on_rising_latency(self):
+        """Тест замедления при росте задержки ответа"""
+        for _ in range(10):
+            self.limiter.on_response(status_code=200, latency=0.1)
+        delay = self.limiter.delay
+
+        self.limiter.on_response(status_code=200, latency=1.0)
+        self.assertGreater(self.limiter.delay, delay)
+
+    def test_retry_after_blocks(self):
+        """Тест паузы по Retry-After"""
+        with patch("src.RateLimiter.monotonic", return_value=100.0):
+            self.limiter.on_response(status_code=429, latency=0.1, retry_after=30)
+        self.assertEqual(self.limiter._blocked_until, 130.0)
+
+    def test_wait_spaces_sync_requests(self):
+        """Тест: синхронные запросы ждут свой слот, первый без ожидания"""
+        with patch("src.RateLimiter.monotonic", return_value=100.0), patch("src.RateLimiter.sleep") as mock_sleep:
+            self.assertEqual(self.limiter.reserve(), 0)
+            self.limiter.wait()
+        mock_sleep.assert_called_once_with(2.0)
+
+
+class TestAsyncFetcherRetry(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.limiter = AdaptiveRateLimiter(delay=0, min_delay=0, max_delay=0)
+        self.mock_client = MagicMock()
+        self.mock_client.get = AsyncMock()
+        self.mock_client.aclose = AsyncMock()
+
+    async def fetch(self):
+        with patch("httpx.AsyncClient", return_value=self.mock_client):
+            async with AsyncFetcher(headers={}, cookies={}, limiter=self.limiter, max_concurrency=1) as fetcher:
+                return await fetcher.get("url"), fetcher.requests_count
+
+    async def test_retry_on_429(self):
+        """Тест повтора запроса после 429"""
+        limited = MagicMock(status_code=429, headers={"Retry-After": "0"})
+        success = MagicMock(status_code=200, headers={})
+        self.mock_client.get.side_effect = [limited, success]
+
+        response, requests_count = await self.fetch()
+
+        self.assertIs(response, success)
+        self.assertEqual(requests_count, 2)
+        success.raise_for_status.assert_called_once()
+
+    async def test_retry_limit(self):
+        """Тест ограничения числа повторов"""
+        limited = MagicMock(status_code=429, headers={})
+        self.mock_client.get.return_value = limited
+
+        response, requests_count = await self.fetch()
+
+        self.assertEqual(requests_count, RATE_LIMIT_RETRIES + 1)
+        limited.raise_for_status.assert_called_once()
+
+    async def test_retry_on_server_error(self):
+        """Тест повтора 5xx без Retry-After с экспоненциальной паузой"""
+        failed = MagicMock(status_code=502, headers={})
+        success = MagicMock(status_code=200, headers={})
+        self.mock_client.get.side_effect = [failed, failed, success]
+
+        with patch("asyncio.sleep", new=AsyncMock()) as sleep:
+            response, requests_count = await self.fetch()
+
+        self.assertIs(response, success)
+        self.assertEqual(requests_count, 3)
+        first, second = (call.args[0] for call in sleep.await_args_list)
+        self.assertTrue(RETRY_BACKOFF * 0.5 <= first <= RETRY_BACKOFF)
+        self.assertTrue(RETRY_BACKOFF <= second <= RETRY_BACKOFF * 2)
+
+    async def test_server_error_retry_limit(self):
+        """Тест ограничения числа повторов 5xx"""
+        failed = MagicMock(status_code=502, headers={})
+        self.mock_client.get.return_value = failed
+
+        with patch("asyncio.sleep", new=AsyncMock()):
+            _, requests_count = await self.fetch()
+
+        self.assertEqual(requests_count, RETRIES + 1)
+        failed.raise_for_status.assert_called_once()
+
+    async def test_retry_on_transport_error(self):
+        """Тест повтора после сетевой ошибки и исключения после последней попытки"""
+        self.mock_client.get.side_effect = httpx.ConnectError("refused")
+
+        with patch("asyncio.sleep", new=AsyncMock()):
+            with self.assertRaises(httpx.ConnectError):
+                await self.fetch()
+
+        self.assertEqual(self.mock_client.get.await_count, RETRIES + 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+from unittest import TestCase, IsolatedAsyncioTestCase, main
+from unittest.mock import patch, MagicMock, AsyncMock
+
+import httpx
+
+from src.AsyncFetcher import AsyncFetcher
+from src.RateLimiter import AdaptiveRateLimiter
+from src.ResponseCache import ResponseCache
+
+
+MARKET_URL = "https://mangabuff.ru/market?want=1&page=1"
+LOTS_URL = "https://mangabuff.ru/market/card/1"
+
+
+class TestResponseCache(TestCase):
+    def setUp(self):
+        self.cache = ResponseCache(path=":memory:", max_bytes=100)
+
+    def tearDown(self):
+        self.cache.close()
+
+    def test_store_lookup(self):
+        """Тест сохранения ответа с заголовками валидации"""
+        self.cache.store(MARKET_URL, namespace="1", content=b"page", headers={"ETag": "\"v1\"", "Server": "nginx"})
+        cached = self.cache.lookup(MARKET_URL, namespace="1")
+
+        self.assertEqual(cached.content, b"page")
+        self.assertTrue(cached.fresh)
+        self.assertEqual(cached.validators(), {"If-None-Match": "\"v1\""})
+
+    def test_not_cached_url(self):
+        """Тест пропуска URL вне классов кэша"""
+        self.cache.store("https://mangabuff.ru/login", content=b"page", headers={})
+        self.assertIsNone(self.cache.lookup("https://mangabuff.ru/login"))
+
+    def test_namespace(self):
+        """Тест разделения личных страниц и общих лотов по пользователям"""
+        self.cache.store(MARKET_URL, namespace="1", content=b"market", headers={})
+        self.cache.store(LOTS_URL, namespace="1", content=b"lots", headers={})
+
+        self.assertIsNone(self.cache.lookup(MARKET_URL, namespace="2"))
+        self.assertEqual(self.cache.lookup(LOTS_URL, namespace="2").content, b"lots")
+
+    def test_expired_and_refresh(self):
+        """Тест устаревания по ttl класса и продления после 304"""
+        with patch("src.ResponseCache.time", return_value=1000.0):
+            self.cache.store(LOTS_URL, content=b"lots", headers={"Last-Modified": "date"})
+        with patch("src.ResponseCache.time", return_value=1000.0 + 601):
+            cached = self.cache.lookup(LOTS_URL)
+            self.assertFalse(cached.fresh)
+            self.assertEqual(cached.validators(), {"If-Modified-Since": "date"})
+
+            self.cache.refresh(LOTS_URL)
+            self.assertTrue(self.cache.lookup(LOTS_URL).fresh)
+
+    def test_eviction(self):
+        """Тест вытеснения давно не использованных ответов при превышении размера"""
+        with patch("src.ResponseCache.time", return_value=1.0):
+            self.cache.store(LOTS_URL, content=b"a" * 40, headers={})
+        with patch("src.ResponseCache.time", return_value=2.0):
+            self.cache.store(f"{LOTS_URL}0", content=b"b" * 40, headers={})
+        with patch("src.ResponseCache.time", return_value=3.0):
+            self.cache.lookup(LOTS_URL)
+        with patch("src.ResponseCache.time", return_value=4.0):
+            self.cache.store(f"{LOTS_URL}1", content=b"c" * 40, headers={})
+
+        self.assertIsNotNone(self.cache.lookup(LOTS_URL))
+        self.assertIsNone(self.cache.lookup(f"{LOTS_URL}0"))
+        self.assertIsNotNone(self.cache.lookup(f"{LOTS_URL}1"))
+
+
+class TestAsyncFetcherCache(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.cache = ResponseCache(path=":memory:")
+        self.limiter = AdaptiveRateLimiter(delay=0, min_delay=0, max_delay=0)
+        self.mock_client = MagicMock()
+        self.mock_client.get = AsyncMock()
+        self.mock_client.aclose = AsyncMock()
+
+    def tearDown(self):
+        self.cache.close()
+
+    async def fetch(self, url):
+        with patch("httpx.AsyncClient", return_value=self.mock_client):
+            async with AsyncFetcher(
+                    headers={},
+                    cookies={},
+                    limiter=self.limiter,
+                    max_concurrency=1,
+                    response_cache=self.cache,
+                    cache_namespace="1"
+            ) as fetcher:
+                response = await fetcher.get(url)
+                return response, fetcher
+
+    async def test_store_and_hit(self):
+        """Тест сохранения ответа и отдачи свежего без запроса"""
+        self.mock_client.get.return_value = httpx.Response(
+            200, content=b"lots", request=httpx.Request("GET", LOTS_URL)
+        )
+
+        await self.fetch(LOTS_URL)
+        response, fetcher = await self.fetch(LOTS_URL)
+
+        self.assertEqual(response.content, b"lots")
+        self.assertEqual((fetcher.requests_count, fetcher.cache_hits), (0, 1))
+        self.mock_client.get.assert_called_once()
+
+    async def test_not_modified(self):
+        """Тест условного запроса для устаревшего ответа и отдачи тела из кэша на 304"""
+        with patch("src.ResponseCache.time", return_value=1000.0):
+            self.cache.store(LOTS_URL, content=b"lots", headers={"ETag": "\"v1\""})
+        self.mock_client.get.return_value = httpx.Response(304, request=httpx.Request("GET", LOTS_URL))
+
+        response, fetcher = await self.fetch(LOTS_URL)
+
+        self.assertEqual(response.content, b"lots")
+        self.assertEqual(fetcher.not_modified_count, 1)
+        self.mock_client.get.assert_called_once_with(LOTS_URL, timeout=10, headers={"If-None-Match": "\"v1\""})
+        self.assertTrue(self.cache.lookup(LOTS_URL).fresh)
+
+    async def test_redirect_not_stored(self):
+        """Тест пропуска ответа после редиректа"""
+        self.mock_client.get.return_value = httpx.Response(
+            200, content=b"login", request=httpx.Request("GET", "https://mangabuff.ru/login")
+        )
+
+        await self.fetch(MARKET_URL)
+
+        self.assertIsNone(self.cache.lookup(MARKET_URL, namespace="1"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+from datetime import timedelta
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from src.HtmlBackend import ListingPage
+from src.MangabuffParser import CardInfo, CardRank, Lot
+from src.ScanCheckpoint import ScanCheckpoint
+
+
+class TestScanCheckpoint(TestCase):
+    def setUp(self):
+        self.checkpoint = ScanCheckpoint(path=":memory:", ttl=timedelta(hours=1))
+        self.page = ListingPage(items=[
+            CardInfo(data_id="1", rank=CardRank.S, name="test 1", manga_name="manga 1", market_signal="3"),
+            CardInfo(data_id="2", rank=CardRank.A)
+        ], last_page=4)
+
+    def tearDown(self):
+        self.checkpoint.close()
+
+    def test_page(self):
+        """Тест сохранения и загрузки страницы выдачи"""
+        self.checkpoint.save_page(namespace="1", url="/market?&page=2", page=self.page)
+        page = self.checkpoint.load_page(namespace="1", url="/market?&page=2")
+
+        self.assertEqual(page.last_page, 4)
+        self.assertEqual(
+            [(card.data_id, card.rank.value, card.name, card.manga_name, card.market_signal) for card in page.items],
+            [("1", "s", "test 1", "manga 1", "3"), ("2", "a", "", "", "")]
+        )
+        self.assertIsNone(self.checkpoint.load_page(namespace="2", url="/market?&page=2"))
+        self.assertIsNone(self.checkpoint.load_page(namespace="1", url="/market?&page=3"))
+
+    def test_card(self):
+        """Тест лотов карты и промаха при изменившемся признаке из выдачи"""
+        self.checkpoint.save_card(namespace="1", data_id="1", signal="3", name="test 1", lots=[Lot(10, "1"), Lot(20, "2")])
+
+        card = self.checkpoint.load_card(namespace="1", data_id="1", signal="3")
+        self.assertEqual((card.name, card.lots), ("test 1", [Lot(10, "1"), Lot(20, "2")]))
+        self.assertIsNone(self.checkpoint.load_card(namespace="1", data_id="1", signal="4"))
+        self.assertIsNone(self.checkpoint.load_card(namespace="2", data_id="1", signal="3"))
+
+    def test_expired(self):
+        """Тест промаха по истечении ttl"""
+        with patch("src.ScanCheckpoint.time", return_value=1000.0):
+            self.checkpoint.save_page(namespace="1", url="/market?&page=1", page=self.page)
+            self.checkpoint.save_card(namespace="1", data_id="1", signal="", name="test 1", lots=[])
+        with patch("src.ScanCheckpoint.time", return_value=1000.0 + 3601):
+            self.assertIsNone(self.checkpoint.load_page(namespace="1", url="/market?&page=1"))
+            self.assertIsNone(self.checkpoint.load_card(namespace="1", data_id="1", signal=""))
+
+    def test_clear(self):
+        """Тест очистки точки одного аккаунта"""
+        for namespace in ("1", "2"):
+            self.checkpoint.save_page(namespace=namespace, url="/market?&page=1", page=self.page)
+            self.checkpoint.save_card(namespace=namespace, data_id="1", signal="", name="test 1", lots=[])
+
+        self.checkpoint.clear(namespace="1")
+
+        self.assertIsNone(self.checkpoint.load_page(namespace="1", url="/market?&page=1"))
+        self.assertIsNone(self.checkpoint.load_card(namespace="1", data_id="1", signal=""))
+        self.assertIsNotNone(self.checkpoint.load_page(namespace="2", url="/market?&page=1"))
+        self.assertIsNotNone(self.checkpoint.load_card(namespace="2", data_id="1", signal=""))
+
+
+if __name__ == '__main__':
+    main()
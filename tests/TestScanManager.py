@@ -0,0 +1,75 @@
+import asyncio
+from unittest import IsolatedAsyncioTestCase, main
+from unittest.mock import MagicMock
+
+from src.ScanManager import ScanManager
+
+
+class TestScanManager(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.release = asyncio.Event()
+        self.calls = 0
+
+        async def scan(*, want, progress, on_group, on_card):
+            self.calls += 1
+            progress.stage = "market"
+            await self.release.wait()
+            return "result"
+
+        self.parser = MagicMock()
+        self.parser.aget_cards_lots = scan
+        self.manager = ScanManager(parser=self.parser)
+
+    async def test_start_joins_running_scan(self):
+        """Тест присоединения второго запуска к идущему сканированию"""
+        first_task, first_created = self.manager.start()
+        second_task, second_created = self.manager.start()
+
+        self.assertTrue(first_created)
+        self.assertFalse(second_created)
+        self.assertIs(first_task, second_task)
+
+        self.release.set()
+        self.assertEqual(await first_task, "result")
+        self.assertEqual(self.calls, 1)
+        self.assertFalse(self.manager.running)
+
+    async def test_start_after_finish(self):
+        """Тест нового сканирования после завершения предыдущего"""
+        self.release.set()
+        first_task, _ = self.manager.start()
+        await first_task
+
+        second_task, created = self.manager.start()
+        await second_task
+
+        self.assertTrue(created)
+        self.assertIsNot(first_task, second_task)
+        self.assertEqual(self.calls, 2)
+
+    async def test_progress(self):
+        """Тест обновления прогресса сканирования"""
+        self.assertIsNone(self.manager.progress)
+        task, _ = self.manager.start()
+        await asyncio.sleep(0)
+
+        self.assertEqual(self.manager.progress.stage, "market")
+
+        self.release.set()
+        await task
+
+    async def test_cancel(self):
+        """Тест отмены сканирования"""
+        self.assertFalse(self.manager.cancel())
+
+        task, _ = self.manager.start()
+        await asyncio.sleep(0)
+
+        self.assertTrue(self.manager.cancel())
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertFalse(self.manager.running)
+
+
+if __name__ == '__main__':
+    main()
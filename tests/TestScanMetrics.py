@@ -0,0 +1,92 @@
+from unittest import TestCase, main
+from urllib.request import urlopen
+
+from benchmarks.standin_server import StandinServer, StandinConfig
+from src.MangabuffParser import MangabuffParser
+from src.ScanMetrics import ScanMetrics, MetricsServer, StageStats
+
+
+class TestScanMetrics(TestCase):
+    def setUp(self):
+        self.metrics = ScanMetrics()
+
+    def test_totals(self):
+        """Тест сумм по этапам"""
+        self.metrics.observe_request(stage="market", status=200, size=100, seconds=0.5, wait=0.25)
+        self.metrics.observe_request(stage="market", status=429, size=10, seconds=0.1)
+        self.metrics.observe_request(stage="lots", status="error", size=0, seconds=1.0)
+        self.metrics.observe_cache_hit(stage="lots")
+        self.metrics.observe_parse(stage="market", seconds=0.05)
+
+        self.assertEqual(self.metrics.totals(), {
+            "market": StageStats(requests=2, errors=1, bytes=110, cache_hits=0,
+                                 network_seconds=0.6, parse_seconds=0.05, wait_seconds=0.25),
+            "lots": StageStats(requests=1, errors=1, bytes=0, cache_hits=1,
+                               network_seconds=1.0, parse_seconds=0.0, wait_seconds=0.0),
+        })
+
+    def test_scan(self):
+        """Тест сводки по сканированию без значений до его начала"""
+        self.metrics.observe_request(stage="login", status=200, size=5, seconds=0.1)
+        self.metrics.observe_request(stage="market", status=200, size=5, seconds=0.1)
+
+        self.metrics.begin_scan()
+        self.metrics.observe_request(stage="market", status=200, size=7, seconds=0.2)
+        self.assertTrue(self.metrics.running)
+        self.assertEqual(list(self.metrics.scan()), ["market"])
+        self.metrics.end_scan()
+
+        self.assertFalse(self.metrics.running)
+        self.assertIsNotNone(self.metrics.last_scan_duration)
+        self.assertEqual(self.metrics.scan()["market"].bytes, 7)
+        self.assertEqual(self.metrics.totals()["market"].bytes, 12)
+
+    def test_render(self):
+        """Тест текстового формата Prometheus"""
+        self.metrics.observe_request(stage="lots", status=200, size=3, seconds=0.07)
+        text = self.metrics.render()
+
+        self.assertIn('mangabuff_requests_total{stage="lots",status="200"} 1', text)
+        self.assertIn('mangabuff_response_bytes_total{stage="lots"} 3', text)
+        self.assertIn('mangabuff_network_seconds_bucket{stage="lots",le="0.05"} 0', text)
+        self.assertIn('mangabuff_network_seconds_bucket{stage="lots",le="0.1"} 1', text)
+        self.assertIn('mangabuff_network_seconds_bucket{stage="lots",le="+Inf"} 1', text)
+        self.assertIn('mangabuff_network_seconds_count{stage="lots"} 1', text)
+        self.assertIn("mangabuff_scans_total 0", text)
+
+    def test_server(self):
+        """Тест эндпоинта /metrics"""
+        self.metrics.observe_request(stage="lots", status=200, size=3, seconds=0.07)
+        server = MetricsServer(metrics=self.metrics, port=0)
+        server.start()
+        try:
+            host, port = server.address
+            with urlopen(f"http://{host}:{port}/metrics") as response:
+                self.assertEqual(response.read().decode(), self.metrics.render())
+        finally:
+            server.stop()
+
+    def test_parser_stages(self):
+        """Тест метрик всех этапов сквозного сканирования на стенде"""
+        with StandinServer(StandinConfig(cards=20, page_size=5)) as server:
+            parser = MangabuffParser(
+                mail=server.config.mail,
+                password=server.config.password,
+                base_url=server.url,
+                request_delay=0,
+                min_request_delay=0,
+                metrics=self.metrics
+            )
+            parser.get_cards_lots(want=True)
+
+        self.assertEqual(list(self.metrics.totals()), ["login", "user_id", "market", "wish_list", "lots"])
+        scan = self.metrics.scan()
+        self.assertEqual(list(scan), ["market", "wish_list", "lots"])
+        self.assertEqual(sum(stats.requests for stats in scan.values()), parser.last_scan_requests)
+        for stats in scan.values():
+            self.assertGreater(stats.bytes, 0)
+            self.assertGreater(stats.parse_seconds, 0)
+
+
+if __name__ == '__main__':
+    main()
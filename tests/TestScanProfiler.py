@@ -0,0 +1,114 @@
+import pstats
+import tracemalloc
+from contextlib import nullcontext
+from tempfile import TemporaryDirectory
+from pathlib import Path
+from unittest import TestCase, main
+
+from benchmarks.standin_server import StandinServer, StandinConfig
+from src.MangabuffParser import MangabuffParser
+from src.ScanProfiler import ScanProfiler
+
+
+def workload():
+    return [str(i) * 10 for i in range(10000)]
+
+
+class TestScanProfiler(TestCase):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.path = Path(self.temp_dir.name) / "profiles"
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_disabled(self):
+        """Тест пустого контекста без запроса профилирования"""
+        profiler = ScanProfiler(path=self.path)
+
+        self.assertIsInstance(profiler.profile(), nullcontext)
+        with profiler.profile():
+            workload()
+        self.assertFalse(self.path.exists())
+        self.assertIsNone(profiler.last_dump)
+
+    def test_arm(self):
+        """Тест профилирования одного сканирования после arm()"""
+        profiler = ScanProfiler(path=self.path)
+        profiler.arm()
+        self.assertTrue(profiler.armed)
+
+        with profiler.profile():
+            workload()
+
+        self.assertFalse(profiler.armed)
+        self.assertFalse(tracemalloc.is_tracing())
+        summary = profiler.last_dump
+        self.assertEqual(summary.parent, self.path)
+        report = summary.read_text(encoding="utf-8")
+        self.assertIn("Peak traced memory", report)
+        self.assertIn("workload", report)
+        functions = pstats.Stats(str(summary.with_suffix(".prof"))).stats
+        self.assertIn("workload", {function for _, _, function in functions})
+
+        self.assertIsInstance(profiler.profile(), nullcontext)
+
+    def test_enabled(self):
+        """Тест профилирования каждого сканирования"""
+        profiler = ScanProfiler(path=self.path, enabled=True)
+        with profiler.profile():
+            workload()
+        self.assertTrue(profiler.armed)
+        self.assertIsNotNone(profiler.last_dump)
+
+    def test_nested(self):
+        """Тест: профилирование не запускается второй раз внутри первого"""
+        profiler = ScanProfiler(path=self.path, enabled=True)
+        with profiler.profile():
+            self.assertIsInstance(profiler.profile(), nullcontext)
+
+    def test_keeps_tracing(self):
+        """Тест: уже запущенный tracemalloc не останавливается"""
+        tracemalloc.start()
+        try:
+            profiler = ScanProfiler(path=self.path, enabled=True)
+            with profiler.profile():
+                workload()
+            self.assertTrue(tracemalloc.is_tracing())
+        finally:
+            tracemalloc.stop()
+
+    def test_exception(self):
+        """Тест: отчёт пишется и при ошибке сканирования"""
+        profiler = ScanProfiler(path=self.path, enabled=True)
+        with self.assertRaises(RuntimeError):
+            with profiler.profile():
+                raise RuntimeError()
+        self.assertTrue(profiler.last_dump.exists())
+
+    def test_parser_scan(self):
+        """Тест профилирования сканирования на стенде"""
+        profiler = ScanProfiler(path=self.path)
+        with StandinServer(StandinConfig(cards=10, page_size=5)) as server:
+            parser = MangabuffParser(
+                mail=server.config.mail,
+                password=server.config.password,
+                base_url=server.url,
+                request_delay=0,
+                min_request_delay=0,
+                profiler=profiler
+            )
+            parser.get_cards_lots(want=True)
+            self.assertIsNone(profiler.last_dump)
+
+            profiler.arm()
+            parser.get_cards_lots(want=True)
+
+        self.assertEqual(len(list(self.path.glob("*.prof"))), 1)
+        # Полная статистика, а не топ отчёта: место функции в топе зависит от задержек стенда
+        functions = pstats.Stats(str(profiler.last_dump.with_suffix(".prof"))).stats
+        self.assertIn("_parse_market", {function for _, _, function in functions})
+
+
+if __name__ == '__main__':
+    main()
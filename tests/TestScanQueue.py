@@ -0,0 +1,96 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from src.ScanQueue import ScanQueue
+
+
+class TestScanQueue(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = Path(self.directory.name) / "queue.sqlite3"
+        self.queue = ScanQueue(path=self.path)
+        self.scan_id = self.queue.open_scan()
+
+    def tearDown(self):
+        self.queue.close()
+        self.directory.cleanup()
+
+    def test_take_once(self):
+        """Тест: каждая единица достаётся одному процессу, по порядку"""
+        unit_ids = self.queue.put(self.scan_id, "lots", ({"number": number} for number in range(3)))
+        other = ScanQueue(path=self.path)
+        try:
+            taken = [self.queue.take(self.scan_id, 0), other.take(self.scan_id, 1), self.queue.take(self.scan_id, 0)]
+            self.assertIsNone(other.take(self.scan_id, 1))
+        finally:
+            other.close()
+
+        self.assertEqual([unit.unit_id for unit in taken], unit_ids)
+        self.assertEqual([unit.payload for unit in taken], [{"number": 0}, {"number": 1}, {"number": 2}])
+        self.assertEqual(self.queue.counts(self.scan_id)["taken"], 3)
+
+    def test_complete(self):
+        """Тест результата и подсчёта выполненного по процессам"""
+        first, second = self.queue.put(self.scan_id, "market", [{}, {}])
+        self.queue.take(self.scan_id, 0)
+        self.queue.take(self.scan_id, 1)
+        self.queue.complete(first, {"cards": [], "requests": 2})
+
+        self.assertEqual(self.queue.result(first), {"cards": [], "requests": 2})
+        self.assertIsNone(self.queue.result(second))
+        self.assertEqual(self.queue.results(self.scan_id, "market"), [{"cards": [], "requests": 2}])
+        self.assertEqual(self.queue.done_by_worker(self.scan_id), {0: 1})
+
+    def test_fail(self):
+        """Тест повторной выдачи после ошибки и отказа после последней попытки"""
+        self.queue.put(self.scan_id, "lots", [{}])
+        for attempt in (1, 2):
+            unit = self.queue.take(self.scan_id, 0)
+            self.assertEqual(unit.attempts, attempt)
+            self.assertEqual(self.queue.fail(unit.unit_id, "error", max_attempts=2), attempt < 2)
+
+        self.assertIsNone(self.queue.take(self.scan_id, 0))
+        self.assertEqual(self.queue.counts(self.scan_id)["failed"], 1)
+        self.assertEqual(self.queue.errors(self.scan_id), ["error"])
+
+    def test_release(self):
+        """Тест возврата в очередь единиц упавшего процесса"""
+        self.queue.put(self.scan_id, "lots", [{}, {}])
+        unit = self.queue.take(self.scan_id, 0)
+        self.queue.take(self.scan_id, 1)
+
+        self.assertEqual(self.queue.release(self.scan_id, 0), 1)
+        self.assertEqual(self.queue.take(self.scan_id, 1).unit_id, unit.unit_id)
+
+    def test_owner(self):
+        """Тест: единицу с владельцем забирает только он, даже если она раньше в очереди"""
+        owned, = self.queue.put(self.scan_id, "market", [{}], owner=0)
+        shared, = self.queue.put(self.scan_id, "wish_list", [{}])
+
+        self.assertEqual(self.queue.take(self.scan_id, 1).unit_id, shared)
+        self.assertIsNone(self.queue.take(self.scan_id, 1))
+        self.assertEqual(self.queue.owned(self.scan_id, 0), 1)
+        self.assertEqual(self.queue.take(self.scan_id, 0).unit_id, owned)
+
+        self.queue.complete(owned, {})
+        self.assertEqual(self.queue.owned(self.scan_id, 0), 0)
+
+    def test_close_scan(self):
+        """Тест закрытия сканирования: единицы удаляются, другие сканирования не затронуты"""
+        other_scan = self.queue.open_scan()
+        self.queue.put(self.scan_id, "lots", [{}])
+        self.queue.put(other_scan, "lots", [{}])
+        self.queue.register(self.scan_id, 0, "1")
+
+        self.queue.close_scan(self.scan_id)
+
+        self.assertFalse(self.queue.is_open(self.scan_id))
+        self.assertTrue(self.queue.is_open(other_scan))
+        self.assertIsNone(self.queue.take(self.scan_id, 0))
+        self.assertEqual(self.queue.workers(self.scan_id), {})
+        self.assertIsNotNone(self.queue.take(other_scan, 0))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+import os
+import sqlite3
+import stat
+from tempfile import TemporaryDirectory
+from pathlib import Path
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from src.SessionStore import SessionStore
+
+
+class TestSessionStore(TestCase):
+    def setUp(self):
+        self.store = SessionStore(path=":memory:")
+        self.cookies = [
+            {"name": "mangabuff_session", "value": "abc", "domain": "mangabuff.ru", "path": "/", "expires": None, "secure": True}
+        ]
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_load_empty(self):
+        """Тест отсутствующей сессии"""
+        self.assertIsNone(self.store.load(base_url="https://mangabuff.ru", mail="user@example.com"))
+
+    def test_save_load(self):
+        """Тест сохранения и загрузки сессии"""
+        self.store.save(base_url="https://mangabuff.ru", mail="user@example.com", user_id="42", cookies=self.cookies)
+        session = self.store.load(base_url="https://mangabuff.ru", mail="user@example.com")
+
+        self.assertEqual(session.user_id, "42")
+        self.assertEqual(session.cookies, self.cookies)
+
+    def test_separate_sites(self):
+        """Тест: сессии разных адресов сайта и почт не смешиваются"""
+        self.store.save(base_url="https://mangabuff.ru", mail="user@example.com", user_id="42", cookies=self.cookies)
+
+        self.assertIsNone(self.store.load(base_url="http://127.0.0.1:8080", mail="user@example.com"))
+        self.assertIsNone(self.store.load(base_url="https://mangabuff.ru", mail="other@example.com"))
+
+    def test_save_replaces(self):
+        """Тест замены сессии при повторном сохранении"""
+        self.store.save(base_url="https://mangabuff.ru", mail="user@example.com", user_id="42", cookies=self.cookies)
+        self.store.save(base_url="https://mangabuff.ru", mail="user@example.com", user_id="42", cookies=[])
+
+        self.assertEqual(self.store.load(base_url="https://mangabuff.ru", mail="user@example.com").cookies, [])
+
+    def test_delete(self):
+        """Тест удаления сессии"""
+        self.store.save(base_url="https://mangabuff.ru", mail="user@example.com", user_id="42", cookies=self.cookies)
+        self.store.delete(base_url="https://mangabuff.ru", mail="user@example.com")
+
+        self.assertIsNone(self.store.load(base_url="https://mangabuff.ru", mail="user@example.com"))
+
+    def test_permissions(self):
+        """Тест: файл с cookies доступен только владельцу"""
+        with TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "sessions.sqlite3"
+            SessionStore(path=path).close()
+            SessionStore(path=path).close()
+
+            self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+
+    def test_permissions_before_connect(self):
+        """Тест: файл создаётся с правами владельца ещё до подключения, при любом umask"""
+        modes = list()
+        connect = sqlite3.connect
+
+        def check_mode(path):
+            modes.append(stat.S_IMODE(os.stat(path).st_mode))
+            return connect(path)
+
+        with TemporaryDirectory() as temp_dir, patch("sqlite3.connect", side_effect=check_mode):
+            umask = os.umask(0)
+            try:
+                SessionStore(path=Path(temp_dir) / "sessions.sqlite3").close()
+            finally:
+                os.umask(umask)
+
+        self.assertEqual(modes, [0o600])
+
+
+if __name__ == '__main__':
+    main()
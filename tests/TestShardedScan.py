@@ -0,0 +1,113 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from benchmarks.standin_server import StandinServer, StandinConfig
+from src.MangabuffParser import MangabuffParser, CardRank as ParserRank
+# CardRank того же модуля, что у ShardedScan, иначе проверка типа ранга не пройдёт
+from src.ShardedScan import ShardedScan, ShardedScanError, CardRank
+
+
+class TestShardedScan(TestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_scan(self, server, accounts=None):
+        return ShardedScan(
+            accounts=accounts or [(account.mail, account.password) for account in server.accounts],
+            queue_path=Path(self.directory.name) / "queue.sqlite3",
+            base_url=server.url,
+            request_delay=0,
+            min_request_delay=0,
+            retry_backoff=0
+        )
+
+    def assert_cards(self, server, cards, expected):
+        catalogue = {card.data_id: card for card in server.catalogue}
+        self.assertEqual({card.data_id for card in cards}, expected)
+        self.assertEqual(len(cards), len(expected))
+        for card in cards:
+            self.assertEqual(card.name, catalogue[card.data_id].name)
+            self.assertEqual(list(card.lots.prices), sorted(price for _, price in catalogue[card.data_id].lots))
+
+    def test_want_scan(self):
+        """Тест желаемого первого аккаунта тремя процессами"""
+        with StandinServer(StandinConfig(cards=90, page_size=10, wish_ratio=0.5, users=3)) as server:
+            scan = self.make_scan(server)
+            cards = scan.get_cards_lots(want=True)
+
+            self.assert_cards(server, cards, server.expected_want_cards(0))
+            self.assertTrue(all(card.manga_name for card in cards))
+            self.assertGreater(len(scan.last_scan_units), 1)
+            self.assertGreater(scan.last_scan_requests, len(cards))
+
+    def test_want_scan_requests(self):
+        """Тест: желаемое обходится по вкладке «хочу», запросов столько же, сколько у MangabuffParser"""
+        with StandinServer(StandinConfig(cards=200, page_size=10, wish_ratio=0.1, users=2)) as server:
+            parser = MangabuffParser(
+                mail=server.config.mail,
+                password=server.config.password,
+                base_url=server.url,
+                request_delay=0,
+                min_request_delay=0
+            )
+            parser.get_cards_lots(want=True)
+            market_pages = server.stats["market_pages"]
+
+            scan = self.make_scan(server)
+            scan.get_cards_lots(want=True)
+
+            self.assertEqual(server.stats["market_pages"] - market_pages, market_pages)
+            self.assertLess(market_pages, 200 // 10)
+            self.assertEqual(scan.last_scan_requests, parser.last_scan_requests)
+
+    def test_query_scan(self):
+        """Тест поиска с рангом: тот же результат, что у MangabuffParser"""
+        with StandinServer(StandinConfig(cards=60, page_size=10, users=2)) as server:
+            query = server.catalogue[0].manga_name
+            rank = CardRank(server.catalogue[0].rank)
+            expected = MangabuffParser(
+                mail=server.config.mail,
+                password=server.config.password,
+                base_url=server.url,
+                request_delay=0,
+                min_request_delay=0
+            ).get_cards_lots(query=query, rank=ParserRank(rank.value))
+
+            cards = self.make_scan(server).get_cards_lots(query=query, rank=rank)
+
+            self.assert_cards(server, cards, {card.data_id for card in expected})
+            self.assertTrue(all(card.manga_name == query.lower() for card in cards))
+
+    def test_failed_worker(self):
+        """Тест: процесс, который не вошёл, не мешает остальным"""
+        with StandinServer(StandinConfig(cards=40, page_size=10, users=2)) as server:
+            accounts = [(account.mail, account.password) for account in server.accounts] + [(server.config.mail, "wrong")]
+            cards = self.make_scan(server, accounts).get_cards_lots(want=True)
+
+            self.assert_cards(server, cards, server.expected_want_cards(0))
+
+    def test_no_workers(self):
+        """Тест ошибки, если ни один аккаунт не вошёл"""
+        with StandinServer(StandinConfig(cards=10)) as server:
+            with self.assertRaises(ShardedScanError):
+                self.make_scan(server, [(server.config.mail, "wrong")]).get_cards_lots(query="test")
+
+    def test_arguments(self):
+        """Тест проверки аргументов"""
+        with self.assertRaises(TypeError):
+            ShardedScan(accounts="mail", queue_path=":memory:")
+        with self.assertRaises(ValueError):
+            ShardedScan(accounts=[], queue_path=":memory:")
+        scan = ShardedScan(accounts=[("mail@gmail.com", "password")], queue_path=":memory:")
+        with self.assertRaises(ValueError):
+            scan.get_cards_lots()
+        with self.assertRaises(TypeError):
+            scan.get_cards_lots(want=True, rank="s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+import asyncio
+from collections import defaultdict
+from math import ceil
+from unittest import TestCase, main
+
+from benchmarks.standin_server import StandinServer, StandinConfig
+from src.MangabuffParser import MangabuffParser, MARKET_MAX_PAGES
+from src.ScanMetrics import ScanMetrics
+from src.SharedMarketScan import SharedMarketScan
+
+
+class TestSharedMarketScan(TestCase):
+    def setUp(self):
+        self.metrics = ScanMetrics()
+
+    def make_scan(self, server, numbers=None):
+        return SharedMarketScan(accounts={
+            f"chat{number}": MangabuffParser(
+                mail=account.mail,
+                password=account.password,
+                base_url=server.url,
+                request_delay=0,
+                min_request_delay=0,
+                # Скачки задержки локального стенда замедляют ограничитель, предел не даёт тестам растянуться
+                max_request_delay=0.05,
+                metrics=self.metrics
+            ) for number, account in enumerate(server.accounts) if numbers is None or number in numbers
+        })
+
+    def test_shared_scan(self):
+        """Тест: у каждого аккаунта своё желаемое, лоты карты загружаются один раз"""
+        config = StandinConfig(cards=60, page_size=10, wish_ratio=0.4, users=3)
+        with StandinServer(config) as server:
+            scan = self.make_scan(server)
+            groups = defaultdict(list)
+            cards_done = defaultdict(list)
+            requests_before = server.stats["scan_requests"]
+
+            result = asyncio.run(scan.aget_cards_lots(
+                on_group=lambda key, cards: groups[key].extend(cards),
+                on_card=lambda key, card: cards_done[key].append(card)
+            ))
+            requests = server.stats["scan_requests"] - requests_before
+
+            catalogue = {card.data_id: card for card in server.catalogue}
+            wanted = [server.expected_want_cards(number) for number in range(3)]
+            self.assertEqual(list(result), ["chat0", "chat1", "chat2"])
+            for number, key in enumerate(result):
+                self.assertEqual({card.data_id for card in result[key]}, wanted[number])
+                self.assertEqual(set(groups[key]), set(result[key]))
+                self.assertEqual(set(cards_done[key]), set(result[key]))
+                for card in result[key]:
+                    expected = catalogue[card.data_id]
+                    self.assertEqual(card.name, expected.name)
+                    self.assertEqual(list(card.lots.prices), sorted(price for _, price in expected.lots))
+
+            distinct = set().union(*wanted)
+            self.assertLess(len(distinct), sum(len(cards) for cards in wanted))
+            # Каждый аккаунт обходит свою вкладку «хочу» и желаемое, лоты общие
+            self.assertEqual(requests, sum(2 * ceil(len(cards) / config.page_size) for cards in wanted) + len(distinct))
+            self.assertEqual(scan.last_scan_requests, requests)
+
+        self.assertIn("mangabuff_scans_total 1", self.metrics.render())
+
+    def test_shared_scan_large_market(self):
+        """Тест: на торговой площадке больше MARKET_MAX_PAGES страниц аккаунты получают то же, что и поодиночке"""
+        config = StandinConfig(cards=600, page_size=5, wish_ratio=0.1, users=2)
+        with StandinServer(config) as server:
+            self.assertGreater(ceil(config.cards / config.page_size), MARKET_MAX_PAGES)
+            market_pages_before = server.stats["market_pages"]
+            result = asyncio.run(self.make_scan(server).aget_cards_lots())
+            market_pages = server.stats["market_pages"] - market_pages_before
+
+            wanted = [server.expected_want_cards(number) for number in range(2)]
+            self.assertEqual(market_pages, sum(ceil(len(cards) / config.page_size) for cards in wanted))
+            for number, key in enumerate(result):
+                single = asyncio.run(self.make_scan(server, numbers=[number]).aget_cards_lots())[key]
+                self.assertEqual({card.data_id for card in result[key]}, wanted[number])
+                self.assertEqual(
+                    sorted((card.data_id, card.name, list(card.lots.prices)) for card in result[key]),
+                    sorted((card.data_id, card.name, list(card.lots.prices)) for card in single)
+                )
+
+    def test_single_account(self):
+        """Тест: один аккаунт сканирует как раньше, через market?want=1"""
+        config = StandinConfig(cards=60, page_size=10, wish_ratio=0.2)
+        with StandinServer(config) as server:
+            scan = self.make_scan(server)
+            requests_before = server.stats["scan_requests"]
+            result = asyncio.run(scan.aget_cards_lots())
+            requests = server.stats["scan_requests"] - requests_before
+
+            wanted = server.expected_want_cards()
+            self.assertEqual({card.data_id for card in result["chat0"]}, wanted)
+            self.assertEqual(requests, 2 * ceil(len(wanted) / config.page_size) + len(wanted))
+
+    def test_arguments(self):
+        """Тест проверки аргументов"""
+        with self.assertRaises(TypeError):
+            SharedMarketScan(accounts=[])
+        with self.assertRaises(ValueError):
+            SharedMarketScan(accounts={})
+        with self.assertRaises(ValueError):
+            asyncio.run(SharedMarketScan(accounts={"chat": None}).aget_cards_lots(want=False))
+
+
+if __name__ == '__main__':
+    main()
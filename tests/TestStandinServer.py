@@ -0,0 +1,144 @@
+from math import ceil
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+import httpx
+
+from benchmarks.standin_server import StandinServer, StandinConfig
+from src.AsyncFetcher import RETRIES
+from src.MangabuffParser import MangabuffParser, NotAuthorized
+from src.ScanCheckpoint import ScanCheckpoint
+from src.SessionStore import SessionStore
+
+
+def make_parser(server, password=None, session_store=None, checkpoint=None):
+    return MangabuffParser(
+        mail=server.config.mail,
+        password=password or server.config.password,
+        base_url=server.url + "/",
+        request_delay=0,
+        min_request_delay=0,
+        # Ответы 5xx замедляют ограничитель, предел не даёт тестам растянуться
+        max_request_delay=0.05,
+        session_store=session_store,
+        retry_backoff=0,
+        checkpoint=checkpoint
+    )
+
+
+class TestStandinServer(TestCase):
+    def test_want_scan(self):
+        """Тест сквозного сканирования желаемого с пагинацией"""
+        with StandinServer(StandinConfig(cards=40, page_size=7, wish_ratio=0.6)) as server:
+            cards = make_parser(server).get_cards_lots(want=True)
+
+            catalogue = {card.data_id: card for card in server.catalogue}
+            self.assertEqual({card.data_id for card in cards}, server.expected_want_cards())
+            for card in cards:
+                expected = catalogue[card.data_id]
+                self.assertEqual(card.name, expected.name)
+                self.assertEqual(card.manga_name, expected.manga_name)
+                self.assertEqual(list(card.lots.prices), sorted(price for _, price in expected.lots))
+
+    def test_wrong_password(self):
+        """Тест отказа во входе"""
+        with StandinServer(StandinConfig(cards=5)) as server:
+            with self.assertRaises(NotAuthorized):
+                make_parser(server, password="wrong")
+
+    def test_injected_errors(self):
+        """Тест внедрённых ответов 5xx на страницах сканирования: повторы, затем ошибка"""
+        with StandinServer(StandinConfig(cards=5, error_rate=1.0)) as server:
+            parser = make_parser(server)
+            with self.assertRaises(httpx.HTTPStatusError):
+                parser.get_cards_lots(want=True)
+            self.assertEqual(server.stats["scan_requests"], RETRIES + 1)
+
+    def test_retried_errors(self):
+        """Тест сканирования, которое доходит до конца на редких ответах 5xx"""
+        with StandinServer(StandinConfig(cards=40, page_size=5, error_rate=0.2)) as server:
+            cards = make_parser(server).get_cards_lots(want=True)
+
+            self.assertEqual({card.data_id for card in cards}, server.expected_want_cards())
+            self.assertTrue(all(card.lots for card in cards))
+
+    def test_resume_from_checkpoint(self):
+        """Тест продолжения прерванного сканирования с контрольной точки"""
+        checkpoint = ScanCheckpoint(path=":memory:")
+        config = StandinConfig(cards=60, page_size=5, wish_ratio=0.5, outage_after=12)
+        with StandinServer(config) as server:
+            parser = make_parser(server, checkpoint=checkpoint)
+            wanted = server.expected_want_cards()
+            full_scan = 2 * ceil(len(wanted) / config.page_size) + len(wanted)
+
+            with self.assertRaises(httpx.HTTPStatusError):
+                parser.get_cards_lots(want=True)
+            failed_requests = server.stats["scan_requests"]
+
+            server.config.outage_after = 0
+            cards = parser.get_cards_lots(want=True)
+            resumed_requests = server.stats["scan_requests"] - failed_requests
+
+            self.assertEqual({card.data_id for card in cards}, wanted)
+            self.assertTrue(all(card.lots for card in cards))
+            self.assertLess(resumed_requests, full_scan)
+            self.assertEqual(parser.last_scan_requests, resumed_requests)
+
+            # Успешное сканирование очищает точку, следующее идёт целиком
+            parser.get_cards_lots(want=True)
+            self.assertEqual(server.stats["scan_requests"] - failed_requests - resumed_requests, full_scan)
+        checkpoint.close()
+
+    def test_session_restored(self):
+        """Тест запуска с сохранённой сессией без входа"""
+        store = SessionStore(path=":memory:")
+        with StandinServer(StandinConfig(cards=10)) as server:
+            make_parser(server, session_store=store)
+            parser = make_parser(server, session_store=store)
+
+            self.assertEqual(server.stats["logins"], 1)
+            self.assertEqual({card.data_id for card in parser.get_cards_lots(want=True)}, server.expected_want_cards())
+        store.close()
+
+    def test_stored_session_expired(self):
+        """Тест входа при запуске, если сохранённая сессия истекла"""
+        store = SessionStore(path=":memory:")
+        with StandinServer(StandinConfig(cards=10)) as server:
+            make_parser(server, session_store=store)
+            server.expire_sessions()
+            parser = make_parser(server, session_store=store)
+
+            self.assertEqual(server.stats["logins"], 2)
+            self.assertEqual({card.data_id for card in parser.get_cards_lots(want=True)}, server.expected_want_cards())
+        store.close()
+
+    def test_relogin_during_scan(self):
+        """Тест повторного входа при потере сессии посреди сканирования, новая сессия сохраняется"""
+        with TemporaryDirectory() as directory, \
+                StandinServer(StandinConfig(cards=40, page_size=5, expire_after=4)) as server:
+            store = SessionStore(path=Path(directory) / "session.sqlite3")
+            parser = make_parser(server, session_store=store)
+            cards = parser.get_cards_lots(want=True)
+
+            self.assertEqual(server.stats["logins"], 2)
+            self.assertEqual({card.data_id for card in cards}, server.expected_want_cards())
+            self.assertTrue(all(card.lots for card in cards))
+
+            make_parser(server, session_store=store)
+            self.assertEqual(server.stats["logins"], 2)
+            store.close()
+
+    def test_relogin_fails(self):
+        """Тест ошибки, если повторный вход не восстановил сессию"""
+        with StandinServer(StandinConfig(cards=10)) as server:
+            parser = make_parser(server)
+            server.expire_sessions()
+            server.accounts[0] = server.accounts[0]._replace(password="changed")
+
+            with self.assertRaises(NotAuthorized):
+                parser.get_cards_lots(want=True)
+
+
+if __name__ == '__main__':
+    main()
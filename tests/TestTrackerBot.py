@@ -0,0 +1,68 @@
+import asyncio
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+from unittest.mock import AsyncMock, MagicMock
+
+from telegram.error import TelegramError
+
+from src.MangabuffParser import Lot
+from src.MarketSnapshotStore import MarketSnapshotStore
+from src.TrackerBot import TrackerBot, ChatAccount, CardInfo, CardRank
+
+
+class TestTrackerBot(TestCase):
+    def setUp(self):
+        self.temp_dir = TemporaryDirectory()
+        self.snapshots = MarketSnapshotStore(path=Path(self.temp_dir.name) / "snapshot.json")
+        self.bot = TrackerBot(token="123:test", chat_id="1", parser=MagicMock(), timestamps=[])
+        self.account = ChatAccount(chat_id="1", parser=MagicMock(), market_snapshots=self.snapshots)
+        self.cards = [
+            CardInfo(data_id="1", rank=CardRank.S, name="test 1", manga_name="test manga", lots=[Lot(100)]),
+            CardInfo(data_id="2", rank=CardRank.A, name="test 2", manga_name="test manga", lots=[Lot(200)]),
+        ]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def report(self, send_message):
+        """Отчёт по одному готовому тайтлу с заданной отправкой сообщений"""
+        context = MagicMock()
+        context.bot.send_message = send_message
+
+        async def run():
+            groups = asyncio.Queue()
+            groups.put_nowait(self.cards)
+            groups.put_nowait(None)
+
+            async def scan():
+                return {"1": self.cards}
+
+            await self.bot._report(context, self.account, groups, asyncio.create_task(scan()))
+
+        asyncio.run(run())
+
+    def test_report_saves_snapshot(self):
+        """Тест: после доставленного отчёта снимок сохраняется"""
+        send_message = AsyncMock()
+
+        self.report(send_message)
+
+        self.assertTrue(send_message.await_count)
+        self.assertEqual([card.data_id for card in self.snapshots.load()], ["1", "2"])
+
+    def test_report_send_failed(self):
+        """Тест: снимок не сохраняется, если часть отчёта не доставлена"""
+        self.snapshots.save(self.cards[:1])
+        send_message = AsyncMock(side_effect=TelegramError("Timed out"))
+
+        with self.assertLogs("src.TrackerBot", level="WARNING") as logs:
+            self.report(send_message)
+
+        self.assertTrue(send_message.await_count)
+        self.assertIn("not saved", "\n".join(logs.output))
+        self.assertEqual([card.data_id for card in self.snapshots.load()], ["1"])
+
+
+if __name__ == '__main__':
+    main()
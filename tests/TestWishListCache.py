@@ -0,0 +1,63 @@
+from datetime import timedelta
+from unittest import TestCase, main
+from unittest.mock import patch
+
+from src.MangabuffParser import CardInfo, CardRank
+from src.WishListCache import WishListCache
+
+
+class TestWishListCache(TestCase):
+    def setUp(self):
+        self.cache = WishListCache(path=":memory:", ttl=timedelta(hours=1))
+        self.cards = [
+            CardInfo(data_id="1", rank=CardRank.S, name="test 1", manga_name="test manga"),
+            CardInfo(data_id="2", rank=CardRank.X, name="test 2", manga_name="other manga"),
+        ]
+
+    def tearDown(self):
+        self.cache.close()
+
+    def test_load_empty(self):
+        """Тест пустого кэша"""
+        self.assertIsNone(self.cache.load(user_id="1", fingerprint="fp"))
+
+    def test_save_load(self):
+        """Тест сохранения и загрузки списка"""
+        self.cache.save(user_id="1", fingerprint="fp", cards=self.cards)
+        result = self.cache.load(user_id="1", fingerprint="fp")
+
+        self.assertEqual(
+            sorted((card.data_id, card.rank.value, card.name, card.manga_name) for card in result),
+            sorted((card.data_id, card.rank.value, card.name, card.manga_name) for card in self.cards)
+        )
+
+    def test_save_replaces(self):
+        """Тест замены списка при повторном сохранении"""
+        self.cache.save(user_id="1", fingerprint="fp", cards=self.cards)
+        self.cache.save(user_id="1", fingerprint="fp 2", cards=self.cards[:1])
+
+        self.assertEqual(self.cache.load(user_id="1", fingerprint="fp 2"), self.cards[:1])
+
+    def test_fingerprint_changed(self):
+        """Тест промаха при изменившемся отпечатке"""
+        self.cache.save(user_id="1", fingerprint="fp", cards=self.cards)
+        self.assertIsNone(self.cache.load(user_id="1", fingerprint="other fp"))
+
+    def test_expired(self):
+        """Тест промаха по истечении ttl"""
+        with patch("src.WishListCache.time", return_value=1000.0):
+            self.cache.save(user_id="1", fingerprint="fp", cards=self.cards)
+        with patch("src.WishListCache.time", return_value=1000.0 + 3601):
+            self.assertIsNone(self.cache.load(user_id="1", fingerprint="fp"))
+
+    def test_users_separated(self):
+        """Тест раздельного хранения списков пользователей"""
+        self.cache.save(user_id="1", fingerprint="fp", cards=self.cards)
+        self.cache.save(user_id="2", fingerprint="fp", cards=[])
+
+        self.assertEqual(len(self.cache.load(user_id="1", fingerprint="fp")), 2)
+        self.assertEqual(self.cache.load(user_id="2", fingerprint="fp"), [])
+
+
+if __name__ == '__main__':
+    main()